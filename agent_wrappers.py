@@ -1,21 +1,39 @@
 """AI Agent integration wrapper functions."""
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from agents.compiler_agent import run_code_with_agent
 from agents.evaluator_agent import evaluate_submission
 from agents.efficiency_agent import analyze_efficiency
 from agents.testcase_agent import generate_testcases_for_question
-from config import MAX_CODE_SIZE_KB
+from config import MAX_CODE_SIZE_KB, AGENT_WORKERS, CODE_RUNNER, GRADER_STOP_ON_FAILURE
+import grader
+import sandbox_runner
 
 logger = logging.getLogger(__name__)
 
+_executor = None
+_executor_lock = threading.Lock()
 
-def generate_hidden_testcases(description, sample_input, sample_output):
+
+def agent_executor():
+    """Bounded thread pool for running agent calls concurrently (created lazily, per process)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix="agent")
+    return _executor
+
+
+def generate_hidden_testcases(description, sample_input, sample_output, bypass_cache=False):
     """Wrapper to generate hidden test cases for a question.
     
     Args:
         description: Problem description
         sample_input: Sample input
         sample_output: Sample output
+        bypass_cache: Skip the LLM response cache for this call
     
     Returns:
         {
@@ -34,7 +52,7 @@ def generate_hidden_testcases(description, sample_input, sample_output):
                 "testcases": []
             }
         
-        testcases = generate_testcases_for_question(description, sample_input, sample_output)
+        testcases = generate_testcases_for_question(description, sample_input, sample_output, bypass_cache)
         
         if not isinstance(testcases, list):
             logger.error(f"Invalid testcase return type: {type(testcases)}")
@@ -69,7 +87,7 @@ def generate_hidden_testcases(description, sample_input, sample_output):
         }
 
 
-def compile_and_run_code(question_description, code, language, test_input=None):
+def compile_and_run_code(question_description, code, language, test_input=None, bypass_cache=False):
     """Wrapper to compile and run code.
     
     Args:
@@ -77,6 +95,7 @@ def compile_and_run_code(question_description, code, language, test_input=None):
         code: Source code
         language: Programming language (python, cpp, java, javascript)
         test_input: Input to run code with (optional)
+        bypass_cache: Skip the LLM response cache for this call
     
     Returns:
         {
@@ -84,7 +103,8 @@ def compile_and_run_code(question_description, code, language, test_input=None):
             "error": str or None,
             "data": {
                 "output": str,
-                "execution_time": float
+                "execution_time": float,
+                "time_ms": float, "memory_kb": int (local runs only)
             }
         }
     """
@@ -113,7 +133,15 @@ def compile_and_run_code(question_description, code, language, test_input=None):
                 "data": None
             }
         
-        result = run_code_with_agent(question_description, code, language, test_input)
+        # Real execution when configured and the toolchain is installed;
+        # the LLM-simulated run covers everything else
+        if CODE_RUNNER == "local" and sandbox_runner.supported(language):
+            try:
+                return _run_locally(code, language, test_input)
+            except OSError as e:
+                logger.error(f"Local execution failed, falling back to the compiler agent: {e}")
+        
+        result = run_code_with_agent(question_description, code, language, test_input, bypass_cache)
         
         if "error" in result:
             return {
@@ -141,7 +169,29 @@ def compile_and_run_code(question_description, code, language, test_input=None):
         }
 
 
-def evaluate_code_against_testcases(question_description, code, language, testcases):
+def _run_locally(code, language, test_input):
+    """Run code in the local sandbox (compile_and_run_code result format)."""
+    result = sandbox_runner.run_code(code, language, test_input or "")
+    if result["status"] != sandbox_runner.STATUS_OK:
+        return {
+            "success": False,
+            "error": sandbox_runner.describe_failure(result),
+            "data": None
+        }
+    return {
+        "success": True,
+        "error": None,
+        "data": {
+            "output": result["stdout"],
+            "execution_time": round(result["wall_ms"] / 1000, 4),
+            "time_ms": result["time_ms"],
+            "memory_kb": result["memory_kb"]
+        }
+    }
+
+
+def evaluate_code_against_testcases(question_description, code, language, testcases, bypass_cache=False,
+                                    visible_count=0, stop_on_failure=None):
     """Wrapper to evaluate code against test cases.
     
     Args:
@@ -149,6 +199,10 @@ def evaluate_code_against_testcases(question_description, code, language, testca
         code: Source code
         language: Programming language
         testcases: List of [{"input": str, "expected_output": str}, ...]
+        bypass_cache: Skip the LLM response cache for this call
+        visible_count: Leading testcases whose input/output may be shown to the student
+        stop_on_failure: Stop at the first failing case (default GRADER_STOP_ON_FAILURE);
+            local grading only
     
     Returns:
         {
@@ -157,7 +211,9 @@ def evaluate_code_against_testcases(question_description, code, language, testca
             "data": {
                 "is_correct": bool,
                 "reason": str,
-                "test_results": list
+                "evaluated": bool (False if the agent could not reach a verdict),
+                "test_results": list (per-case results; local grading only),
+                "passed": int, "total": int (local grading only)
             }
         }
     """
@@ -169,7 +225,21 @@ def evaluate_code_against_testcases(question_description, code, language, testca
                 "data": None
             }
         
-        result = evaluate_submission(question_description, testcases, code, language)
+        # Real per-testcase grading when code can run locally
+        if CODE_RUNNER == "local" and sandbox_runner.supported(language):
+            if stop_on_failure is None:
+                stop_on_failure = GRADER_STOP_ON_FAILURE
+            try:
+                graded = grader.grade(code, language, testcases, stop_on_failure, visible_count)
+                return {
+                    "success": True,
+                    "error": None,
+                    "data": dict(graded, evaluated=True)
+                }
+            except OSError as e:
+                logger.error(f"Local grading failed, falling back to the evaluator agent: {e}")
+        
+        result = evaluate_submission(question_description, testcases, code, language, bypass_cache)
         
         return {
             "success": True,
@@ -177,6 +247,7 @@ def evaluate_code_against_testcases(question_description, code, language, testca
             "data": {
                 "is_correct": result.get("is_correct", False),
                 "reason": result.get("reason", ""),
+                "evaluated": result.get("evaluated", False),
                 "test_results": []
             }
         }
@@ -191,12 +262,13 @@ def evaluate_code_against_testcases(question_description, code, language, testca
         }
 
 
-def get_efficiency_feedback(problem_description, code):
+def get_efficiency_feedback(problem_description, code, bypass_cache=False):
     """Wrapper to get efficiency feedback.
     
     Args:
         problem_description: Problem description for context
         code: Source code
+        bypass_cache: Skip the LLM response cache for this call
     
     Returns:
         {
@@ -219,7 +291,7 @@ def get_efficiency_feedback(problem_description, code):
                 "data": None
             }
         
-        feedback = analyze_efficiency(problem_description, code)
+        feedback = analyze_efficiency(problem_description, code, bypass_cache)
         
         return {
             "success": True,
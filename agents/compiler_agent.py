@@ -23,9 +23,10 @@ def check_language_support(language):
     return True, None
 
 
-def run_code_with_agent(question_description, code, language, test_input=None):
+def run_code_with_agent(question_description, code, language, test_input=None, bypass_cache=False):
     """
-    Simulate code execution via LLM. In production, replace with sandboxed runner (e.g., Judge0).
+    Simulate code execution via LLM. With CODE_RUNNER=local, compile_and_run_code
+    uses the local sandbox (sandbox_runner) instead and only falls back to this.
     Returns dict with either {"output": "..."} or {"error": "..."}.
     """
     print(f"DEBUG: run_code_with_agent called with language={language}", flush=True)
@@ -67,13 +68,11 @@ def run_code_with_agent(question_description, code, language, test_input=None):
         content = client.chat(
             messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
             max_tokens=400,
+            cache="compiler",
+            bypass_cache=bypass_cache,
+            validate=lambda text: _parse_result(text) is not None,
         )
-        parsed = _json_safe(content)
-        if parsed is not None:
-            return parsed
-        # Fallback: strip code fences and try again
-        stripped = re.sub(r"```.*?```", "", content, flags=re.DOTALL)
-        parsed = _json_safe(stripped)
+        parsed = _parse_result(content)
         if parsed is not None:
             return parsed
         return {"output": content}
@@ -89,6 +88,16 @@ def run_code_with_agent(question_description, code, language, test_input=None):
         return {"error": error_msg}
 
 
+def _parse_result(content):
+    """Parse a runner response, or None if it is not the requested JSON."""
+    parsed = _json_safe(content)
+    if parsed is not None:
+        return parsed
+    # Fallback: strip code fences and try again
+    stripped = re.sub(r"```.*?```", "", content, flags=re.DOTALL)
+    return _json_safe(stripped)
+
+
 def _json_safe(text):
     try:
         obj = json.loads(text)
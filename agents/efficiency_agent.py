@@ -6,7 +6,7 @@ from .groq_client import GroqClient
 logger = logging.getLogger(__name__)
 
 
-def analyze_efficiency(question_description, code):
+def analyze_efficiency(question_description, code, bypass_cache=False):
     """
     Return JSON: time_complexity, space_complexity, approach_summary,
     improvement_suggestions, optimal_method.
@@ -24,35 +24,13 @@ def analyze_efficiency(question_description, code):
         content = client.chat(
             messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
             max_tokens=300,
+            cache="efficiency",
+            bypass_cache=bypass_cache,
+            validate=lambda text: _parse_feedback(text) is not None,
         )
-        
-        # Multiple extraction strategies
-        json_str = None
-        
-        # Try markdown JSON block
-        for delimiter in ["```json", "```"]:
-            if delimiter in content:
-                try:
-                    json_str = content.split(delimiter)[1].split("```")[0].strip()
-                    break
-                except IndexError:
-                    continue
-        
-        # Try direct JSON extraction
-        if not json_str:
-            try:
-                json_str = content[content.index("{"):content.rindex("}")+1]
-            except ValueError:
-                json_str = None
-        
-        if json_str:
-            try:
-                parsed = json.loads(json_str)
-                # Validate required fields
-                if all(k in parsed for k in ["time_complexity", "space_complexity"]):
-                    return parsed
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON parsing failed: {str(e)[:100]}")
+        parsed = _parse_feedback(content)
+        if parsed is not None:
+            return parsed
         
         # Fallback: return safe default with partial response
         logger.warning(f"Could not parse efficiency response, using fallback")
@@ -87,3 +65,34 @@ def analyze_efficiency(question_description, code):
             "optimal_method": ""
         }
 
+
+def _parse_feedback(content):
+    """Extract the feedback JSON from a response, or None if it has none."""
+    # Multiple extraction strategies
+    json_str = None
+    
+    # Try markdown JSON block
+    for delimiter in ["```json", "```"]:
+        if delimiter in content:
+            try:
+                json_str = content.split(delimiter)[1].split("```")[0].strip()
+                break
+            except IndexError:
+                continue
+    
+    # Try direct JSON extraction
+    if not json_str:
+        try:
+            json_str = content[content.index("{"):content.rindex("}")+1]
+        except ValueError:
+            json_str = None
+    
+    if json_str:
+        try:
+            parsed = json.loads(json_str)
+            # Validate required fields
+            if isinstance(parsed, dict) and all(k in parsed for k in ["time_complexity", "space_complexity"]):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+    return None
@@ -6,16 +6,26 @@ from .groq_client import GroqClient
 logger = logging.getLogger(__name__)
 
 
-def evaluate_submission(question_description, testcases, code, language):
+def _is_verdict(content):
+    """Whether a response parses as a verdict (only those are cached)."""
+    try:
+        return isinstance(json.loads(content), dict)
+    except ValueError:
+        return False
+
+
+def evaluate_submission(question_description, testcases, code, language, bypass_cache=False):
     """
     Evaluate code using LLM reasoning over testcases.
-    Returns {"is_correct": bool, "reason": str}.
+    Returns {"is_correct": bool, "reason": str, "evaluated": bool};
+    evaluated is False when no verdict could be obtained (API or parse error).
     """
     if not testcases:
         logger.error("No test cases provided for evaluation")
         return {
             "is_correct": False,
-            "reason": "No test cases available for evaluation"
+            "reason": "No test cases available for evaluation",
+            "evaluated": False
         }
     
     client = GroqClient()
@@ -34,11 +44,15 @@ def evaluate_submission(question_description, testcases, code, language):
         content = client.chat(
             messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
             max_tokens=200,
+            cache="evaluator",
+            bypass_cache=bypass_cache,
+            validate=_is_verdict,
         )
         data = json.loads(content)
         return {
             "is_correct": bool(data.get("is_correct")),
-            "reason": str(data.get("reason", ""))
+            "reason": str(data.get("reason", "")),
+            "evaluated": True
         }
     
     except json.JSONDecodeError as err:
@@ -46,7 +60,8 @@ def evaluate_submission(question_description, testcases, code, language):
         logger.error(error_msg, exc_info=True)
         return {
             "is_correct": False,
-            "reason": f"Evaluation error: {error_msg[:50]}"
+            "reason": f"Evaluation error: {error_msg[:50]}",
+            "evaluated": False
         }
     
     except RuntimeError as err:
@@ -54,7 +69,8 @@ def evaluate_submission(question_description, testcases, code, language):
         logger.error(error_msg)
         return {
             "is_correct": False,
-            "reason": error_msg
+            "reason": error_msg,
+            "evaluated": False
         }
     
     except Exception as err:
@@ -62,6 +78,7 @@ def evaluate_submission(question_description, testcases, code, language):
         logger.error(error_msg, exc_info=True)
         return {
             "is_correct": False,
-            "reason": error_msg[:100]
+            "reason": error_msg[:100],
+            "evaluated": False
         }
 
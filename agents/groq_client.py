@@ -1,11 +1,139 @@
-"""Thin Groq API client wrapper with timeouts and error handling."""
+"""Thin Groq API client wrapper with timeouts and error handling.
+
+All clients share one process-wide requests.Session, so consecutive LLM
+calls (a /submit makes two or three) reuse pooled keep-alive connections
+instead of paying a TCP + TLS handshake each. The session is recreated in
+the child after a fork (Gunicorn preloading), since sockets must not be
+shared between processes.
+
+Responses can be served from the content-addressed llm_cache: agents pass
+their cache namespace to chat(), and identical requests (same model,
+temperature, max_tokens and messages) skip the API call entirely.
+
+Settings (environment):
+    GROQ_POOL_SIZE: Connections kept per host (default 10)
+    GROQ_CONNECT_TIMEOUT / GROQ_READ_TIMEOUT: Seconds (default 5 / 30)
+"""
 import os
 import logging
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .llm_cache import llm_cache, cache_key
 
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_POOL_SIZE = int(os.environ.get("GROQ_POOL_SIZE", "10"))
+GROQ_CONNECT_TIMEOUT = float(os.environ.get("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_READ_TIMEOUT = float(os.environ.get("GROQ_READ_TIMEOUT", "30"))
 logger = logging.getLogger(__name__)
 
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "connections": 0, "connect_seconds": 0.0}
+
+
+class _TimedConnectionMixin:
+    """Record how long each connection setup (TCP, plus TLS for HTTPS) takes."""
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        with _stats_lock:
+            _stats["connections"] += 1
+            _stats["connect_seconds"] += time.perf_counter() - started
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools use the instrumented connection classes."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _new_session():
+    session = requests.Session()
+    adapter = _PooledAdapter(pool_connections=1, pool_maxsize=GROQ_POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def get_session():
+    """Get the process-wide pooled session (created lazily, per process)."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _new_session()
+                _session_pid = pid
+    return _session
+
+
+def _reset_after_fork():
+    # The parent's pooled sockets (and possibly a held lock) must not leak
+    # into the child; it lazily opens its own connections.
+    global _session, _session_pid, _session_lock, _stats_lock
+    _session = None
+    _session_pid = None
+    _session_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _stats.update(requests=0, connections=0, connect_seconds=0.0)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def pool_stats():
+    """Connection reuse counters for this process.
+
+    handshake_seconds_saved estimates the time reuse avoided: reused
+    requests times the mean measured handshake duration.
+    """
+    with _stats_lock:
+        requests_made = _stats["requests"]
+        connections = _stats["connections"]
+        connect_seconds = _stats["connect_seconds"]
+    reused = max(requests_made - connections, 0)
+    mean_handshake = connect_seconds / connections if connections else 0.0
+    return {
+        "requests": requests_made,
+        "connections_opened": connections,
+        "reused": reused,
+        "reuse_ratio": round(reused / requests_made, 4) if requests_made else 0.0,
+        "mean_handshake_ms": round(mean_handshake * 1000, 1),
+        "handshake_seconds_saved": round(reused * mean_handshake, 3),
+        "pool_size": GROQ_POOL_SIZE,
+    }
+
 
 class GroqClient:
     """Simple wrapper for Groq chat completions with comprehensive error handling."""
@@ -18,9 +146,17 @@ class GroqClient:
         if not self.api_key:
             logger.error("GROQ_API_KEY environment variable not set!")
 
-    def chat(self, messages, model="llama-3.3-70b-versatile", temperature=0.1, max_tokens=800):
+    def chat(self, messages, model="llama-3.3-70b-versatile", temperature=0.1, max_tokens=800,
+             cache=None, bypass_cache=False, validate=None):
         """Query Groq API with error handling.
         
+        Args:
+            cache: llm_cache namespace (e.g. "compiler"); None disables caching
+            bypass_cache: Always call the API (the fresh response is still stored)
+            validate: Callable(content) -> bool; only responses the calling
+                agent can parse are cached, and cached ones it rejects are
+                fetched again
+        
         Returns:
             str: Response content on success
             
@@ -32,6 +168,15 @@ class GroqClient:
             logger.error(error_msg)
             raise RuntimeError(error_msg)
         
+        key = cache_key(model, temperature, max_tokens, messages) if cache else None
+        if key:
+            if bypass_cache:
+                llm_cache.bypassed(cache)
+            else:
+                cached = llm_cache.get(cache, key)
+                if cached is not None and (validate is None or validate(cached)):
+                    return cached
+        
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -44,7 +189,12 @@ class GroqClient:
         }
         
         try:
-            resp = requests.post(GROQ_API_URL, json=payload, headers=headers, timeout=30)
+            with _stats_lock:
+                _stats["requests"] += 1
+            resp = get_session().post(
+                GROQ_API_URL, json=payload, headers=headers,
+                timeout=(GROQ_CONNECT_TIMEOUT, GROQ_READ_TIMEOUT)
+            )
             resp.raise_for_status()
             data = resp.json()
             
@@ -53,10 +203,14 @@ class GroqClient:
                 logger.error(error_msg)
                 raise RuntimeError(error_msg)
             
-            return data["choices"][0]["message"]["content"]
+            content = data["choices"][0]["message"]["content"]
+            # Only successful, parseable completions are cached; errors always retry
+            if key and content and (validate is None or validate(content)):
+                llm_cache.set(cache, key, content)
+            return content
         
         except requests.exceptions.Timeout:
-            error_msg = "Groq API request timed out (30s limit)"
+            error_msg = f"Groq API request timed out ({GROQ_CONNECT_TIMEOUT:g}s connect / {GROQ_READ_TIMEOUT:g}s read limit)"
             logger.error(error_msg)
             raise RuntimeError(error_msg)
         
@@ -0,0 +1,213 @@
+"""Content-addressed cache for LLM responses.
+
+Responses are keyed by a SHA-256 of (model, temperature, max_tokens,
+messages), so an identical request from any student returns the stored
+completion instead of another Groq round-trip. Two tiers:
+
+- memory: a per-process LRU with TTL (fastest, lost on restart)
+- disk: a SQLite database in WAL mode shared by all Gunicorn workers on the
+  host (LLM_CACHE_PATH; empty disables the tier)
+
+Each agent uses its own namespace with its own TTL and size limits
+(AGENT_POLICIES, overridable with LLM_CACHE_<AGENT>_TTL / _SIZE). A TTL of 0
+disables caching for that agent.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join("/tmp", "codeprac_llm_cache.sqlite3"))
+LLM_CACHE_MEMORY_SIZE = int(os.environ.get("LLM_CACHE_MEMORY_SIZE", "512"))
+
+# namespace -> (ttl seconds, max disk entries)
+AGENT_POLICIES = {
+    "compiler": (24 * 3600, 50000),
+    "evaluator": (7 * 24 * 3600, 50000),
+    "efficiency": (7 * 24 * 3600, 20000),
+    "testcase": (0, 0),  # Generation should give fresh cases each time
+}
+
+# Prune a namespace on disk every this many stores
+_PRUNE_EVERY = 100
+
+
+def cache_key(model, temperature, max_tokens, messages):
+    """Content hash identifying one chat completion request."""
+    raw = json.dumps(
+        {"model": model, "temperature": temperature, "max_tokens": max_tokens, "messages": messages},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _policy(namespace):
+    ttl, size = AGENT_POLICIES.get(namespace, (3600, 10000))
+    prefix = f"LLM_CACHE_{namespace.upper()}_"
+    return float(os.environ.get(prefix + "TTL", ttl)), int(os.environ.get(prefix + "SIZE", size))
+
+
+class LLMCache:
+    """Two-tier (memory LRU + SQLite) response cache."""
+
+    def __init__(self, path=LLM_CACHE_PATH, memory_size=LLM_CACHE_MEMORY_SIZE):
+        self.path = path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stores = {}
+        self._stats = {}
+
+    # -- stats ---------------------------------------------------------------
+
+    def _count(self, namespace, counter):
+        with self._lock:
+            stats = self._stats.setdefault(
+                namespace, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "errors": 0}
+            )
+            stats[counter] += 1
+
+    def stats(self):
+        """Per-namespace counters plus hit ratios for this process."""
+        with self._lock:
+            result = {}
+            for namespace, stats in self._stats.items():
+                lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+                hits = stats["memory_hits"] + stats["disk_hits"]
+                result[namespace] = dict(stats, hit_ratio=round(hits / lookups, 4) if lookups else 0.0)
+            return {"namespaces": result, "memory_entries": len(self._memory), "disk_path": self.path or None}
+
+    # -- disk tier -----------------------------------------------------------
+
+    def _connection(self):
+        """SQLite connection for the current thread (re-opened after a fork)."""
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_ns_created ON llm_cache (namespace, created_at)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _disk_get(self, key, now):
+        conn = self._connection()
+        if conn is None:
+            return None, None
+        row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return None, None
+        return row[0], row[1]
+
+    def _disk_set(self, namespace, key, value, now, expires_at, max_entries):
+        conn = self._connection()
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, namespace, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, namespace, value, now, expires_at)
+        )
+        with self._lock:
+            self._stores[namespace] = self._stores.get(namespace, 0) + 1
+            prune = self._stores[namespace] % _PRUNE_EVERY == 0
+        if prune:
+            conn.execute("DELETE FROM llm_cache WHERE namespace = ? AND expires_at <= ?", (namespace, now))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE namespace = ? AND key NOT IN ("
+                " SELECT key FROM llm_cache WHERE namespace = ? ORDER BY created_at DESC LIMIT ?)",
+                (namespace, namespace, max_entries)
+            )
+
+    # -- memory tier ---------------------------------------------------------
+
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def _memory_set(self, key, value, expires_at):
+        if self.memory_size <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    # -- public API ----------------------------------------------------------
+
+    def get(self, namespace, key):
+        """Cached response for key, or None."""
+        ttl, _ = _policy(namespace)
+        if ttl <= 0:
+            return None
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            self._count(namespace, "memory_hits")
+            return value
+        try:
+            value, expires_at = self._disk_get(key, now)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            self._count(namespace, "errors")
+            value = None
+        if value is not None:
+            self._memory_set(key, value, expires_at)
+            self._count(namespace, "disk_hits")
+            return value
+        self._count(namespace, "misses")
+        return None
+
+    def set(self, namespace, key, value):
+        """Store a response under the namespace's TTL and size limits."""
+        ttl, max_entries = _policy(namespace)
+        if ttl <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        self._memory_set(key, value, expires_at)
+        try:
+            self._disk_set(namespace, key, value, now, expires_at, max_entries)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+            self._count(namespace, "errors")
+            return
+        self._count(namespace, "stores")
+
+    def bypassed(self, namespace):
+        """Record a call that skipped the cache on request."""
+        self._count(namespace, "bypassed")
+
+    def clear(self):
+        """Drop every entry from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+        conn = self._connection()
+        if conn is not None:
+            conn.execute("DELETE FROM llm_cache")
+
+
+llm_cache = LLMCache()
@@ -25,7 +25,7 @@ def validate_testcase(tc):
     return True, None
 
 
-def generate_testcases_for_question(description, sample_input, sample_output):
+def generate_testcases_for_question(description, sample_input, sample_output, bypass_cache=False):
     """Return list of testcases using Groq; JSON only.
     
     Returns:
@@ -44,6 +44,8 @@ def generate_testcases_for_question(description, sample_input, sample_output):
         content = client.chat(
             messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
             max_tokens=600,
+            cache="testcase",
+            bypass_cache=bypass_cache,
         )
         
         # Multiple extraction strategies
@@ -0,0 +1,269 @@
+"""Vectorized cohort analytics over performance records.
+
+Performance records in scope are loaded once into NumPy column arrays of
+categorical codes (student, question, batch, status; topic and difficulty
+come from the question). Every statistic is then a handful of vectorized
+group-bys (np.bincount / np.unique over combined codes) instead of a Python
+loop per record.
+
+Only the fields the frame reads are fetched (a Firestore select(), so
+submission code never leaves the database) and only the code columns are
+kept while paging, so a cohort of N submissions costs a few int32 arrays of
+length N. Scopes larger than ANALYTICS_MAX_RECORDS are refused instead of
+being read in full.
+"""
+import numpy as np
+
+from config import EXPORT_PAGE_SIZE, ANALYTICS_MAX_RECORDS
+from models import PerformanceModel, QuestionModel
+from utils import error_response, success_response
+
+STATUSES = ("correct", "incorrect", "execution_error")
+CORRECT = STATUSES.index("correct")
+
+# Optional narrowing filters on top of the caller's role scope
+SCOPE_FILTERS = ("college_id", "department_id", "batch_id", "question_id")
+
+# Performance fields read into a CohortFrame
+FRAME_FIELDS = ("student_id", "question_id", "batch_id", "status")
+
+
+class ScopeTooLargeError(ValueError):
+    """Raised when a cohort has more records than the analytics cap."""
+
+
+class _Codes:
+    """Assign dense integer codes to labels in first-seen order."""
+
+    def __init__(self):
+        self.index = {}
+        self.labels = []
+
+    def code(self, label):
+        code = self.index.get(label)
+        if code is None:
+            code = self.index[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class CohortFrame:
+    """Performance records of a cohort as categorical code columns.
+
+    Attributes:
+        student, question, batch, status: int32 arrays, one entry per record
+            (status is -1 for unknown values)
+        topic, difficulty: int32 arrays, one entry per question code
+        *_labels: Code -> label lists
+    """
+
+    def __init__(self, student, question, batch, status, student_labels, question_labels,
+                 batch_labels, topic=None, difficulty=None, topic_labels=None, difficulty_labels=None):
+        self.student = student
+        self.question = question
+        self.batch = batch
+        self.status = status
+        self.student_labels = student_labels
+        self.question_labels = question_labels
+        self.batch_labels = batch_labels
+        self.topic = topic if topic is not None else np.zeros(len(question_labels), dtype=np.int32)
+        self.difficulty = difficulty if difficulty is not None else np.zeros(len(question_labels), dtype=np.int32)
+        self.topic_labels = topic_labels or ["none"]
+        self.difficulty_labels = difficulty_labels or ["unknown"]
+
+    def __len__(self):
+        return len(self.student)
+
+    @classmethod
+    def from_pages(cls, pages):
+        """Build the code columns from an iterable of record pages."""
+        students, questions, batches = _Codes(), _Codes(), _Codes()
+        status_codes = {status: code for code, status in enumerate(STATUSES)}
+        columns = ([], [], [], [])
+        for page in pages:
+            for record in page:
+                columns[0].append(students.code(record.get("student_id")))
+                columns[1].append(questions.code(record.get("question_id")))
+                columns[2].append(batches.code(record.get("batch_id")))
+                columns[3].append(status_codes.get(record.get("status"), -1))
+
+        student, question, batch, status = (np.asarray(c, dtype=np.int32) for c in columns)
+        return cls(student, question, batch, status, students.labels, questions.labels, batches.labels)
+
+    def attach_questions(self, questions):
+        """Set per-question topic and difficulty codes from question documents."""
+        topics, difficulties = _Codes(), _Codes()
+        topic, difficulty = [], []
+        for question_id in self.question_labels:
+            question = questions.get(question_id) or {}
+            topic.append(topics.code(question.get("topic_id") or "none"))
+            value = str(question.get("difficulty") or "").strip().lower()
+            difficulty.append(difficulties.code(value or "unknown"))
+
+        self.topic = np.asarray(topic, dtype=np.int32)
+        self.difficulty = np.asarray(difficulty, dtype=np.int32)
+        self.topic_labels = topics.labels or ["none"]
+        self.difficulty_labels = difficulties.labels or ["unknown"]
+        return self
+
+
+def _solved_pairs(frame):
+    """Distinct (student, question) pairs with at least one correct submission."""
+    mask = frame.status == CORRECT
+    pairs = np.unique(frame.student[mask].astype(np.int64) * len(frame.question_labels) + frame.question[mask])
+    return pairs // len(frame.question_labels), pairs % len(frame.question_labels)
+
+
+def _rate(numerator, denominator):
+    return np.round(np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0), 4)
+
+
+def overview(frame):
+    """Totals across the cohort."""
+    counts = np.bincount(frame.status[frame.status >= 0], minlength=len(STATUSES))
+    return {
+        "attempts": len(frame),
+        **{status: int(counts[code]) for code, status in enumerate(STATUSES)},
+        "students": len(np.unique(frame.student)),
+        "questions": len(np.unique(frame.question)),
+        "solve_rate": round(int(counts[CORRECT]) / len(frame), 4) if len(frame) else 0.0,
+    }
+
+
+def topic_solve_rates(frame):
+    """Attempts, correct submissions and solve rate per (batch, topic)."""
+    n_topics = len(frame.topic_labels)
+    key = frame.batch.astype(np.int64) * n_topics + frame.topic[frame.question]
+    size = len(frame.batch_labels) * n_topics
+    attempts = np.bincount(key, minlength=size)
+    correct = np.bincount(key, weights=frame.status == CORRECT, minlength=size)
+    rates = _rate(correct, attempts)
+
+    return [
+        {
+            "batch_id": frame.batch_labels[k // n_topics],
+            "topic_id": frame.topic_labels[k % n_topics],
+            "attempts": int(attempts[k]),
+            "correct": int(correct[k]),
+            "solve_rate": float(rates[k]),
+        }
+        for k in np.flatnonzero(attempts)
+    ]
+
+
+def student_percentiles(frame):
+    """Distinct questions solved per student and their percentile rank in the cohort.
+
+    The percentile is the share of students who solved fewer questions, plus
+    half of those tied (the "mean" percentile-of-score definition).
+    """
+    n_students = len(frame.student_labels)
+    if not n_students:
+        return []
+    solved_students, _ = _solved_pairs(frame)
+    solved = np.bincount(solved_students, minlength=n_students)
+    attempts = np.bincount(frame.student, minlength=n_students)
+
+    ranked = np.sort(solved)
+    below = np.searchsorted(ranked, solved, side="left")
+    tied = np.searchsorted(ranked, solved, side="right") - below
+    percentile = np.round((below + 0.5 * tied) / n_students * 100, 2)
+
+    order = np.lexsort((np.arange(n_students), -solved))
+    return [
+        {
+            "student_id": frame.student_labels[s],
+            "solved": int(solved[s]),
+            "attempts": int(attempts[s]),
+            "percentile": float(percentile[s]),
+        }
+        for s in order
+    ]
+
+
+def difficulty_histogram(frame):
+    """Attempts, correct submissions and distinct questions solved per difficulty."""
+    size = len(frame.difficulty_labels)
+    difficulty = frame.difficulty[frame.question]
+    attempts = np.bincount(difficulty, minlength=size)
+    correct = np.bincount(difficulty, weights=frame.status == CORRECT, minlength=size)
+    attempted_questions = np.bincount(frame.difficulty[np.unique(frame.question)], minlength=size)
+    _, solved_questions = _solved_pairs(frame)
+    solved = np.bincount(frame.difficulty[np.unique(solved_questions)], minlength=size)
+    rates = _rate(correct, attempts)
+
+    return {
+        frame.difficulty_labels[d]: {
+            "attempts": int(attempts[d]),
+            "correct": int(correct[d]),
+            "solve_rate": float(rates[d]),
+            "questions_attempted": int(attempted_questions[d]),
+            "questions_solved": int(solved[d]),
+        }
+        for d in range(size)
+        if attempts[d]
+    }
+
+
+def load_frame(filters, page_size=None, max_records=None):
+    """Load the performance records matching equality filters into a CohortFrame.
+
+    Raises:
+        ScopeTooLargeError: If more than max_records (default
+            ANALYTICS_MAX_RECORDS) records match; reading stops there
+    """
+    model = PerformanceModel()
+    max_records = ANALYTICS_MAX_RECORDS if max_records is None else max_records
+
+    def pages():
+        last_id = None
+        loaded = 0
+        while True:
+            page, last_id = model.query_page(limit=page_size or EXPORT_PAGE_SIZE, start_after=last_id,
+                                             fields=FRAME_FIELDS, **filters)
+            loaded += len(page)
+            if loaded > max_records:
+                raise ScopeTooLargeError(
+                    f"More than {max_records} submissions in scope; narrow it with batch_id or question_id"
+                )
+            yield page
+            if last_id is None:
+                return
+
+    frame = CohortFrame.from_pages(pages())
+    return frame.attach_questions(QuestionModel().get_many(frame.question_labels))
+
+
+class AnalyticsService:
+    """Service for role-scoped cohort analytics."""
+
+    @staticmethod
+    def analytics_response(scope_filters, args):
+        """Build the API response for an analytics endpoint.
+
+        Args:
+            scope_filters: Filters enforced by the caller's role; they
+                override query params
+            args: Request query params (optional filters from SCOPE_FILTERS)
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        missing = [key for key, value in scope_filters.items() if not value]
+        if missing:
+            return error_response("INVALID_INPUT", f"{missing[0]} is required")
+
+        filters = {key: args.get(key) for key in SCOPE_FILTERS if args.get(key)}
+        filters.update(scope_filters)
+        try:
+            frame = load_frame(filters)
+        except ScopeTooLargeError as e:
+            return error_response("SCOPE_TOO_LARGE", str(e))
+
+        return success_response({
+            "filters": filters,
+            "overview": overview(frame),
+            "topic_solve_rates": topic_solve_rates(frame),
+            "student_percentiles": student_percentiles(frame),
+            "difficulty_histogram": difficulty_histogram(frame),
+        })
@@ -22,9 +22,18 @@ try:
     from flask_cors import CORS
     logger.info("✓ Flask-CORS imported")
     
-    from config import DEBUG, FRONTEND_URL
+    from config import (
+        DEBUG, FRONTEND_URL, EXPOSE_READ_STATS, HIERARCHY_CACHE_WARMUP,
+        CASCADE_MODE, CASCADE_RECONCILE_INTERVAL
+    )
     logger.info("✓ Config imported")
     
+    from utils import InvalidPaginationError, error_response
+    from request_cache import format_read_stats
+    from compression import compress_response
+    import hierarchy_cache
+    from job_service import start_cascade_reconciler
+    
     from routes.auth import auth_bp
     logger.info("✓ Auth routes imported")
     
@@ -68,6 +77,10 @@ def create_app():
              max_age=3600)
         logger.info("✓ CORS configured")
         
+        # Negotiated gzip/br/zstd compression (registered first so it runs
+        # after every other after_request hook)
+        app.after_request(compress_response)
+        
         # Additional CORS headers for preflight requests
         @app.before_request
         def handle_preflight():
@@ -79,6 +92,26 @@ def create_app():
                 response.headers['Access-Control-Max-Age'] = '3600'
                 return response
         
+        # Per-request read counters from the identity map (debugging aid)
+        if DEBUG or EXPOSE_READ_STATS:
+            @app.after_request
+            def add_read_stats(response):
+                stats = format_read_stats()
+                if stats:
+                    response.headers['X-Read-Stats'] = stats
+                return response
+        
+        # Optionally preload colleges/departments/batches into the hierarchy cache
+        if HIERARCHY_CACHE_WARMUP:
+            try:
+                hierarchy_cache.warm_up()
+            except Exception as e:
+                logger.warning(f"Hierarchy cache warm-up failed: {e}")
+        
+        # Lazy cascades: periodically push deferred disable/enable to descendants
+        if CASCADE_MODE == "lazy" and CASCADE_RECONCILE_INTERVAL > 0:
+            start_cascade_reconciler(CASCADE_RECONCILE_INTERVAL)
+        
         # Register blueprints
         logger.info("Registering blueprints...")
         app.register_blueprint(auth_bp)
@@ -128,6 +161,11 @@ def create_app():
                 "message": "Endpoint not found"
             }), 404
         
+        # Bad ?limit= / ?cursor= on paginated list endpoints
+        @app.errorhandler(InvalidPaginationError)
+        def invalid_pagination(error):
+            return error_response("INVALID_PAGINATION", str(error))
+        
         # 500 handler
         @app.errorhandler(500)
         def server_error(error):
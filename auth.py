@@ -4,8 +4,9 @@ import json
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, current_app
-from config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRATION
+from config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRATION, CASCADE_MODE
 from firebase_init import get_auth
+import hierarchy_index
 import requests
 
 
@@ -83,6 +84,10 @@ def require_auth(allowed_roles=None):
             if allowed_roles and payload.get("role") not in allowed_roles:
                 return jsonify({"error": True, "code": "FORBIDDEN", "message": "Insufficient permissions"}), 403
             
+            # With lazy cascades descendants are not stamped, so check the ancestor chain
+            if CASCADE_MODE == "lazy" and hierarchy_index.is_user_disabled(payload):
+                return jsonify({"error": True, "code": "ACCOUNT_DISABLED", "message": "Your account has been disabled"}), 403
+            
             request.user = payload
             return f(*args, **kwargs)
         
@@ -202,6 +207,27 @@ def delete_user_firebase(uid):
         return False
 
 
+def delete_users_firebase(uids):
+    """Delete several Firebase Auth users (up to 1000 per call).
+    
+    Args:
+        uids: Iterable of Firebase UIDs
+    
+    Returns:
+        int: Number of users deleted
+    """
+    uids = [uid for uid in dict.fromkeys(uids) if uid]
+    deleted = 0
+    for start in range(0, len(uids), 1000):
+        chunk = uids[start:start + 1000]
+        try:
+            result = get_auth().delete_users(chunk)
+            deleted += result.success_count
+        except Exception as e:
+            print(f"Firebase bulk delete users error: {e}")
+    return deleted
+
+
 def verify_firebase_token(token):
     """Verify Firebase ID token (for frontend token validation).
     
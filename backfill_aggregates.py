@@ -0,0 +1,54 @@
+"""
+Backfill materialized aggregates from the raw performance collection.
+
+Usage:
+    python backfill_aggregates.py student-stats [student_id ...]
+    python backfill_aggregates.py daily-rollups
+    python backfill_aggregates.py performance-fields [--force] [start_after_id]
+
+student-stats rebuilds student_stats and student_progress documents (all
+students with submissions, or only the given ones), a page of students at a
+time; an interrupted full rebuild resumes after the last completed page.
+daily-rollups rebuilds every per-day bucket for
+batches, departments and colleges. Safe to re-run; run it while submissions are quiet, since
+submissions recorded during the rebuild can be counted twice or missed.
+
+performance-fields writes question_title / topic_id / topic_name / difficulty
+onto performance records that predate them. It checkpoints after every page
+and an interrupted run resumes where it stopped; pass a performance ID to
+start after it instead, or --force to rewrite records that already have them.
+"""
+
+import sys
+from stats_service import StatsService
+from rollup_service import RollupService
+from performance_service import PerformanceService
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("student-stats", "daily-rollups", "performance-fields"):
+        print(__doc__)
+        sys.exit(1)
+
+    command, ids = sys.argv[1], sys.argv[2:] or None
+
+    if command == "student-stats":
+        written = StatsService.rebuild(
+            ids, progress=lambda state: print(f"  rebuilt {state['rebuilt']} students, cursor {state['cursor']}")
+        )
+        print(f"✅ Rebuilt student_stats and student_progress for {written} students")
+    elif command == "daily-rollups":
+        written = RollupService.rebuild()
+        print(f"✅ Rebuilt {written} daily rollup buckets")
+    elif command == "performance-fields":
+        force = "--force" in sys.argv[2:]
+        start_after = next((arg for arg in sys.argv[2:] if arg != "--force"), None)
+        result = PerformanceService.backfill(
+            start_after=start_after, force=force,
+            progress=lambda state: print(f"  scanned {state['scanned']}, updated {state['updated']}, cursor {state['cursor']}")
+        )
+        print(f"✅ Backfilled {result['updated']} of {result['scanned']} performance records")
+
+
+if __name__ == "__main__":
+    main()
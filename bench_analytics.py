@@ -0,0 +1,125 @@
+"""
+Benchmark the vectorized cohort analytics against per-record Python loops.
+
+Generates a synthetic cohort in memory (no Firestore access) and times both
+implementations of each statistic on the same data.
+
+Usage:
+    python bench_analytics.py [records] [students] [questions]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from analytics_service import (
+    CohortFrame, STATUSES, topic_solve_rates, student_percentiles, difficulty_histogram
+)
+
+
+def synthetic_records(records, students, questions, batches=20, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "student_id": f"s{rng.randrange(students)}",
+            "question_id": f"q{rng.randrange(questions)}",
+            "batch_id": f"b{rng.randrange(batches)}",
+            "status": rng.choice(STATUSES),
+        }
+        for _ in range(records)
+    ]
+
+
+def synthetic_questions(questions, topics=40, seed=7):
+    rng = random.Random(seed)
+    return {
+        f"q{i}": {"topic_id": f"t{rng.randrange(topics)}", "difficulty": rng.choice(["Easy", "Medium", "Hard"])}
+        for i in range(questions)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Per-record Python reference implementations
+# ---------------------------------------------------------------------------
+
+def _question_meta(questions, question_id):
+    question = questions.get(question_id) or {}
+    difficulty = str(question.get("difficulty") or "").strip().lower() or "unknown"
+    return question.get("topic_id") or "none", difficulty
+
+
+def loop_topic_solve_rates(records, questions):
+    groups = {}
+    for record in records:
+        topic, _ = _question_meta(questions, record.get("question_id"))
+        group = groups.setdefault((record.get("batch_id"), topic), [0, 0])
+        group[0] += 1
+        group[1] += record.get("status") == "correct"
+    return {key: (attempts, correct) for key, (attempts, correct) in groups.items()}
+
+
+def loop_student_percentiles(records):
+    solved, attempts = {}, {}
+    for record in records:
+        student = record.get("student_id")
+        attempts[student] = attempts.get(student, 0) + 1
+        solved.setdefault(student, set())
+        if record.get("status") == "correct":
+            solved[student].add(record.get("question_id"))
+    counts = {student: len(questions) for student, questions in solved.items()}
+    scores = list(counts.values())
+    return {
+        student: round(
+            (sum(1 for s in scores if s < score) + 0.5 * sum(1 for s in scores if s == score)) / len(scores) * 100, 2
+        )
+        for student, score in counts.items()
+    }
+
+
+def loop_difficulty_histogram(records, questions):
+    histogram = {}
+    for record in records:
+        _, difficulty = _question_meta(questions, record.get("question_id"))
+        bucket = histogram.setdefault(difficulty, {"attempts": 0, "correct": 0, "attempted": set(), "solved": set()})
+        bucket["attempts"] += 1
+        bucket["attempted"].add(record.get("question_id"))
+        if record.get("status") == "correct":
+            bucket["correct"] += 1
+            bucket["solved"].add(record.get("question_id"))
+    return {
+        difficulty: (b["attempts"], b["correct"], len(b["attempted"]), len(b["solved"]))
+        for difficulty, b in histogram.items()
+    }
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main(records=200000, students=2000, questions=500):
+    data = synthetic_records(records, students, questions)
+    question_docs = synthetic_questions(questions)
+
+    frame, load_seconds = _timed(lambda: CohortFrame.from_pages([data]).attach_questions(question_docs))
+    print(f"{records} records, {students} students, {questions} questions (numpy {np.__version__})")
+    print(f"  load into code columns: {load_seconds * 1000:8.1f} ms")
+
+    cases = [
+        ("topic solve rates", lambda: topic_solve_rates(frame), lambda: loop_topic_solve_rates(data, question_docs)),
+        ("student percentiles", lambda: student_percentiles(frame), lambda: loop_student_percentiles(data)),
+        ("difficulty histogram", lambda: difficulty_histogram(frame), lambda: loop_difficulty_histogram(data, question_docs)),
+    ]
+    for name, vectorized, loop in cases:
+        _, vector_seconds = _timed(vectorized)
+        _, loop_seconds = _timed(loop)
+        print(
+            f"  {name:<22} numpy {vector_seconds * 1000:8.1f} ms   "
+            f"loop {loop_seconds * 1000:9.1f} ms   x{loop_seconds / vector_seconds:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,111 @@
+"""
+Benchmark response compression on realistic API payloads.
+
+Builds synthetic /performance (with submission code), /students and
+/questions responses and reports, per available encoding, the compressed
+size, the compression time and the estimated end-to-end time saved at a few
+client bandwidths. Also measures the chunked (streaming) mode used for
+exports.
+
+Usage:
+    python bench_compression.py [records]
+"""
+import json
+import random
+import sys
+import time
+from datetime import datetime
+
+from compression import ENCODERS, compress_bytes
+
+BANDWIDTHS_MBPS = (2, 10, 50)
+
+CODE_SAMPLES = [
+    "def two_sum(nums, target):\n    seen = {}\n    for i, n in enumerate(nums):\n"
+    "        if target - n in seen:\n            return [seen[target - n], i]\n        seen[n] = i\n",
+    "#include <bits/stdc++.h>\nusing namespace std;\nint main() {\n    int n; cin >> n;\n"
+    "    vector<int> a(n);\n    for (auto &x : a) cin >> x;\n    sort(a.begin(), a.end());\n"
+    "    for (auto x : a) cout << x << ' ';\n}\n",
+    "import java.util.*;\npublic class Main {\n    public static void main(String[] args) {\n"
+    "        Scanner sc = new Scanner(System.in);\n        int n = sc.nextInt();\n"
+    "        System.out.println(n * (n + 1) / 2);\n    }\n}\n",
+]
+
+
+def performance_payload(records, rng):
+    return {"error": False, "message": "Success", "data": {"performance": [
+        {
+            "id": f"{rng.getrandbits(128):032x}", "student_id": f"{rng.getrandbits(128):032x}",
+            "question_id": f"{rng.getrandbits(128):032x}", "question_title": f"Problem {rng.randrange(300)}",
+            "topic_name": rng.choice(["Arrays", "Graphs", "DP", "Strings"]), "status": rng.choice(["correct", "incorrect"]),
+            "submission_language": rng.choice(["python", "cpp", "java"]),
+            "submission_code": rng.choice(CODE_SAMPLES) * rng.randint(1, 4),
+            "test_results": {"is_correct": True, "reason": "All test cases passed"},
+            "submitted_at": datetime(2024, 3, 1, rng.randrange(24)).isoformat(),
+        }
+        for _ in range(records)
+    ], "next_cursor": None}}
+
+
+def students_payload(records, rng):
+    return {"error": False, "message": "Success", "data": {"students": [
+        {
+            "id": f"{rng.getrandbits(128):032x}", "username": f"student{i}", "email": f"student{i}@college.edu",
+            "batch_id": "b1", "department_id": "d1", "college_id": "c1", "firebase_uid": f"{rng.getrandbits(112):028x}",
+            "is_disabled": False, "created_at": datetime(2024, 1, 1).isoformat(),
+        }
+        for i in range(records)
+    ]}}
+
+
+def questions_payload(records, rng):
+    return {"error": False, "message": "Success", "data": {"questions": [
+        {
+            "id": f"{rng.getrandbits(128):032x}", "title": f"Problem {i}", "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+            "description": "Given an array of integers, return the indices of the two numbers that add up to target. " * 3,
+            "sample_input": "4\n2 7 11 15\n9", "sample_output": "0 1",
+            "open_testcases": [{"input": "4\n2 7 11 15\n9", "expected_output": "0 1"}],
+            "is_attempted": rng.random() < 0.5, "is_solved": rng.random() < 0.3,
+        }
+        for i in range(records)
+    ]}}
+
+
+def _bench(name, body):
+    print(f"\n{name}: {len(body):,} bytes uncompressed")
+    for encoding in ENCODERS:
+        started = time.perf_counter()
+        compressed = compress_bytes(body, encoding)
+        elapsed = time.perf_counter() - started
+        saved = ", ".join(
+            f"{mbps} Mbps {((len(body) - len(compressed)) * 8 / (mbps * 1e6) - elapsed) * 1000:+.0f} ms"
+            for mbps in BANDWIDTHS_MBPS
+        )
+        print(
+            f"  {encoding:<5} {len(compressed):>10,} bytes  x{len(body) / len(compressed):5.1f}  "
+            f"{elapsed * 1000:6.1f} ms to compress   time saved: {saved}"
+        )
+
+
+def _bench_stream(body, chunk_size=64 * 1024):
+    encoder = ENCODERS["gzip"]()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    started = time.perf_counter()
+    total = sum(len(encoder.compress(chunk) + encoder.flush()) for chunk in chunks) + len(encoder.finish())
+    elapsed = time.perf_counter() - started
+    print(f"\nstreamed gzip ({len(chunks)} chunks of {chunk_size // 1024} KiB): {total:,} bytes "
+          f"x{len(body) / total:5.1f}  {elapsed * 1000:6.1f} ms")
+
+
+def main(records=500):
+    rng = random.Random(7)
+    print(f"Encodings available: {', '.join(ENCODERS)}")
+    performance = json.dumps(performance_payload(records, rng)).encode()
+    _bench(f"/performance ({records} records with code)", performance)
+    _bench(f"/students ({records} records)", json.dumps(students_payload(records, rng)).encode())
+    _bench(f"/questions ({records} records)", json.dumps(questions_payload(records, rng)).encode())
+    _bench_stream(performance)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
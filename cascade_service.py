@@ -1,17 +1,102 @@
-"""Cascading delete service for hierarchical entities."""
+"""Cascading delete service for hierarchical entities.
+
+A cascade first collects every affected document with batched "in" queries
+(one round-trip per 30 parents per collection), then deletes them with
+chunked batch writes of up to 500 operations, leaves first, so an interrupted
+cascade leaves the parent in place and can simply be re-run.
+"""
+import logging
+import time
+
 from models import (
     CollegeModel, DepartmentModel, BatchModel, StudentModel,
-    QuestionModel, NoteModel, PerformanceModel
+    QuestionModel, NoteModel, PerformanceModel, StudentStatsModel, StudentProgressModel
 )
-from auth import disable_user_firebase, delete_user_firebase
+from auth import delete_users_firebase
+from storage import BATCH_WRITE_LIMIT
 from utils import audit_log
 
+logger = logging.getLogger(__name__)
+
 
 class CascadeService:
     """Service for cascading deletes across entity hierarchy."""
 
     @staticmethod
-    def delete_college_cascade(college_id, user_id):
+    def _collect_students(students):
+        """Collect the notes and performance records of the given students."""
+        student_ids = [s["id"] for s in students]
+        return {
+            "students": students,
+            "notes": NoteModel().query_in("student_id", student_ids),
+            "performance": PerformanceModel().query_in("student_id", student_ids),
+            "student_stats": [{"id": student_id} for student_id in student_ids],
+            "student_progress": [{"id": student_id} for student_id in student_ids],
+        }
+
+    @staticmethod
+    def _collect_batches(batches):
+        """Collect everything hanging off the given batches."""
+        batch_ids = [b["id"] for b in batches]
+        plan = CascadeService._collect_students(StudentModel().query_in("batch_id", batch_ids))
+        plan["batches"] = batches
+        plan["questions"] = QuestionModel().query_in("batch_id", batch_ids)
+        return plan
+
+    @staticmethod
+    def _execute(plan, progress=None):
+        """Delete every document in a plan, leaves first, and its Firebase users.
+
+        `progress`, if given, is called with the running per-collection counts
+        after each collection has been deleted.
+
+        Returns:
+            dict: Throughput metrics (ops, batches, elapsed_seconds, ops_per_second)
+        """
+        started = time.monotonic()
+        order = [
+            ("notes", NoteModel), ("performance", PerformanceModel),
+            ("student_stats", StudentStatsModel), ("student_progress", StudentProgressModel),
+            ("questions", QuestionModel), ("students", StudentModel),
+            ("batches", BatchModel), ("departments", DepartmentModel),
+            ("colleges", CollegeModel),
+        ]
+
+        ops = 0
+        deleted = {}
+        for key, model in order:
+            docs = plan.get(key) or []
+            if docs:
+                ops += model().hard_delete_many(d["id"] for d in docs)
+                deleted[key] = len(docs)
+                if progress:
+                    progress({"deleted": dict(deleted), "ops": ops})
+
+        # Accounts of deleted users (notes/performance/questions have none)
+        uids = [
+            d.get("firebase_uid")
+            for key in ("students", "batches", "departments", "colleges")
+            for d in plan.get(key) or []
+        ]
+        auth_deleted = delete_users_firebase(uids)
+
+        elapsed = time.monotonic() - started
+        metrics = {
+            "ops": ops,
+            "batches": sum(-(-len(plan.get(key) or []) // BATCH_WRITE_LIMIT) for key, _ in order),
+            "auth_users": auth_deleted,
+            "elapsed_seconds": round(elapsed, 3),
+            "ops_per_second": round(ops / elapsed, 1) if elapsed > 0 else ops,
+        }
+        logger.info(f"Cascade delete: {metrics}")
+        return metrics
+
+    @staticmethod
+    def _counts(plan):
+        return {key: len(plan.get(key) or []) for key in ("students", "questions", "notes", "performance")}
+
+    @staticmethod
+    def delete_college_cascade(college_id, user_id, progress=None):
         """
         Delete a college and all its dependencies:
         - All departments in the college
@@ -23,49 +108,32 @@ class CascadeService:
         """
         college = CollegeModel().get(college_id)
         if not college:
-            return False, "College not found"
+            return False, "College not found", {}
 
-        # Get all departments in this college
         departments = DepartmentModel().query(college_id=college_id)
-        
+        plan = CascadeService._collect_batches(
+            BatchModel().query_in("department_id", [d["id"] for d in departments])
+        )
+        plan["departments"] = departments
+        plan["colleges"] = [college]
+
+        metrics = CascadeService._execute(plan, progress)
+
         deleted_count = {
-            "college": 0,
-            "departments": 0,
-            "batches": 0,
-            "students": 0,
-            "questions": 0,
-            "notes": 0,
-            "performance": 0
+            "college": 1,
+            "departments": len(departments),
+            "batches": len(plan["batches"]),
+            **CascadeService._counts(plan)
         }
 
-        # Delete all departments and their cascades
-        for dept in departments:
-            dept_id = dept.get("id")
-            result = CascadeService.delete_department_cascade(dept_id, user_id, cascade_from_college=True)
-            if result[0]:
-                deleted_count["departments"] += 1
-                deleted_count["batches"] += result[2].get("batches", 0)
-                deleted_count["students"] += result[2].get("students", 0)
-                deleted_count["questions"] += result[2].get("questions", 0)
-                deleted_count["notes"] += result[2].get("notes", 0)
-                deleted_count["performance"] += result[2].get("performance", 0)
-
-        # Delete the college itself
-        CollegeModel().hard_delete(college_id)
-        deleted_count["college"] = 1
-        
-        # Delete Firebase user for college
-        if college.get("firebase_uid"):
-            delete_user_firebase(college.get("firebase_uid"))
-
         # Audit log
-        audit_log(user_id, "delete_college_cascade", "college", college_id, 
-                 {"deleted_count": deleted_count})
+        audit_log(user_id, "delete_college_cascade", "college", college_id,
+                 {"deleted_count": deleted_count, "metrics": metrics})
 
         return True, "College and all dependencies deleted successfully", deleted_count
 
     @staticmethod
-    def delete_department_cascade(dept_id, user_id, cascade_from_college=False):
+    def delete_department_cascade(dept_id, user_id, cascade_from_college=False, progress=None):
         """
         Delete a department and all its dependencies:
         - All batches in the department
@@ -78,51 +146,26 @@ class CascadeService:
         if not dept:
             return False, "Department not found", {}
 
-        # Get all batches in this department
-        batches = BatchModel().query(department_id=dept_id)
-        
+        plan = CascadeService._collect_batches(BatchModel().query(department_id=dept_id))
+        plan["departments"] = [dept]
+
+        metrics = CascadeService._execute(plan, progress)
+
         deleted_count = {
-            "department": 0,
-            "batches": 0,
-            "students": 0,
-            "questions": 0,
-            "notes": 0,
-            "performance": 0
+            "department": 0 if cascade_from_college else 1,
+            "batches": len(plan["batches"]),
+            **CascadeService._counts(plan)
         }
 
-        # Delete all batches and their cascades
-        for batch in batches:
-            batch_id = batch.get("id")
-            result = CascadeService.delete_batch_cascade(batch_id, user_id, cascade_from_dept=True)
-            if result[0]:
-                deleted_count["batches"] += 1
-                deleted_count["students"] += result[2].get("students", 0)
-                deleted_count["questions"] += result[2].get("questions", 0)
-                deleted_count["notes"] += result[2].get("notes", 0)
-                deleted_count["performance"] += result[2].get("performance", 0)
-
-        # Delete the department itself (only if not cascading from college)
+        # Audit log (a college cascade audits once for the whole tree)
         if not cascade_from_college:
-            DepartmentModel().hard_delete(dept_id)
-            deleted_count["department"] = 1
-            
-            # Delete Firebase user for department
-            if dept.get("firebase_uid"):
-                delete_user_firebase(dept.get("firebase_uid"))
-            
-            # Audit log
-            audit_log(user_id, "delete_department_cascade", "department", dept_id, 
-                     {"deleted_count": deleted_count})
-        else:
-            # Still mark as deleted but don't audit separately
-            DepartmentModel().hard_delete(dept_id)
-            if dept.get("firebase_uid"):
-                delete_user_firebase(dept.get("firebase_uid"))
+            audit_log(user_id, "delete_department_cascade", "department", dept_id,
+                     {"deleted_count": deleted_count, "metrics": metrics})
 
         return True, "Department and all dependencies deleted successfully", deleted_count
 
     @staticmethod
-    def delete_batch_cascade(batch_id, user_id, cascade_from_dept=False):
+    def delete_batch_cascade(batch_id, user_id, cascade_from_dept=False, progress=None):
         """
         Delete a batch and all its dependencies:
         - All students in the batch
@@ -134,71 +177,24 @@ class CascadeService:
         if not batch:
             return False, "Batch not found", {}
 
-        # Get all students in this batch
-        students = StudentModel().query(batch_id=batch_id)
-        
-        # Get all questions for this batch
-        questions = QuestionModel().query(batch_id=batch_id)
-        
+        plan = CascadeService._collect_batches([batch])
+
+        metrics = CascadeService._execute(plan, progress)
+
         deleted_count = {
-            "batch": 0,
-            "students": 0,
-            "questions": 0,
-            "notes": 0,
-            "performance": 0
+            "batch": 0 if cascade_from_dept else 1,
+            **CascadeService._counts(plan)
         }
 
-        # Delete all students and their related records
-        for student in students:
-            student_id = student.get("id")
-            
-            # Delete notes for this student
-            notes = NoteModel().query(student_id=student_id)
-            for note in notes:
-                NoteModel().hard_delete(note.get("id"))
-                deleted_count["notes"] += 1
-            
-            # Delete performance records for this student
-            performance_records = PerformanceModel().query(student_id=student_id)
-            for perf in performance_records:
-                PerformanceModel().hard_delete(perf.get("id"))
-                deleted_count["performance"] += 1
-            
-            # Delete the student
-            StudentModel().hard_delete(student_id)
-            deleted_count["students"] += 1
-            
-            # Delete Firebase user for student
-            if student.get("firebase_uid"):
-                delete_user_firebase(student.get("firebase_uid"))
-
-        # Delete all questions for this batch
-        for question in questions:
-            QuestionModel().hard_delete(question.get("id"))
-            deleted_count["questions"] += 1
-
-        # Delete the batch itself (only if not cascading from department)
+        # Audit log (a department cascade audits once for the whole tree)
         if not cascade_from_dept:
-            BatchModel().hard_delete(batch_id)
-            deleted_count["batch"] = 1
-            
-            # Delete Firebase user for batch
-            if batch.get("firebase_uid"):
-                delete_user_firebase(batch.get("firebase_uid"))
-            
-            # Audit log
-            audit_log(user_id, "delete_batch_cascade", "batch", batch_id, 
-                     {"deleted_count": deleted_count})
-        else:
-            # Still mark as deleted but don't audit separately
-            BatchModel().hard_delete(batch_id)
-            if batch.get("firebase_uid"):
-                delete_user_firebase(batch.get("firebase_uid"))
+            audit_log(user_id, "delete_batch_cascade", "batch", batch_id,
+                     {"deleted_count": deleted_count, "metrics": metrics})
 
         return True, "Batch and all dependencies deleted successfully", deleted_count
 
     @staticmethod
-    def delete_student_cascade(student_id, user_id):
+    def delete_student_cascade(student_id, user_id, progress=None):
         """
         Delete a student and all their related records:
         - All notes
@@ -208,34 +204,18 @@ class CascadeService:
         if not student:
             return False, "Student not found", {}
 
-        deleted_count = {
-            "student": 0,
-            "notes": 0,
-            "performance": 0
-        }
-
-        # Delete all notes for this student
-        notes = NoteModel().query(student_id=student_id)
-        for note in notes:
-            NoteModel().hard_delete(note.get("id"))
-            deleted_count["notes"] += 1
+        plan = CascadeService._collect_students([student])
 
-        # Delete all performance records for this student
-        performance_records = PerformanceModel().query(student_id=student_id)
-        for perf in performance_records:
-            PerformanceModel().hard_delete(perf.get("id"))
-            deleted_count["performance"] += 1
+        metrics = CascadeService._execute(plan, progress)
 
-        # Delete the student
-        StudentModel().hard_delete(student_id)
-        deleted_count["student"] = 1
-
-        # Delete Firebase user for student
-        if student.get("firebase_uid"):
-            delete_user_firebase(student.get("firebase_uid"))
+        deleted_count = {
+            "student": 1,
+            "notes": len(plan["notes"]),
+            "performance": len(plan["performance"])
+        }
 
         # Audit log
-        audit_log(user_id, "delete_student_cascade", "student", student_id, 
-                 {"deleted_count": deleted_count})
+        audit_log(user_id, "delete_student_cascade", "student", student_id,
+                 {"deleted_count": deleted_count, "metrics": metrics})
 
         return True, "Student and all related records deleted successfully", deleted_count
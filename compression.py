@@ -0,0 +1,159 @@
+"""Negotiated response compression.
+
+Registered as an after_request hook in create_app. The encoding is chosen
+from Accept-Encoding (highest q-value wins, ties go to the server preference
+zstd > br > gzip). zstd and brotli are used only when the zstandard / brotli
+modules are installed; gzip is always available.
+
+Buffered responses smaller than COMPRESSION_MIN_SIZE are sent as-is. Streamed
+responses (e.g. performance exports) are compressed chunk by chunk with a
+sync flush after every chunk, so the client still receives each chunk as
+soon as it is produced.
+"""
+import zlib
+
+from flask import request
+
+from config import COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml",
+)
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def available_encodings():
+    """Supported Content-Encoding values in server preference order."""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _ZstdEncoder
+    if brotli is not None:
+        encodings["br"] = _BrotliEncoder
+    encodings["gzip"] = _GzipEncoder
+    return encodings
+
+
+ENCODERS = available_encodings()
+
+
+def negotiate(accept_encodings):
+    """Pick an encoding for a werkzeug Accept-Encoding header (None = identity)."""
+    best, best_quality = None, 0
+    for name in ENCODERS:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress_bytes(data, encoding):
+    """Compress a complete body with the given encoding."""
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(data) + encoder.finish()
+
+
+def _compress_stream(chunks, encoder):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if request.method == "HEAD" or response.direct_passthrough:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    return (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+
+
+def compress_response(response):
+    """after_request hook: compress the response body if the client accepts it."""
+    if not COMPRESSION_ENABLED or not _compressible(response):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, ENCODERS[encoding]())
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(compress_bytes(body, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    # The encoded bytes differ from the identity representation
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
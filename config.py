@@ -24,10 +24,87 @@ FIREBASE_CREDENTIALS_PATH = os.getenv("FIREBASE_CREDENTIALS_PATH", "firebase-key
 # Firestore Configuration
 FIRESTORE_PROJECT_ID = os.getenv("FIRESTORE_PROJECT_ID")
 
+# Storage Backend ("firestore", or "memory"/"sqlite" to run offline without credentials)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+STORAGE_SQLITE_PATH = os.getenv("STORAGE_SQLITE_PATH", "codeprac_local.db")
+STORAGE_LATENCY_MS = float(os.getenv("STORAGE_LATENCY_MS", "0"))  # Simulated per-call latency for local backends
+
+# Hierarchy cache (colleges/departments/batches shared across requests in a worker)
+HIERARCHY_CACHE_SIZE = int(os.getenv("HIERARCHY_CACHE_SIZE", "5000"))  # 0 disables the cache
+HIERARCHY_CACHE_TTL = float(os.getenv("HIERARCHY_CACHE_TTL", "60"))  # Seconds; bounds staleness across workers
+HIERARCHY_INDEX_SIZE = int(os.getenv("HIERARCHY_INDEX_SIZE", "100000"))  # Closure index entries (parent ID + flag each)
+HIERARCHY_CACHE_WARMUP = os.getenv("HIERARCHY_CACHE_WARMUP", "False") == "True"
+
+# Question/topic display fields used to enrich performance records
+ENRICHMENT_CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "20000"))  # 0 disables the cache
+ENRICHMENT_CACHE_TTL = float(os.getenv("ENRICHMENT_CACHE_TTL", "300"))  # Seconds; bounds staleness across workers
+
+# Concurrent Firebase Auth calls made by disable/enable cascades
+CASCADE_AUTH_WORKERS = int(os.getenv("CASCADE_AUTH_WORKERS", "8"))
+
+# "eager" stamps is_disabled on every descendant; "lazy" only flips the target
+# and derives descendants' status from their ancestors at auth time, leaving
+# the descendant writes to the reconciler (every CASCADE_RECONCILE_INTERVAL
+# seconds in each worker; set it to 0 only when reconcile_cascades.py runs
+# from cron instead)
+CASCADE_MODE = os.getenv("CASCADE_MODE", "eager").lower()
+CASCADE_RECONCILE_INTERVAL = float(os.getenv(
+    "CASCADE_RECONCILE_INTERVAL", "60" if CASCADE_MODE == "lazy" else "0"
+))  # Seconds; 0 = no background reconciler
+
+# Background job threads per worker process (cascade deletes/disables)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Streaming performance exports
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))  # Records read per round-trip
+
+# Cohort analytics: scopes with more submissions are rejected (narrow them with filters)
+ANALYTICS_MAX_RECORDS = int(os.getenv("ANALYTICS_MAX_RECORDS", "200000"))
+
 # Groq Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_API_KEY_FALLBACK = os.getenv("GROQ_API_KEY_FALLBACK")
 
+# Code execution for /run and /submit: "llm" simulates runs with the compiler
+# agent; "local" compiles and runs code in a resource-limited subprocess sandbox
+# (see sandbox_runner), falling back to the LLM when a toolchain is missing.
+# Local runs execute untrusted code: run the service as (or set SANDBOX_UID to)
+# an unprivileged user without access to secrets, ideally in a container
+# without network access.
+CODE_RUNNER = os.getenv("CODE_RUNNER", "llm").lower()
+SANDBOX_TIME_LIMIT = float(os.getenv("SANDBOX_TIME_LIMIT", "2"))  # CPU seconds per run
+SANDBOX_WALL_LIMIT = float(os.getenv("SANDBOX_WALL_LIMIT", "5"))  # Seconds per run (covers sleeping/blocked code)
+SANDBOX_MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "256"))
+SANDBOX_OUTPUT_KB = int(os.getenv("SANDBOX_OUTPUT_KB", "64"))  # Per stream of a run; larger output is an error
+SANDBOX_COMPILE_TIME_LIMIT = float(os.getenv("SANDBOX_COMPILE_TIME_LIMIT", "20"))
+SANDBOX_COMPILE_MEMORY_MB = int(os.getenv("SANDBOX_COMPILE_MEMORY_MB", "1024"))
+SANDBOX_COMPILE_FSIZE_MB = int(os.getenv("SANDBOX_COMPILE_FSIZE_MB", "512"))  # Largest file a compiler/linker may write
+SANDBOX_UID = int(os.getenv("SANDBOX_UID")) if os.getenv("SANDBOX_UID") else None  # Drop to this user (when root)
+SANDBOX_MAX_PROCESSES = int(os.getenv("SANDBOX_MAX_PROCESSES", "256"))  # RLIMIT_NPROC for SANDBOX_UID (per user, all runs)
+
+# Local grading: testcases run in parallel, at most GRADER_WORKERS at once per
+# worker process; stop-on-failure ends grading at the first failing case
+GRADER_WORKERS = int(os.getenv("GRADER_WORKERS", str(os.cpu_count() or 2)))
+GRADER_STOP_ON_FAILURE = os.getenv("GRADER_STOP_ON_FAILURE", "False") == "True"
+
+# Concurrent agent calls per worker process (a submission runs compile, evaluate
+# and efficiency at once); keep at or below GROQ_POOL_SIZE so calls reuse pooled connections
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "9"))
+
+# Documents each daily rollup bucket is split across (see rollup_service);
+# raise it when a college sustains more than a few submissions per second
+ROLLUP_SHARDS = max(1, int(os.getenv("ROLLUP_SHARDS", "8")))
+
+# Reuse the verdict of an equivalent earlier submission (see verdict_cache)
+VERDICT_CACHE_ENABLED = os.getenv("VERDICT_CACHE_ENABLED", "True") == "True"
+
+# Response compression (gzip; zstd/brotli when the zstandard/brotli modules are installed)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True") == "True"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Bytes; smaller buffered bodies are sent as-is
+
+# Debugging: add an X-Read-Stats header (identity map hits/misses) to every response
+EXPOSE_READ_STATS = os.getenv("EXPOSE_READ_STATS", "False") == "True"
+
 # CORS Configuration
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
@@ -58,6 +135,12 @@ COLLECTION_QUESTIONS = "questions"
 COLLECTION_NOTES = "notes"
 COLLECTION_PERFORMANCE = "performance"
 COLLECTION_AUDIT_LOGS = "audit_logs"
+COLLECTION_JOBS = "jobs"
+COLLECTION_STUDENT_STATS = "student_stats"
+COLLECTION_STUDENT_PROGRESS = "student_progress"
+COLLECTION_DAILY_ROLLUPS = "daily_rollups"
+COLLECTION_SCOPE_VERSIONS = "scope_versions"
+COLLECTION_VERDICTS = "verdicts"
 
 
 # ============================================================================
@@ -78,8 +161,8 @@ def validate_configuration():
             "⚠️  GROQ_API_KEY not configured! AI features (code execution, evaluation) will not work."
         )
     
-    # Critical for Firebase
-    if not FIREBASE_CREDENTIALS_PATH or not os.path.exists(FIREBASE_CREDENTIALS_PATH):
+    # Critical for Firebase (local storage backends run without credentials)
+    if STORAGE_BACKEND == "firestore" and (not FIREBASE_CREDENTIALS_PATH or not os.path.exists(FIREBASE_CREDENTIALS_PATH)):
         warnings.append(
             f"⚠️  Firebase credentials file not found: {FIREBASE_CREDENTIALS_PATH}"
         )
@@ -95,6 +178,13 @@ def validate_configuration():
             "⚠️  JWT_SECRET is using default value! Change in production."
         )
     
+    # Lazy cascades only reach descendants through the reconciler
+    if CASCADE_MODE == "lazy" and CASCADE_RECONCILE_INTERVAL <= 0:
+        warnings.append(
+            "⚠️  CASCADE_MODE=lazy without CASCADE_RECONCILE_INTERVAL: pending cascades are only "
+            "applied by running reconcile_cascades.py"
+        )
+    
     # Warnings for Firebase config
     firebase_required = [
         ("FIREBASE_API_KEY", FIREBASE_API_KEY),
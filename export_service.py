@@ -0,0 +1,134 @@
+"""Streaming CSV / NDJSON export of performance records.
+
+Records are read page by page (cursor pagination on document ID) and written
+to the response as they arrive, so memory stays flat and the first bytes are
+sent immediately regardless of how many submissions match. Question titles
+and topic names are resolved per page through PerformanceService and its
+bounded process-wide cache.
+
+The generator deliberately runs outside the request context: the
+request-scoped identity map would otherwise keep every page alive until the
+download finishes.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Response
+
+from config import EXPORT_PAGE_SIZE
+from models import PerformanceModel
+from performance_service import PerformanceService
+from utils import error_response
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+CSV_COLUMNS = [
+    "id", "student_id", "question_id", "question_title", "question_difficulty", "topic_id", "topic_name",
+    "college_id", "department_id", "batch_id", "status", "submission_language",
+    "submitted_at", "attempts",
+]
+
+# Stored fields read for an export: the columns plus what enrichment needs to
+# derive question_difficulty from denormalized records
+EXPORT_FIELDS = tuple(CSV_COLUMNS) + ("difficulty",)
+
+# Scope filters a caller may add on top of their role scope
+SCOPE_FILTERS = ("college_id", "department_id", "batch_id", "student_id", "question_id", "status")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _export_fields(include_code):
+    return EXPORT_FIELDS + (("submission_code",) if include_code else ())
+
+
+def iter_pages(filters, page_size=None, fields=None):
+    """Yield pages of performance records matching equality filters.
+
+    Only the given fields are read when fields is set.
+    """
+    model = PerformanceModel()
+    page_size = page_size or EXPORT_PAGE_SIZE
+    last_id = None
+    while True:
+        page, last_id = model.query_page(limit=page_size, start_after=last_id, fields=fields, **filters)
+        if page:
+            yield page
+        if last_id is None:
+            return
+
+
+def _iter_csv(filters, include_code):
+    columns = CSV_COLUMNS + (["submission_code"] if include_code else [])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for page in iter_pages(filters, fields=_export_fields(include_code)):
+        buffer.seek(0)
+        buffer.truncate()
+        for record in PerformanceService.enrich(page):
+            writer.writerow({
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in record.items()
+            })
+        yield buffer.getvalue()
+
+
+def _iter_ndjson(filters, include_code):
+    for page in iter_pages(filters, fields=_export_fields(include_code)):
+        lines = []
+        for record in PerformanceService.enrich(page):
+            record.pop("difficulty", None)
+            lines.append(json.dumps(record, default=_json_default))
+        yield "\n".join(lines) + "\n"
+
+
+class ExportService:
+    """Service for streaming performance exports."""
+
+    @staticmethod
+    def export_response(scope_filters, args):
+        """Build a streaming export response.
+
+        Args:
+            scope_filters: Filters enforced by the caller's role
+                (e.g. {"college_id": ...}); they override query params
+            args: Request query params (format, include_code and optional
+                extra equality filters from SCOPE_FILTERS)
+
+        Returns:
+            Response or (response, status_code) on invalid input
+        """
+        missing = [key for key, value in scope_filters.items() if not value]
+        if missing:
+            return error_response("INVALID_INPUT", f"{missing[0]} is required")
+
+        export_format = (args.get("format") or "csv").lower()
+        if export_format not in EXPORT_FORMATS:
+            return error_response("INVALID_INPUT", f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+        filters = {key: args.get(key) for key in SCOPE_FILTERS if args.get(key)}
+        filters.update(scope_filters)
+        include_code = args.get("include_code", "false").lower() == "true"
+
+        generate = _iter_csv if export_format == "csv" else _iter_ndjson
+        filename = f"performance_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        return Response(
+            generate(filters, include_code),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "X-Accel-Buffering": "no"
+            }
+        )
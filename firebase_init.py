@@ -1,53 +1,114 @@
 """Firebase and Firestore initialization."""
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
-from config import FIREBASE_CREDENTIALS_PATH, FIRESTORE_PROJECT_ID
+from config import FIREBASE_CREDENTIALS_PATH, FIRESTORE_PROJECT_ID, STORAGE_BACKEND
 import os
 import base64
 import json
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
-# Initialize Firebase App
-try:
-    creds = None
-    
-    # Priority 1: Use base64 encoded credentials (Render production)
-    firebase_key_base64 = os.getenv('FIREBASE_KEY_BASE64')
-    if firebase_key_base64:
-        logger.info("Using base64 encoded Firebase credentials from environment")
-        try:
-            key_data = base64.b64decode(firebase_key_base64)
-            creds = credentials.Certificate(json.loads(key_data))
-        except Exception as e:
-            logger.error(f"Failed to decode base64 Firebase key: {e}")
-            raise
-    
-    # Priority 2: Use file path (local development)
-    if not creds:
-        if os.path.exists(FIREBASE_CREDENTIALS_PATH):
-            logger.info(f"Using Firebase credentials from file: {FIREBASE_CREDENTIALS_PATH}")
-            creds = credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
-        else:
-            raise FileNotFoundError(
-                f"Firebase credentials not found. "
-                f"Set FIREBASE_KEY_BASE64 env var or place file at {FIREBASE_CREDENTIALS_PATH}"
-            )
-    
-    firebase_admin.initialize_app(creds, {
-        "projectId": FIRESTORE_PROJECT_ID
-    })
-    logger.info("✓ Firebase initialized successfully")
-except Exception as e:
-    logger.error(f"✗ Firebase initialization failed: {e}")
-    raise
-
-# Get Firestore client
-db = firestore.client()
-
-# Get Auth reference
-auth_ref = auth
+
+class _LocalUser:
+    """Stand-in for firebase_admin.auth.UserRecord."""
+    
+    def __init__(self, uid, email=None, display_name=None, disabled=False):
+        self.uid = uid
+        self.email = email
+        self.display_name = display_name
+        self.disabled = disabled
+
+
+class _LocalDeleteUsersResult:
+    """Minimal DeleteUsersResult look-alike."""
+    
+    def __init__(self, success_count):
+        self.success_count = success_count
+        self.failure_count = 0
+        self.errors = []
+
+
+class _LocalAuth:
+    """In-process replacement for Firebase Auth used with local storage backends."""
+    
+    def __init__(self):
+        self.users = {}
+    
+    def create_user(self, email=None, password=None, display_name=None, disabled=False, **kwargs):
+        user = _LocalUser(str(uuid.uuid4()), email, display_name, disabled)
+        self.users[user.uid] = user
+        return user
+    
+    def update_user(self, uid, **kwargs):
+        user = self.users.setdefault(uid, _LocalUser(uid))
+        for key, value in kwargs.items():
+            if key != "password":
+                setattr(user, key, value)
+        return user
+    
+    def delete_user(self, uid):
+        self.users.pop(uid, None)
+    
+    def delete_users(self, uids):
+        for uid in uids:
+            self.users.pop(uid, None)
+        return _LocalDeleteUsersResult(len(uids))
+    
+    def set_custom_user_claims(self, uid, claims):
+        pass
+    
+    def verify_id_token(self, token):
+        raise ValueError("ID token verification is unavailable with a local storage backend")
+
+
+if STORAGE_BACKEND == "firestore":
+    # Initialize Firebase App
+    try:
+        creds = None
+        
+        # Priority 1: Use base64 encoded credentials (Render production)
+        firebase_key_base64 = os.getenv('FIREBASE_KEY_BASE64')
+        if firebase_key_base64:
+            logger.info("Using base64 encoded Firebase credentials from environment")
+            try:
+                key_data = base64.b64decode(firebase_key_base64)
+                creds = credentials.Certificate(json.loads(key_data))
+            except Exception as e:
+                logger.error(f"Failed to decode base64 Firebase key: {e}")
+                raise
+        
+        # Priority 2: Use file path (local development)
+        if not creds:
+            if os.path.exists(FIREBASE_CREDENTIALS_PATH):
+                logger.info(f"Using Firebase credentials from file: {FIREBASE_CREDENTIALS_PATH}")
+                creds = credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
+            else:
+                raise FileNotFoundError(
+                    f"Firebase credentials not found. "
+                    f"Set FIREBASE_KEY_BASE64 env var or place file at {FIREBASE_CREDENTIALS_PATH}"
+                )
+        
+        firebase_admin.initialize_app(creds, {
+            "projectId": FIRESTORE_PROJECT_ID
+        })
+        logger.info("✓ Firebase initialized successfully")
+    except Exception as e:
+        logger.error(f"✗ Firebase initialization failed: {e}")
+        raise
+    
+    # Get Firestore client
+    db = firestore.client()
+    
+    # Get Auth reference
+    auth_ref = auth
+else:
+    # Offline mode: the local backend doubles as the db handle and Auth is simulated
+    from storage import get_backend
+    logger.info(f"STORAGE_BACKEND={STORAGE_BACKEND}: skipping Firebase initialization")
+    db = get_backend()
+    auth_ref = _LocalAuth()
 
 
 def get_db():
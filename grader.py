@@ -0,0 +1,144 @@
+"""Parallel testcase grading on the local sandbox.
+
+A submission is compiled once (sandbox_runner.prepare) and its testcases run
+concurrently on a process-wide pool of GRADER_WORKERS threads, sized to the
+machine's cores. Each case already executes in its own sandboxed process, so
+the threads only bound how many run at once; sharing one pool keeps
+concurrent submissions from oversubscribing the cores.
+
+Two modes:
+- full: every case runs; test_results has a status, time and memory for each
+- stop on failure: the first failing case cancels the rest (queued cases are
+  dropped, running ones are killed) and they are reported as skipped
+
+Outputs are compared ignoring trailing whitespace on each line and blank
+lines at the end.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import sandbox_runner
+from config import GRADER_WORKERS
+
+CASE_PASSED = "passed"
+CASE_FAILED = "failed"  # Ran, wrong output
+CASE_SKIPPED = "skipped"
+
+# Bytes of output/error echoed back for visible testcases
+DETAIL_LIMIT = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=GRADER_WORKERS, thread_name_prefix="grader")
+    return _executor
+
+
+def _normalize_output(text):
+    lines = [line.rstrip() for line in str(text if text is not None else "").splitlines()]
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def outputs_match(actual, expected):
+    """Compare program output with the expected output (whitespace-tolerant)."""
+    return _normalize_output(actual) == _normalize_output(expected)
+
+
+def _run_case(program, testcase, cancel):
+    if cancel.is_set():
+        return {"status": CASE_SKIPPED}
+    run = program.run(str(testcase.get("input", "")), cancel=cancel)
+    if run["status"] == sandbox_runner.STATUS_CANCELLED:
+        return {"status": CASE_SKIPPED}
+    if run["status"] == sandbox_runner.STATUS_OK:
+        status = CASE_PASSED if outputs_match(run["stdout"], testcase.get("expected_output")) else CASE_FAILED
+    else:
+        status = run["status"]
+    return {
+        "status": status,
+        "time_ms": run["time_ms"],
+        "wall_ms": run["wall_ms"],
+        "memory_kb": run["memory_kb"],
+        "output": run["stdout"][:DETAIL_LIMIT],
+        "error": run["stderr"][-DETAIL_LIMIT:] if status != CASE_PASSED else "",
+    }
+
+
+def grade(code, language, testcases, stop_on_failure=False, visible_count=0):
+    """Run code against testcases in parallel.
+
+    Args:
+        code: Source code
+        language: A language sandbox_runner.supported() accepts
+        testcases: [{"input": ..., "expected_output": ...}, ...]
+        stop_on_failure: Stop at the first failing case (quick verdict)
+        visible_count: The first N cases are visible to the student: their
+            results include input, expected and actual output. Hidden cases
+            only report status, time and memory.
+
+    Returns:
+        dict: is_correct, reason, passed, total and test_results (one entry
+            per case: case, hidden, status, time_ms, wall_ms, memory_kb)
+    """
+    total = len(testcases)
+    program, failure = sandbox_runner.prepare(code, language)
+    if failure is not None:
+        return {
+            "is_correct": False,
+            "reason": sandbox_runner.describe_failure(failure),
+            "passed": 0,
+            "total": total,
+            "test_results": []
+        }
+
+    cancel = threading.Event()
+    outcomes = [None] * total
+    with program:
+        executor = _get_executor()
+        futures = {executor.submit(_run_case, program, testcase, cancel): index
+                   for index, testcase in enumerate(testcases)}
+        for future in as_completed(futures):
+            index = futures[future]
+            outcomes[index] = {"status": CASE_SKIPPED} if future.cancelled() else future.result()
+            if stop_on_failure and outcomes[index]["status"] not in (CASE_PASSED, CASE_SKIPPED):
+                cancel.set()
+                for pending in futures:
+                    pending.cancel()
+
+    test_results = []
+    for index, (testcase, outcome) in enumerate(zip(testcases, outcomes)):
+        entry = {"case": index + 1, "hidden": index >= visible_count, "status": outcome["status"]}
+        if outcome["status"] != CASE_SKIPPED:
+            entry.update(time_ms=outcome["time_ms"], wall_ms=outcome["wall_ms"], memory_kb=outcome["memory_kb"])
+            if not entry["hidden"]:
+                entry.update(
+                    input=testcase.get("input"),
+                    expected_output=testcase.get("expected_output"),
+                    output=outcome["output"],
+                    error=outcome["error"]
+                )
+        test_results.append(entry)
+
+    passed = sum(1 for entry in test_results if entry["status"] == CASE_PASSED)
+    failing = next((entry for entry in test_results if entry["status"] not in (CASE_PASSED, CASE_SKIPPED)), None)
+    if failing is None and passed == total:
+        reason = f"All {total} test cases passed"
+    elif failing is not None:
+        reason = f"Test case {failing['case']} of {total}: {failing['status'].replace('_', ' ')}"
+    else:
+        reason = f"{passed} of {total} test cases passed"
+    return {
+        "is_correct": total > 0 and passed == total,
+        "reason": reason,
+        "passed": passed,
+        "total": total,
+        "test_results": test_results
+    }
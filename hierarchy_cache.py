@@ -0,0 +1,112 @@
+"""Process-wide TTL/LRU cache for the college/department/batch hierarchy.
+
+Colleges, departments and batches change rarely but are read on nearly every
+request (hierarchy validation, name resolution, access checks). FirestoreModel
+consults this cache for those three collections and every write made through
+the model layer (create/update/delete/enable/hard_delete, and therefore the
+cascades built on them) invalidates the affected entry.
+
+Each Gunicorn worker has its own cache, so a write handled by one worker is
+only seen by the others once their entry expires - HIERARCHY_CACHE_TTL bounds
+that staleness.
+
+The same TTLCache also backs enrichment_cache: the question title/difficulty/
+topic and topic name projections used to enrich performance records, dropped
+by QuestionModel/TopicModel writes.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config import HIERARCHY_CACHE_SIZE, HIERARCHY_CACHE_TTL, ENRICHMENT_CACHE_SIZE, ENRICHMENT_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+HIERARCHY_COLLECTIONS = ("colleges", "departments", "batches")
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Look up a key.
+
+        Returns:
+            (bool, value): (found, copy of the cached value)
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, copy.deepcopy(value)
+
+    def set(self, key, value):
+        """Store a copy of value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        """Drop a single entry."""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._stats["invalidations"] += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        """Get hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return dict(self._stats, size=len(self._data), maxsize=self.maxsize, ttl=self.ttl)
+
+
+hierarchy_cache = TTLCache(HIERARCHY_CACHE_SIZE, HIERARCHY_CACHE_TTL)
+enrichment_cache = TTLCache(ENRICHMENT_CACHE_SIZE, ENRICHMENT_CACHE_TTL)
+
+
+def warm_up(backend=None):
+    """Preload every college, department and batch into the cache.
+
+    Returns:
+        int: Number of documents loaded
+    """
+    from storage import get_backend
+    backend = backend or get_backend()
+
+    loaded = 0
+    for collection in HIERARCHY_COLLECTIONS:
+        for doc_id, data in backend.query(collection, {}):
+            hierarchy_cache.set((collection, doc_id), data | {"id": doc_id})
+            loaded += 1
+
+    logger.info(f"Hierarchy cache warmed with {loaded} documents")
+    return loaded
@@ -0,0 +1,180 @@
+"""In-process closure index over the student -> batch -> department -> college chain.
+
+Each node stores only its parent ID and its own is_disabled flag, so an
+entity's full ancestor chain (with effective disabled flags) is a handful of
+dict lookups instead of a chain of document reads. Nodes are loaded lazily
+through the models on first use and kept current by FirestoreModel writes:
+create records the node, update/delete/enable patch it, hard_delete drops it.
+
+Entries expire after HIERARCHY_CACHE_TTL like the hierarchy cache, which
+bounds staleness for writes made by other workers.
+"""
+from config import HIERARCHY_CACHE_TTL, HIERARCHY_INDEX_SIZE
+from hierarchy_cache import TTLCache
+
+# collection -> (parent field, parent collection)
+PARENTS = {
+    "students": ("batch_id", "batches"),
+    "batches": ("department_id", "departments"),
+    "departments": ("college_id", "colleges"),
+    "colleges": (None, None),
+}
+
+# Scope field identifying an entity of each collection
+SCOPE_FIELDS = {
+    "students": "student_id",
+    "batches": "batch_id",
+    "departments": "department_id",
+    "colleges": "college_id",
+}
+
+_nodes = TTLCache(HIERARCHY_INDEX_SIZE, HIERARCHY_CACHE_TTL)
+
+
+def _model_for(collection):
+    from models import CollegeModel, DepartmentModel, BatchModel, StudentModel
+    return {
+        "colleges": CollegeModel,
+        "departments": DepartmentModel,
+        "batches": BatchModel,
+        "students": StudentModel,
+    }[collection]()
+
+
+def _make_node(collection, data):
+    parent_field = PARENTS[collection][0]
+    parent_id = data.get(parent_field) if parent_field else None
+    return (parent_id, bool(data.get("is_disabled", False)))
+
+
+def _node(collection, doc_id):
+    """Get (parent_id, disabled) for an entity, loading it on a miss."""
+    if not doc_id:
+        return None
+    found, node = _nodes.get((collection, doc_id))
+    if found:
+        return node
+
+    doc = _model_for(collection).get(doc_id)
+    if doc is None:
+        return None
+    node = _make_node(collection, doc)
+    _nodes.set((collection, doc_id), node)
+    return node
+
+
+def record(collection, doc_id, data):
+    """Index a freshly created (or fully rewritten) entity."""
+    if collection in PARENTS:
+        _nodes.set((collection, doc_id), _make_node(collection, data))
+
+
+def apply_update(collection, doc_id, changes):
+    """Patch an indexed entity after a partial update."""
+    if collection not in PARENTS:
+        return
+    found, node = _nodes.get((collection, doc_id))
+    if not found:
+        return
+    parent_id, disabled = node
+    parent_field = PARENTS[collection][0]
+    if parent_field and parent_field in changes:
+        parent_id = changes[parent_field]
+    if "is_disabled" in changes:
+        disabled = bool(changes["is_disabled"])
+    _nodes.set((collection, doc_id), (parent_id, disabled))
+
+
+def forget(collection, doc_id):
+    """Drop an entity from the index (e.g. after a hard delete)."""
+    if collection in PARENTS:
+        _nodes.invalidate((collection, doc_id))
+
+
+def clear():
+    """Drop every indexed entity."""
+    _nodes.clear()
+
+
+def stats():
+    """Get index counters."""
+    return _nodes.stats()
+
+
+def chain(collection, doc_id):
+    """Get the ancestor chain of an entity, root first.
+
+    Returns:
+        list: [{"collection", "id", "disabled", "effectively_disabled"}, ...]
+        ending with the entity itself; empty if the entity does not exist.
+        The chain stops early at a dangling parent reference.
+    """
+    links = []
+    while collection and doc_id:
+        node = _node(collection, doc_id)
+        if node is None:
+            break
+        parent_id, disabled = node
+        links.append({"collection": collection, "id": doc_id, "disabled": disabled})
+        collection, doc_id = PARENTS[collection][1], parent_id
+
+    if not links:
+        return []
+    links.reverse()
+
+    inherited = False
+    for link in links:
+        inherited = inherited or link["disabled"]
+        link["effectively_disabled"] = inherited
+    return links
+
+
+def is_disabled(collection, doc_id):
+    """Check an entity's own is_disabled flag (False if it does not exist)."""
+    node = _node(collection, doc_id)
+    return bool(node and node[1])
+
+
+def is_accessible(collection, doc_id):
+    """Check that an entity exists and neither it nor any ancestor is disabled."""
+    links = chain(collection, doc_id)
+    return bool(links) and not links[-1]["effectively_disabled"]
+
+
+def is_effectively_disabled(collection, doc_id):
+    """Check whether an existing entity or any of its ancestors is disabled."""
+    links = chain(collection, doc_id)
+    return bool(links) and links[-1]["effectively_disabled"]
+
+
+def is_user_disabled(user):
+    """Check whether the entity behind a JWT payload is effectively disabled.
+
+    Admins (and payloads whose entity no longer exists) are never reported
+    as disabled here.
+    """
+    role = user.get("role")
+    collection = {"student": "students", "batch": "batches", "department": "departments", "college": "colleges"}.get(role)
+    if not collection:
+        return False
+    return is_effectively_disabled(collection, user.get(SCOPE_FIELDS[collection]))
+
+
+def ancestor_ids(collection, doc_id):
+    """Get scope IDs for an entity, e.g. {"college_id": ..., "department_id": ..., "batch_id": ...}."""
+    return {SCOPE_FIELDS[link["collection"]]: link["id"] for link in chain(collection, doc_id)}
+
+
+def in_scope(collection, doc_id, user):
+    """Check that an entity sits under the college/department/batch of a JWT payload.
+
+    Only the scope fields present on the user are compared, so a college user
+    matches every entity in their college.
+    """
+    ids = ancestor_ids(collection, doc_id)
+    if not ids:
+        return False
+    for field in ("college_id", "department_id", "batch_id"):
+        if user.get(field) and ids.get(field) != user.get(field):
+            return False
+    return True
@@ -0,0 +1,135 @@
+"""Background jobs for long-running cascades and fan-outs.
+
+Cascade routes enqueue a job and return 202 immediately instead of holding a
+sync Gunicorn worker until the cascade finishes; question/topic renames
+copy the new names onto performance records the same way. Jobs run on a small thread
+pool inside the worker process; their status, progress checkpoints and final
+result are stored in the "jobs" collection so any worker can report them.
+
+A job that was running when its worker process died stays "running". The
+cascades are safe to re-run: deletes go leaves first and disable/enable are
+idempotent.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import JOB_WORKERS
+from models import JobModel, reconcile_pending_cascades
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+_executor = None
+_executor_lock = threading.Lock()
+_futures = {}
+_reconciler = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+    return _executor
+
+
+class JobService:
+    """Service for submitting and tracking background jobs."""
+
+    @staticmethod
+    def submit(kind, target_type, target_id, user_id, func):
+        """Create a job record and run func(progress) in the background.
+
+        Args:
+            kind: Job kind, e.g. "delete_college_cascade"
+            target_type: Entity type the job acts on
+            target_id: Entity ID the job acts on
+            user_id: User who requested the job
+            func: Callable taking a progress callback; its return value is
+                stored as the job result. Raise (or return a result with
+                success=False) to mark the job failed.
+
+        Returns:
+            str: Job ID
+        """
+        job_id = JobModel().create({
+            "kind": kind,
+            "target_type": target_type,
+            "target_id": target_id,
+            "created_by": user_id,
+            "status": JOB_QUEUED,
+            "progress": {},
+            "result": None,
+            "error": None
+        })
+        future = _get_executor().submit(JobService._run, job_id, func)
+        _futures[job_id] = future
+        future.add_done_callback(lambda _: _futures.pop(job_id, None))
+        return job_id
+
+    @staticmethod
+    def _run(job_id, func):
+        jobs = JobModel()
+        jobs.update(job_id, {"status": JOB_RUNNING, "started_at": datetime.utcnow()})
+
+        def progress(checkpoint):
+            jobs.update(job_id, {"progress": checkpoint, "updated_at": datetime.utcnow()})
+
+        try:
+            result = func(progress)
+            failed = isinstance(result, dict) and result.get("success") is False
+            jobs.update(job_id, {
+                "status": JOB_FAILED if failed else JOB_SUCCEEDED,
+                "result": result,
+                "error": result.get("message", "Job failed") if failed else None,
+                "finished_at": datetime.utcnow()
+            })
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            jobs.update(job_id, {"status": JOB_FAILED, "error": str(e), "finished_at": datetime.utcnow()})
+
+    @staticmethod
+    def get(job_id):
+        """Get a job record (None if unknown)."""
+        return JobModel().get(job_id)
+
+    @staticmethod
+    def wait(job_id, timeout=None):
+        """Block until a job submitted by this process finishes (tests/scripts)."""
+        future = _futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return JobService.get(job_id)
+
+
+def start_cascade_reconciler(interval):
+    """Apply deferred (lazy) cascades every `interval` seconds on a daemon thread.
+
+    Every worker process runs its own reconciler; replaying a cascade twice
+    is harmless because disable/enable are idempotent.
+    """
+    global _reconciler
+    if _reconciler is not None:
+        return _reconciler
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                applied = reconcile_pending_cascades()
+                if applied:
+                    logger.info(f"Reconciled {applied} pending cascades")
+            except Exception as e:
+                logger.error(f"Cascade reconciler failed: {e}", exc_info=True)
+
+    _reconciler = threading.Thread(target=loop, name="cascade-reconciler", daemon=True)
+    _reconciler.start()
+    return _reconciler
@@ -1,54 +1,186 @@
 """Firestore models and database helpers."""
-from firebase_init import get_db
+from concurrent.futures import ThreadPoolExecutor
+from config import CASCADE_AUTH_WORKERS, CASCADE_MODE
+from storage import get_backend
+from hierarchy_cache import hierarchy_cache, enrichment_cache
+import hierarchy_index
+import request_cache
 from datetime import datetime
 import uuid
 
 
 class FirestoreModel:
-    """Base model for Firestore operations."""
+    """Base model for Firestore operations.
+    
+    All reads and writes go through the storage backend selected by
+    STORAGE_BACKEND (Firestore in production, memory/SQLite offline).
+    Single-document reads are memoised per request (see request_cache);
+    models that set shared_cache are also cached across requests.
+    """
+    
+    shared_cache = None  # Process-wide TTLCache for rarely-changing collections
     
     def __init__(self, collection_name):
         self.collection_name = collection_name
-        self.db = get_db()
+        self.backend = get_backend()
     
     def create(self, data):
         """Create document."""
         doc_id = str(uuid.uuid4())
         data["created_at"] = datetime.utcnow()
-        self.db.collection(self.collection_name).document(doc_id).set(data)
+        self.backend.set(self.collection_name, doc_id, data)
+        self.invalidate(doc_id)
+        hierarchy_index.record(self.collection_name, doc_id, data)
         return doc_id
     
+    def create_op(self, data):
+        """Prepare a create as a batch_write operation (for atomic multi-document writes).
+        
+        Returns:
+            tuple: (doc_id, operation)
+        """
+        doc_id = str(uuid.uuid4())
+        data["created_at"] = datetime.utcnow()
+        return doc_id, ("set", self.collection_name, doc_id, data)
+    
     def get(self, doc_id):
         """Get document by ID."""
-        doc = self.db.collection(self.collection_name).document(doc_id).get()
-        if doc.exists:
-            data = doc.to_dict()
-            data['id'] = doc.id  # Add the document ID to the data
-            return data
-        return None
+        found, data = request_cache.lookup(self.collection_name, doc_id)
+        if not found:
+            found, data = self._shared_lookup(doc_id)
+            if not found:
+                data = self.backend.get(self.collection_name, doc_id)
+                if data is not None:
+                    data['id'] = doc_id  # Add the document ID to the data
+                    self._shared_store(doc_id, data)
+            request_cache.remember(self.collection_name, doc_id, data)
+        return data
+    
+    def get_many(self, doc_ids):
+        """Get several documents by ID using batched get_all() round-trips.
+        
+        Args:
+            doc_ids: Iterable of document IDs (duplicates and empty IDs are ignored)
+        
+        Returns:
+            dict: {doc_id: document} for every document that exists
+        """
+        docs = {}
+        missing = []
+        for doc_id in dict.fromkeys(doc_id for doc_id in doc_ids if doc_id):
+            found, data = request_cache.lookup(self.collection_name, doc_id)
+            if not found:
+                found, data = self._shared_lookup(doc_id)
+                if found:
+                    request_cache.remember(self.collection_name, doc_id, data)
+            if not found:
+                missing.append(doc_id)
+            elif data is not None:
+                docs[doc_id] = data
+        
+        fetched = self.backend.get_many(self.collection_name, missing) if missing else {}
+        for doc_id in missing:
+            data = fetched[doc_id] | {"id": doc_id} if doc_id in fetched else None
+            request_cache.remember(self.collection_name, doc_id, data)
+            if data is not None:
+                self._shared_store(doc_id, data)
+                docs[doc_id] = data
+        return docs
     
     def update(self, doc_id, data):
         """Update document."""
-        self.db.collection(self.collection_name).document(doc_id).update(data)
+        self.backend.update(self.collection_name, doc_id, data)
+        self.invalidate(doc_id)
+        hierarchy_index.apply_update(self.collection_name, doc_id, data)
     
     def delete(self, doc_id):
         """Soft delete by setting is_disabled=true."""
-        self.db.collection(self.collection_name).document(doc_id).update({"is_disabled": True})
+        self.backend.update(self.collection_name, doc_id, {"is_disabled": True})
+        self.invalidate(doc_id)
+        hierarchy_index.apply_update(self.collection_name, doc_id, {"is_disabled": True})
     
     def enable(self, doc_id):
         """Enable by setting is_disabled=false."""
-        self.db.collection(self.collection_name).document(doc_id).update({"is_disabled": False})
+        self.backend.update(self.collection_name, doc_id, {"is_disabled": False})
+        self.invalidate(doc_id)
+        hierarchy_index.apply_update(self.collection_name, doc_id, {"is_disabled": False})
+    
+    def invalidate(self, doc_id):
+        """Drop a document from the request and process-wide caches after a write."""
+        request_cache.forget(self.collection_name, doc_id)
+        if self.shared_cache is not None:
+            self.shared_cache.invalidate((self.collection_name, doc_id))
+    
+    def _shared_lookup(self, doc_id):
+        if self.shared_cache is None:
+            return False, None
+        return self.shared_cache.get((self.collection_name, doc_id))
+    
+    def _shared_store(self, doc_id, data):
+        if self.shared_cache is not None:
+            self.shared_cache.set((self.collection_name, doc_id), data)
     
     def query(self, **filters):
         """Query documents by filters."""
-        query = self.db.collection(self.collection_name)
-        for key, value in filters.items():
-            query = query.where(key, "==", value)
-        return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
+        return [data | {"id": doc_id} for doc_id, data in self.backend.query(self.collection_name, filters)]
+
+    def query_in(self, field, values, fields=None, **filters):
+        """Query documents whose field matches any of values (batched "in" queries).
+        
+        fields, if given, limits each document to those fields.
+        """
+        if not values:
+            return []
+        results = self.backend.query_in(self.collection_name, field, values, filters, fields=fields)
+        return [data | {"id": doc_id} for doc_id, data in results]
+
+    def query_page(self, limit=None, start_after=None, fields=None, **filters):
+        """Query one page of documents ordered by document ID.
+        
+        Args:
+            limit: Maximum documents to return (None = all matching documents)
+            start_after: Document ID of the last document of the previous page
+            fields: Only read these fields of each document (None = all)
+            **filters: Equality filters
+        
+        Returns:
+            tuple: (documents, last_id) - last_id is None once the final page is reached
+        """
+        if limit is None and start_after is None and fields is None:
+            return self.query(**filters), None
+        
+        results = self.backend.query(self.collection_name, filters, limit=limit, start_after=start_after, fields=fields)
+        docs = [data | {"id": doc_id} for doc_id, data in results]
+        last_id = docs[-1]["id"] if limit is not None and len(docs) == limit else None
+        return docs, last_id
 
     def hard_delete(self, doc_id):
         """Permanently delete a document from the collection."""
-        self.db.collection(self.collection_name).document(doc_id).delete()
+        self.backend.delete(self.collection_name, doc_id)
+        self.invalidate(doc_id)
+        hierarchy_index.forget(self.collection_name, doc_id)
+    
+    def set_disabled_many(self, doc_ids, disabled):
+        """Set is_disabled on several documents using chunked batch writes."""
+        doc_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+        changes = {"is_disabled": disabled}
+        self.backend.batch_write(("update", self.collection_name, doc_id, changes) for doc_id in doc_ids)
+        for doc_id in doc_ids:
+            self.invalidate(doc_id)
+            hierarchy_index.apply_update(self.collection_name, doc_id, changes)
+    
+    def hard_delete_many(self, doc_ids):
+        """Permanently delete documents using chunked batch writes.
+        
+        Returns:
+            int: Number of delete operations issued
+        """
+        doc_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+        count = self.backend.batch_write(("delete", self.collection_name, doc_id, None) for doc_id in doc_ids)
+        for doc_id in doc_ids:
+            self.invalidate(doc_id)
+            hierarchy_index.forget(self.collection_name, doc_id)
+        return count
     
     def query_disabled(self, **filters):
         """Query documents excluding disabled ones."""
@@ -59,6 +191,8 @@ class FirestoreModel:
 class CollegeModel(FirestoreModel):
     """College model."""
     
+    shared_cache = hierarchy_cache
+    
     def __init__(self):
         super().__init__("colleges")
 
@@ -66,6 +200,8 @@ class CollegeModel(FirestoreModel):
 class DepartmentModel(FirestoreModel):
     """Department model."""
     
+    shared_cache = hierarchy_cache
+    
     def __init__(self):
         super().__init__("departments")
 
@@ -73,6 +209,8 @@ class DepartmentModel(FirestoreModel):
 class BatchModel(FirestoreModel):
     """Batch model."""
     
+    shared_cache = hierarchy_cache
+    
     def __init__(self):
         super().__init__("batches")
 
@@ -89,6 +227,11 @@ class TopicModel(FirestoreModel):
     
     def __init__(self):
         super().__init__("topics")
+    
+    def invalidate(self, doc_id):
+        """Also drop the cached enrichment projection (see performance_service)."""
+        super().invalidate(doc_id)
+        enrichment_cache.invalidate((self.collection_name, doc_id))
 
 
 class QuestionModel(FirestoreModel):
@@ -96,6 +239,11 @@ class QuestionModel(FirestoreModel):
     
     def __init__(self):
         super().__init__("questions")
+    
+    def invalidate(self, doc_id):
+        """Also drop the cached enrichment projection (see performance_service)."""
+        super().invalidate(doc_id)
+        enrichment_cache.invalidate((self.collection_name, doc_id))
 
 
 class NoteModel(FirestoreModel):
@@ -112,6 +260,41 @@ class PerformanceModel(FirestoreModel):
         super().__init__("performance")
 
 
+class StudentStatsModel(FirestoreModel):
+    """Per-student performance aggregates (document ID = student ID)."""
+    
+    def __init__(self):
+        super().__init__("student_stats")
+
+
+class StudentProgressModel(FirestoreModel):
+    """Per-student, per-question progress (document ID = student ID)."""
+    
+    def __init__(self):
+        super().__init__("student_progress")
+
+
+class ScopeVersionModel(FirestoreModel):
+    """Version counters per (collection, batch) scope (see scope_versions)."""
+    
+    def __init__(self):
+        super().__init__("scope_versions")
+
+
+class VerdictModel(FirestoreModel):
+    """Stored submission verdicts (document ID = code fingerprint, see verdict_cache)."""
+    
+    def __init__(self):
+        super().__init__("verdicts")
+
+
+class RollupModel(FirestoreModel):
+    """Daily submission rollup buckets (see rollup_service)."""
+    
+    def __init__(self):
+        super().__init__("daily_rollups")
+
+
 class AuditLogModel(FirestoreModel):
     """Audit log model."""
     
@@ -119,232 +302,184 @@ class AuditLogModel(FirestoreModel):
         super().__init__("audit_logs")
 
 
+class JobModel(FirestoreModel):
+    """Background job model."""
+    
+    def __init__(self):
+        super().__init__("jobs")
+
+
 # Utility functions for role-based access validation
+# (answered from the in-process closure index, see hierarchy_index)
 
 def is_college_disabled(college_id):
     """Check if college is disabled."""
-    college = CollegeModel().get(college_id)
-    return college and college.get("is_disabled", False)
+    return hierarchy_index.is_disabled("colleges", college_id)
 
 
 def is_department_disabled(department_id):
     """Check if department is disabled."""
-    dept = DepartmentModel().get(department_id)
-    return dept and dept.get("is_disabled", False)
+    return hierarchy_index.is_disabled("departments", department_id)
 
 
 def is_batch_disabled(batch_id):
     """Check if batch is disabled."""
-    batch = BatchModel().get(batch_id)
-    return batch and batch.get("is_disabled", False)
+    return hierarchy_index.is_disabled("batches", batch_id)
 
 
 def is_student_disabled(student_id):
     """Check if student is disabled."""
-    student = StudentModel().get(student_id)
-    return student and student.get("is_disabled", False)
+    return hierarchy_index.is_disabled("students", student_id)
 
 
 def can_student_access(student_id):
     """Check if student can access platform (not disabled at any level)."""
-    student = StudentModel().get(student_id)
-    if not student or student.get("is_disabled", False):
-        return False
-    
-    batch_id = student.get("batch_id")
-    if is_batch_disabled(batch_id):
-        return False
-    
-    batch = BatchModel().get(batch_id)
-    dept_id = batch.get("department_id")
-    if is_department_disabled(dept_id):
+    return hierarchy_index.is_accessible("students", student_id)
+
+
+# Cascading disable/enable functions
+#
+# Cascades walk the hierarchy one level at a time: all children of a level are
+# fetched with batched "in" queries, each level is written with chunked batch
+# writes, and the Firebase Auth calls run concurrently on a bounded pool. The
+# number of round-trips grows with hierarchy depth, not with entity count.
+#
+# With CASCADE_MODE=lazy only the target node is written (plus its own Auth
+# user) and marked pending_cascade; descendants inherit the status through
+# hierarchy_index at auth time until reconcile_pending_cascades() replays the
+# eager cascade for them.
+
+# (model, field on the child pointing at the parent level)
+CASCADE_LEVELS = [
+    (CollegeModel, None),
+    (DepartmentModel, "college_id"),
+    (BatchModel, "department_id"),
+    (StudentModel, "batch_id"),
+]
+
+
+def _sync_auth_disabled(uids, disabled):
+    """Enable/disable Firebase Auth users concurrently."""
+    from auth import disable_user_firebase, enable_user_firebase
+    
+    uids = [uid for uid in dict.fromkeys(uids) if uid]
+    if not uids:
+        return
+    action = disable_user_firebase if disabled else enable_user_firebase
+    with ThreadPoolExecutor(max_workers=min(CASCADE_AUTH_WORKERS, len(uids))) as pool:
+        list(pool.map(action, uids))
+
+
+def _cascade_set_disabled(model_class, doc_id, disabled, progress=None):
+    """Set is_disabled on an entity and every descendant, level by level.
+    
+    Disabling only touches descendants that are still enabled; enabling
+    re-enables every descendant. `progress`, if given, is called with the
+    per-collection counts after each level is written.
+    """
+    root = model_class().get(doc_id)
+    if not root:
         return False
     
-    dept = DepartmentModel().get(dept_id)
-    college_id = dept.get("college_id")
-    if is_college_disabled(college_id):
+    depth = [model for model, _ in CASCADE_LEVELS].index(model_class)
+    level = [root]
+    model_class().set_disabled_many([doc_id], disabled)
+    uids = [root.get("firebase_uid")]
+    updated = {model_class().collection_name: 1}
+    if progress:
+        progress({"updated": dict(updated)})
+    
+    child_filters = {"is_disabled": False} if disabled else {}
+    for child_class, parent_field in CASCADE_LEVELS[depth + 1:]:
+        level = child_class().query_in(parent_field, [doc["id"] for doc in level], **child_filters)
+        if not level:
+            break
+        child_class().set_disabled_many([doc["id"] for doc in level], disabled)
+        uids.extend(doc.get("firebase_uid") for doc in level)
+        updated[child_class().collection_name] = len(level)
+        if progress:
+            progress({"updated": dict(updated)})
+    
+    _sync_auth_disabled(uids, disabled)
+    if progress:
+        progress({"updated": dict(updated), "auth_synced": True})
+    return True
+
+
+def _flag_only_set_disabled(model_class, doc_id, disabled, progress=None):
+    """Flip is_disabled on the target only and leave descendants to the reconciler."""
+    root = model_class().get(doc_id)
+    if not root:
         return False
     
+    model_class().update(doc_id, {
+        "is_disabled": disabled,
+        "pending_cascade": "disable" if disabled else "enable",
+        "pending_since": datetime.utcnow()
+    })
+    _sync_auth_disabled([root.get("firebase_uid")], disabled)
+    if progress:
+        progress({"updated": {model_class().collection_name: 1}, "deferred": True})
     return True
 
 
-# Cascading disable/enable functions
+def _set_disabled(model_class, doc_id, disabled, progress=None):
+    if CASCADE_MODE == "lazy":
+        return _flag_only_set_disabled(model_class, doc_id, disabled, progress)
+    return _cascade_set_disabled(model_class, doc_id, disabled, progress)
 
-def disable_college_cascade(college_id):
-    """Disable a college and all its departments, batches, and students."""
-    from auth import disable_user_firebase
-    
-    # Disable the college
-    college = CollegeModel().get(college_id)
-    if not college:
-        return False
+
+def reconcile_pending_cascades():
+    """Apply deferred (lazy) cascades to descendants, oldest first.
     
-    CollegeModel().delete(college_id)
-    if college.get("firebase_uid"):
-        disable_user_firebase(college.get("firebase_uid"))
+    Replays the eager cascade for every node marked pending_cascade, so the
+    stored flags and Firebase Auth end up as if CASCADE_MODE had been eager.
     
-    # Disable all departments in this college
-    depts = DepartmentModel().query(college_id=college_id, is_disabled=False)
-    for dept in depts:
-        DepartmentModel().delete(dept["id"])
-        if dept.get("firebase_uid"):
-            disable_user_firebase(dept.get("firebase_uid"))
-        
-        # Disable all batches in this department
-        batches = BatchModel().query(department_id=dept["id"], is_disabled=False)
-        for batch in batches:
-            BatchModel().delete(batch["id"])
-            if batch.get("firebase_uid"):
-                disable_user_firebase(batch.get("firebase_uid"))
-            
-            # Disable all students in this batch
-            students = StudentModel().query(batch_id=batch["id"], is_disabled=False)
-            for student in students:
-                StudentModel().delete(student["id"])
-                if student.get("firebase_uid"):
-                    disable_user_firebase(student.get("firebase_uid"))
+    Returns:
+        int: Number of pending cascades applied
+    """
+    pending = []
+    for model_class, _ in CASCADE_LEVELS:
+        for action in ("disable", "enable"):
+            for doc in model_class().query(pending_cascade=action):
+                since = doc.get("pending_since")
+                pending.append((since.timestamp() if since else 0, model_class, doc["id"], action))
     
-    return True
+    pending.sort(key=lambda item: item[0])
+    for _, model_class, doc_id, action in pending:
+        _cascade_set_disabled(model_class, doc_id, action == "disable")
+        # Leave the marker if the node was flipped again while we were working
+        current = model_class().get(doc_id)
+        if current and current.get("pending_cascade") == action:
+            model_class().update(doc_id, {"pending_cascade": None, "pending_since": None})
+    return len(pending)
+
+
+def disable_college_cascade(college_id, progress=None):
+    """Disable a college and all its departments, batches, and students."""
+    return _set_disabled(CollegeModel, college_id, True, progress)
 
 
-def disable_department_cascade(department_id):
+def disable_department_cascade(department_id, progress=None):
     """Disable a department and all its batches and students."""
-    from auth import disable_user_firebase
-    
-    # Disable the department
-    dept = DepartmentModel().get(department_id)
-    if not dept:
-        return False
-    
-    DepartmentModel().delete(department_id)
-    if dept.get("firebase_uid"):
-        disable_user_firebase(dept.get("firebase_uid"))
-    
-    # Disable all batches in this department
-    batches = BatchModel().query(department_id=department_id, is_disabled=False)
-    for batch in batches:
-        BatchModel().delete(batch["id"])
-        if batch.get("firebase_uid"):
-            disable_user_firebase(batch.get("firebase_uid"))
-        
-        # Disable all students in this batch
-        students = StudentModel().query(batch_id=batch["id"], is_disabled=False)
-        for student in students:
-            StudentModel().delete(student["id"])
-            if student.get("firebase_uid"):
-                disable_user_firebase(student.get("firebase_uid"))
-    
-    return True
+    return _set_disabled(DepartmentModel, department_id, True, progress)
 
 
-def disable_batch_cascade(batch_id):
+def disable_batch_cascade(batch_id, progress=None):
     """Disable a batch and all its students."""
-    from auth import disable_user_firebase
-    
-    # Disable the batch
-    batch = BatchModel().get(batch_id)
-    if not batch:
-        return False
-    
-    BatchModel().delete(batch_id)
-    if batch.get("firebase_uid"):
-        disable_user_firebase(batch.get("firebase_uid"))
-    
-    # Disable all students in this batch
-    students = StudentModel().query(batch_id=batch_id, is_disabled=False)
-    for student in students:
-        StudentModel().delete(student["id"])
-        if student.get("firebase_uid"):
-            disable_user_firebase(student.get("firebase_uid"))
-    
-    return True
+    return _set_disabled(BatchModel, batch_id, True, progress)
 
 
-def enable_college_cascade(college_id):
+def enable_college_cascade(college_id, progress=None):
     """Enable a college and all its departments, batches, and students."""
-    from auth import enable_user_firebase
-    
-    # Enable the college
-    college = CollegeModel().get(college_id)
-    if not college:
-        return False
-    
-    CollegeModel().enable(college_id)
-    if college.get("firebase_uid"):
-        enable_user_firebase(college.get("firebase_uid"))
-    
-    # Enable all departments in this college
-    depts = DepartmentModel().query(college_id=college_id)
-    for dept in depts:
-        DepartmentModel().enable(dept["id"])
-        if dept.get("firebase_uid"):
-            enable_user_firebase(dept.get("firebase_uid"))
-        
-        # Enable all batches in this department
-        batches = BatchModel().query(department_id=dept["id"])
-        for batch in batches:
-            BatchModel().enable(batch["id"])
-            if batch.get("firebase_uid"):
-                enable_user_firebase(batch.get("firebase_uid"))
-            
-            # Enable all students in this batch
-            students = StudentModel().query(batch_id=batch["id"])
-            for student in students:
-                StudentModel().enable(student["id"])
-                if student.get("firebase_uid"):
-                    enable_user_firebase(student.get("firebase_uid"))
-    
-    return True
+    return _set_disabled(CollegeModel, college_id, False, progress)
 
 
-def enable_department_cascade(department_id):
+def enable_department_cascade(department_id, progress=None):
     """Enable a department and all its batches and students."""
-    from auth import enable_user_firebase
-    
-    # Enable the department
-    dept = DepartmentModel().get(department_id)
-    if not dept:
-        return False
-    
-    DepartmentModel().enable(department_id)
-    if dept.get("firebase_uid"):
-        enable_user_firebase(dept.get("firebase_uid"))
-    
-    # Enable all batches in this department
-    batches = BatchModel().query(department_id=department_id)
-    for batch in batches:
-        BatchModel().enable(batch["id"])
-        if batch.get("firebase_uid"):
-            enable_user_firebase(batch.get("firebase_uid"))
-        
-        # Enable all students in this batch
-        students = StudentModel().query(batch_id=batch["id"])
-        for student in students:
-            StudentModel().enable(student["id"])
-            if student.get("firebase_uid"):
-                enable_user_firebase(student.get("firebase_uid"))
-    
-    return True
+    return _set_disabled(DepartmentModel, department_id, False, progress)
 
 
-def enable_batch_cascade(batch_id):
+def enable_batch_cascade(batch_id, progress=None):
     """Enable a batch and all its students."""
-    from auth import enable_user_firebase
-    
-    # Enable the batch
-    batch = BatchModel().get(batch_id)
-    if not batch:
-        return False
-    
-    BatchModel().enable(batch_id)
-    if batch.get("firebase_uid"):
-        enable_user_firebase(batch.get("firebase_uid"))
-    
-    # Enable all students in this batch
-    students = StudentModel().query(batch_id=batch_id)
-    for student in students:
-        StudentModel().enable(student["id"])
-        if student.get("firebase_uid"):
-            enable_user_firebase(student.get("firebase_uid"))
-    
-    return True
+    return _set_disabled(BatchModel, batch_id, False, progress)
@@ -4,7 +4,8 @@ Handles role-aware notes creation, retrieval, and management
 """
 
 from models import NoteModel, BatchModel, DepartmentModel, CollegeModel
-from utils import error_response, success_response, audit_log
+import scope_versions
+from utils import error_response, success_response, audit_log, paginated_query, InvalidPaginationError
 from flask import jsonify
 
 
@@ -145,6 +146,7 @@ class NoteService:
             }
             
             note_id = NoteModel().create(note_data)
+            scope_versions.bump("notes", batch_id)
             
             # Audit log
             audit_log(user_uid, "create_note", "note", note_id, {"title": data.get("title")})
@@ -165,8 +167,10 @@ class NoteService:
             tuple: (response, status_code)
         """
         try:
-            notes = NoteModel().query(batch_id=batch_id, is_disabled=False)
-            return success_response({"notes": notes if notes else []})
+            notes, next_cursor = paginated_query(NoteModel(), batch_id=batch_id, is_disabled=False)
+            return success_response({"notes": notes if notes else [], "next_cursor": next_cursor})
+        except InvalidPaginationError:
+            raise
         except Exception as e:
             return error_response("QUERY_ERROR", str(e))
     
@@ -238,6 +242,7 @@ class NoteService:
                 return error_response("INVALID_INPUT", "Nothing to update", status_code=400)
             
             NoteModel().update(note_id, update_data)
+            scope_versions.bump("notes", note.get("batch_id"))
             
             # Audit log
             audit_log(request_user.get("uid"), "update_note", "note", note_id, update_data)
@@ -270,6 +275,7 @@ class NoteService:
         
         try:
             NoteModel().delete(note_id)
+            scope_versions.bump("notes", note.get("batch_id"))
             
             # Audit log
             audit_log(request_user.get("uid"), "delete_note", "note", note_id, {})
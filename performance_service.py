@@ -0,0 +1,271 @@
+"""Question and topic details on performance records.
+
+New performance records carry denormalized question_title, topic_id,
+topic_name and difficulty fields (see PerformanceService.question_fields),
+so listings need no joins. Renames are fanned out to existing records with
+batched updates (propagate) in a background job, and backfill() fills records
+written before the fields existed.
+
+enrich() covers records still missing the fields. It keeps small projections
+of questions and topics in the process-wide enrichment_cache and reads the
+misses with one batched get_many() per collection. QuestionModel/TopicModel
+writes drop the affected entries.
+"""
+import logging
+from datetime import datetime
+
+from hierarchy_cache import enrichment_cache
+from job_service import JobService
+from models import QuestionModel, TopicModel, PerformanceModel, JobModel
+from storage import BATCH_WRITE_LIMIT, get_backend
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_QUESTION = "Unknown Question"
+UNKNOWN_TOPIC = "Unknown Topic"
+DEFAULT_DIFFICULTY = "Medium"
+
+DENORMALIZED_FIELDS = ("question_title", "topic_id", "topic_name", "difficulty")
+BACKFILL_CHECKPOINT_ID = "backfill_performance_fields"
+
+
+def _question_projection(question):
+    return {
+        "title": question.get("title") or question.get("heading") or UNKNOWN_QUESTION,
+        "difficulty": question.get("difficulty") or DEFAULT_DIFFICULTY,
+        "topic_id": question.get("topic_id"),
+    }
+
+
+def _topic_projection(topic):
+    # topic_name is what create/update write; name only exists on older topics
+    return topic.get("topic_name") or topic.get("name") or UNKNOWN_TOPIC
+
+
+def _denormalized(info, topic_name):
+    if not info:
+        return {"question_title": UNKNOWN_QUESTION, "topic_id": None,
+                "topic_name": UNKNOWN_TOPIC, "difficulty": DEFAULT_DIFFICULTY}
+    return {
+        "question_title": info["title"],
+        "topic_id": info["topic_id"],
+        "topic_name": topic_name or UNKNOWN_TOPIC,
+        "difficulty": info["difficulty"],
+    }
+
+
+def _cached_lookup(model, doc_ids, project):
+    """Resolve projections for doc_ids, reading only cache misses (missing docs map to None)."""
+    resolved = {}
+    missing = []
+    for doc_id in dict.fromkeys(doc_id for doc_id in doc_ids if doc_id):
+        found, value = enrichment_cache.get((model.collection_name, doc_id))
+        if found:
+            resolved[doc_id] = value
+        else:
+            missing.append(doc_id)
+
+    if missing:
+        docs = model.get_many(missing)
+        for doc_id in missing:
+            doc = docs.get(doc_id)
+            value = project(doc) if doc else None
+            # Unknown IDs are not cached: the document may still be created
+            if value is not None:
+                enrichment_cache.set((model.collection_name, doc_id), value)
+            resolved[doc_id] = value
+    return resolved
+
+
+class PerformanceService:
+    """Service for enriching performance records."""
+
+    @staticmethod
+    def question_info(question_ids):
+        """Get {question_id: {"title", "difficulty", "topic_id"} or None}."""
+        return _cached_lookup(QuestionModel(), question_ids, _question_projection)
+
+    @staticmethod
+    def topic_names(topic_ids):
+        """Get {topic_id: name or None}."""
+        return _cached_lookup(TopicModel(), topic_ids, _topic_projection)
+
+    @staticmethod
+    def question_fields(question_id, question=None):
+        """Denormalized question/topic fields to store on a performance record.
+
+        Args:
+            question_id: Question ID
+            question: The question document, if already loaded
+
+        Returns:
+            dict: question_title, topic_id, topic_name, difficulty
+        """
+        if question is not None:
+            info = _question_projection(question)
+        else:
+            info = PerformanceService.question_info([question_id]).get(question_id)
+        topic_id = info["topic_id"] if info else None
+        return _denormalized(info, PerformanceService.topic_names([topic_id]).get(topic_id) if topic_id else None)
+
+    @staticmethod
+    def enrich(records):
+        """Add question_title, question_difficulty, topic_id and topic_name in place.
+
+        Records that already carry the denormalized fields are served as-is;
+        only older records are looked up.
+
+        Args:
+            records: Performance records (dicts with question_id)
+
+        Returns:
+            list: The same records
+        """
+        pending = []
+        for record in records:
+            if record.get("question_title"):
+                record["question_difficulty"] = record.get("difficulty") or DEFAULT_DIFFICULTY
+                record.setdefault("topic_name", UNKNOWN_TOPIC)
+            else:
+                pending.append(record)
+        if not pending:
+            return records
+
+        questions = PerformanceService.question_info(r.get("question_id") for r in pending)
+        topics = PerformanceService.topic_names(q["topic_id"] for q in questions.values() if q)
+
+        for record in pending:
+            question = questions.get(record.get("question_id"))
+            if question:
+                record["question_title"] = question["title"]
+                record["question_difficulty"] = question["difficulty"]
+                record["topic_id"] = question["topic_id"]
+                record["topic_name"] = topics.get(question["topic_id"]) or UNKNOWN_TOPIC
+            else:
+                record["question_title"] = UNKNOWN_QUESTION
+                record["question_difficulty"] = DEFAULT_DIFFICULTY
+                record["topic_name"] = UNKNOWN_TOPIC
+        return records
+
+    @staticmethod
+    def propagate(field, value, changes, progress=None):
+        """Apply changes to every performance record where field == value.
+
+        Reads a page of IDs at a time and writes each page with one chunked
+        batch write, so a rename touching many submissions stays bounded in
+        memory.
+
+        Args:
+            field: "question_id" or "topic_id"
+            value: The renamed question/topic ID
+            changes: Fields to set, e.g. {"question_title": "..."}
+            progress: Optional callable({"updated": n}) after each page
+
+        Returns:
+            int: Number of records updated
+        """
+        model = PerformanceModel()
+        updated = 0
+        last_id = None
+        while True:
+            page, last_id = model.query_page(limit=BATCH_WRITE_LIMIT, start_after=last_id, **{field: value})
+            ids = [record["id"] for record in page]
+            if ids:
+                updated += get_backend().batch_write(("update", model.collection_name, doc_id, changes) for doc_id in ids)
+                for doc_id in ids:
+                    model.invalidate(doc_id)
+                if progress:
+                    progress({"updated": updated})
+            if last_id is None:
+                break
+
+        if updated:
+            logger.info(f"Propagated {sorted(changes)} to {updated} performance records ({field}={value})")
+        return updated
+
+    @staticmethod
+    def propagate_question(question_id, user_id):
+        """Copy a question's current title/difficulty onto its performance records in a background job.
+
+        The job reads the question when it runs, so of several quick edits
+        the last one wins regardless of which job finishes first.
+
+        Returns:
+            str: Job ID
+        """
+        def run(progress):
+            fields = PerformanceService.question_fields(question_id)
+            changes = {"question_title": fields["question_title"], "difficulty": fields["difficulty"]}
+            return {"updated": PerformanceService.propagate("question_id", question_id, changes, progress)}
+
+        return JobService.submit("propagate_question_fields", "question", question_id, user_id, run)
+
+    @staticmethod
+    def propagate_topic(topic_id, user_id):
+        """Copy a topic's current name onto its performance records in a background job.
+
+        Returns:
+            str: Job ID
+        """
+        def run(progress):
+            changes = {"topic_name": PerformanceService.topic_names([topic_id]).get(topic_id) or UNKNOWN_TOPIC}
+            return {"updated": PerformanceService.propagate("topic_id", topic_id, changes, progress)}
+
+        return JobService.submit("propagate_topic_name", "topic", topic_id, user_id, run)
+
+    @staticmethod
+    def backfill(start_after=None, page_size=BATCH_WRITE_LIMIT, force=False, progress=None):
+        """Write the denormalized fields onto existing performance records.
+
+        Resumable: the cursor is checkpointed in jobs/backfill_performance_fields
+        after every page, and a run without start_after continues from the
+        checkpoint of an unfinished run.
+
+        Args:
+            start_after: Performance ID to resume after (overrides the checkpoint)
+            page_size: Records read per page
+            force: Rewrite records that already have the fields
+            progress: Optional callable(checkpoint dict) after each page
+
+        Returns:
+            dict: scanned, updated and the final cursor (None when complete)
+        """
+        backend = get_backend()
+        jobs = JobModel().collection_name
+        checkpoint = backend.get(jobs, BACKFILL_CHECKPOINT_ID) or {}
+        if start_after is None and checkpoint.get("status") == "running":
+            start_after = checkpoint.get("cursor")
+
+        model = PerformanceModel()
+        scanned = updated = 0
+        cursor = start_after
+        while True:
+            page, last_id = model.query_page(limit=page_size, start_after=cursor)
+            stale = [r for r in page if force or any(f not in r for f in DENORMALIZED_FIELDS)]
+            if stale:
+                questions = PerformanceService.question_info(r.get("question_id") for r in stale)
+                topics = PerformanceService.topic_names(q["topic_id"] for q in questions.values() if q)
+                operations = []
+                for record in stale:
+                    info = questions.get(record.get("question_id"))
+                    fields = _denormalized(info, topics.get(info["topic_id"]) if info else None)
+                    operations.append(("update", model.collection_name, record["id"], fields))
+                updated += backend.batch_write(operations)
+                for record in stale:
+                    model.invalidate(record["id"])
+
+            scanned += len(page)
+            cursor = last_id
+            state = {
+                "kind": BACKFILL_CHECKPOINT_ID,
+                "status": "running" if cursor else "succeeded",
+                "cursor": cursor,
+                "scanned": scanned,
+                "updated": updated,
+                "updated_at": datetime.utcnow(),
+            }
+            backend.set(jobs, BACKFILL_CHECKPOINT_ID, state, merge=True)
+            if progress:
+                progress(state)
+            if cursor is None:
+                return {"scanned": scanned, "updated": updated, "cursor": None}
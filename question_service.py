@@ -4,6 +4,8 @@ Handles role-aware question creation, retrieval, and management
 """
 
 from models import QuestionModel, TopicModel, BatchModel, DepartmentModel, CollegeModel
+from performance_service import PerformanceService
+import scope_versions
 from agent_wrappers import generate_hidden_testcases
 from utils import error_response, success_response, audit_log
 from flask import jsonify
@@ -284,6 +286,7 @@ class QuestionService:
             
             # Save to database
             question_id = QuestionModel().create(question_data)
+            scope_versions.bump("questions", batch_id)
             
             # Log audit
             audit_log(
@@ -374,6 +377,7 @@ class QuestionService:
         
         try:
             QuestionModel().delete(question_id)
+            scope_versions.bump("questions", question.get("batch_id"))
             audit_log(user_id, "delete_question", "question", question_id, {"title": question.get("title")})
             return success_response(None, "Question deleted successfully")
         except Exception as e:
@@ -441,13 +445,19 @@ class QuestionService:
                 update_data["hidden_testcases"] = data.get("hidden_testcases")
             
             QuestionModel().update(question_id, update_data)
+            scope_versions.bump("questions", question.get("batch_id"))
+            
+            # Keep the denormalized copies on performance records in sync (background job)
+            job_id = None
+            if "title" in update_data or "difficulty" in update_data:
+                job_id = PerformanceService.propagate_question(question_id, request_user.get("uid"))
             
             audit_log(
                 request_user.get("uid"), "update_question", "question", question_id,
                 {"title": update_data.get("title", question.get("title"))}
             )
             
-            return success_response(None, "Question updated successfully")
+            return success_response({"job_id": job_id} if job_id else None, "Question updated successfully")
         
         except Exception as e:
             return error_response("UPDATE_ERROR", f"Failed to update question: {str(e)}", status_code=500)
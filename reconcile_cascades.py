@@ -0,0 +1,24 @@
+"""
+Apply pending lazy cascades once.
+
+Usage:
+    python reconcile_cascades.py
+
+With CASCADE_MODE=lazy, disabling or enabling a college, department or batch
+only writes that node and marks it pending_cascade; each worker's background
+reconciler (CASCADE_RECONCILE_INTERVAL) later pushes the status down to the
+descendants. This script drains every pending cascade now, oldest first, e.g.
+from cron when the background reconciler is turned off or after switching
+CASCADE_MODE back to eager. Safe to re-run: disable/enable are idempotent.
+"""
+
+from models import reconcile_pending_cascades
+
+
+def main():
+    applied = reconcile_pending_cascades()
+    print(f"✅ Applied {applied} pending cascades")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Request-scoped identity map for FirestoreModel reads.
+
+Within one Flask request, repeated get(collection, id) calls are served from
+memory instead of re-reading the document. Writes made through the model
+layer evict the affected entries so a request always sees its own updates.
+Outside a request context (scripts, background threads) nothing is cached.
+"""
+import copy
+from flask import g, has_request_context
+
+_MISSING = object()
+
+
+def _state():
+    """Get (or lazily create) the identity map for the current request."""
+    if not has_request_context():
+        return None
+    state = g.get("_identity_map")
+    if state is None:
+        state = {
+            "docs": {},
+            "stats": {"hits": 0, "misses": 0, "invalidations": 0}
+        }
+        g._identity_map = state
+    return state
+
+
+def lookup(collection, doc_id):
+    """Look up a document read earlier in this request.
+
+    Returns:
+        (bool, dict or None): (found, document copy). A cached None means the
+        document was read before and did not exist.
+    """
+    state = _state()
+    if state is None:
+        return False, None
+
+    key = (collection, doc_id)
+    if key not in state["docs"]:
+        state["stats"]["misses"] += 1
+        return False, None
+
+    state["stats"]["hits"] += 1
+    return True, copy.deepcopy(state["docs"][key])
+
+
+def remember(collection, doc_id, doc):
+    """Store a document (or None for a missing one) for the rest of the request."""
+    state = _state()
+    if state is not None:
+        state["docs"][(collection, doc_id)] = copy.deepcopy(doc)
+
+
+def forget(collection, doc_id):
+    """Evict a document after it was written or deleted in this request."""
+    state = _state()
+    if state is not None and state["docs"].pop((collection, doc_id), _MISSING) is not _MISSING:
+        state["stats"]["invalidations"] += 1
+
+
+def get_read_stats():
+    """Get identity map counters for the current request (None outside a request)."""
+    state = g.get("_identity_map") if has_request_context() else None
+    if state is None:
+        return None
+    return dict(state["stats"], cached=len(state["docs"]))
+
+
+def format_read_stats():
+    """Format the counters for the X-Read-Stats debug header."""
+    stats = get_read_stats()
+    if not stats:
+        return None
+    return "; ".join(f"{key}={value}" for key, value in stats.items())
+
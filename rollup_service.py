@@ -0,0 +1,240 @@
+"""Daily submission rollups per batch, department and college.
+
+Every submission increments three bucket documents (one per scope) right
+after the performance record is stored:
+
+daily_rollups/{scope}_{scope_id}_{YYYY-MM-DD}[_{shard}]:
+    scope, scope_id, date, submissions,
+    by_status: {correct, incorrect, execution_error},
+    by_language: {language: count}
+
+A college's bucket for today is written by every submission in the college,
+more than Firestore's sustained ~1 write/s per document allows. Each day is
+therefore split across ROLLUP_SHARDS documents (shard 0 has no suffix), a
+submission increments one at random, and readers sum the shards. The
+increments are best-effort and not part of the submission's batch: a failed
+rollup write is logged and never fails the submit; rebuild() repairs the
+counts from the performance records.
+
+Bucket IDs are deterministic, so a date range is read with one batched
+get_many() of days x shards documents instead of scanning every submission.
+Dates are UTC.
+"""
+import logging
+import random
+from datetime import datetime, timedelta
+
+from config import ROLLUP_SHARDS
+from storage import BATCH_WRITE_LIMIT, Increment, get_backend
+from models import RollupModel, PerformanceModel
+from utils import error_response, success_response
+
+logger = logging.getLogger(__name__)
+
+SCOPES = {
+    "batch": "batch_id",
+    "department": "department_id",
+    "college": "college_id",
+}
+STATUSES = ("correct", "incorrect", "execution_error")
+
+# Performance fields a bucket is computed from
+RECORD_FIELDS = ("submitted_at", "status", "submission_language") + tuple(SCOPES.values())
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+def bucket_id(scope, scope_id, day):
+    """Document ID of the bucket for a scope and date (date or YYYY-MM-DD)."""
+    return f"{scope}_{scope_id}_{day if isinstance(day, str) else day.isoformat()}"
+
+
+def shard_ids(scope, scope_id, day):
+    """Document IDs of every shard of a bucket (shard 0 first)."""
+    base = bucket_id(scope, scope_id, day)
+    return [base] + [f"{base}_{shard}" for shard in range(1, ROLLUP_SHARDS)]
+
+
+def _day_of(perf_data):
+    submitted_at = perf_data.get("submitted_at") or datetime.utcnow()
+    return submitted_at.date() if isinstance(submitted_at, datetime) else datetime.utcnow().date()
+
+
+def _language_key(perf_data):
+    return str(perf_data.get("submission_language") or "unknown").strip().lower() or "unknown"
+
+
+def rollup_ops(perf_data):
+    """Build the bucket merge operations for one submission (one random shard per scope)."""
+    day = _day_of(perf_data)
+    status = perf_data.get("status")
+    shard = random.randrange(ROLLUP_SHARDS)
+    operations = []
+    for scope, field in SCOPES.items():
+        scope_id = perf_data.get(field)
+        if not scope_id:
+            continue
+        update = {
+            "scope": scope,
+            "scope_id": scope_id,
+            "date": day.isoformat(),
+            "submissions": Increment(1),
+            "by_language": {_language_key(perf_data): Increment(1)},
+        }
+        if status in STATUSES:
+            update["by_status"] = {status: Increment(1)}
+        operations.append(("merge", RollupModel().collection_name, shard_ids(scope, scope_id, day)[shard], update))
+    return operations
+
+
+def record(perf_data):
+    """Increment the rollups for one stored submission (best-effort).
+
+    Returns:
+        bool: False if the write failed (the counts are then short until rebuild())
+    """
+    try:
+        get_backend().batch_write(rollup_ops(perf_data))
+        return True
+    except Exception as e:
+        logger.warning(f"Daily rollup update failed (run the daily-rollups backfill to repair): {e}")
+        return False
+
+
+def _combine(shards):
+    """Sum the shard documents of one bucket."""
+    total = {"submissions": 0, "by_status": {}, "by_language": {}}
+    for shard in shards:
+        total["submissions"] += shard.get("submissions", 0)
+        for field in ("by_status", "by_language"):
+            for key, count in (shard.get(field) or {}).items():
+                total[field][key] = total[field].get(key, 0) + count
+    return total
+
+
+def _count_record(buckets, record):
+    """Count one performance record into the in-memory buckets."""
+    day = _day_of(record)
+    status = record.get("status")
+    language = _language_key(record)
+    for scope, field in SCOPES.items():
+        scope_id = record.get(field)
+        if not scope_id:
+            continue
+        bucket = buckets.setdefault(bucket_id(scope, scope_id, day), {
+            "scope": scope,
+            "scope_id": scope_id,
+            "date": day.isoformat(),
+            "submissions": 0,
+            "by_status": {},
+            "by_language": {},
+        })
+        bucket["submissions"] += 1
+        if status in STATUSES:
+            bucket["by_status"][status] = bucket["by_status"].get(status, 0) + 1
+        bucket["by_language"][language] = bucket["by_language"].get(language, 0) + 1
+
+
+def parse_date_range(args):
+    """Read ?from=YYYY-MM-DD&to=YYYY-MM-DD (default: the last 30 days).
+
+    Raises:
+        ValueError: On malformed dates or ranges that are empty or too long
+    """
+    try:
+        end = datetime.strptime(args["to"], "%Y-%m-%d").date() if args.get("to") else datetime.utcnow().date()
+        start = (
+            datetime.strptime(args["from"], "%Y-%m-%d").date() if args.get("from")
+            else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        )
+    except ValueError:
+        raise ValueError("from/to must be dates in YYYY-MM-DD format")
+
+    if start > end:
+        raise ValueError("from must not be after to")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+class RollupService:
+    """Service for reading and rebuilding daily rollups."""
+
+    @staticmethod
+    def get_range(scope, scope_id, start, end):
+        """Get one entry per day in [start, end], zero-filled where no bucket exists."""
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        docs = RollupModel().get_many(doc_id for day in days for doc_id in shard_ids(scope, scope_id, day))
+
+        series = []
+        for day in days:
+            bucket = _combine(docs[doc_id] for doc_id in shard_ids(scope, scope_id, day) if doc_id in docs)
+            by_status = bucket["by_status"]
+            submissions = bucket["submissions"]
+            series.append({
+                "date": day.isoformat(),
+                "submissions": submissions,
+                **{status: by_status.get(status, 0) for status in STATUSES},
+                "solve_rate": round(by_status.get("correct", 0) / submissions, 4) if submissions else 0.0,
+                "by_language": bucket["by_language"],
+            })
+        return series
+
+    @staticmethod
+    def trends_response(scope, scope_id, args):
+        """Build the API response for a trends endpoint.
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        if not scope_id:
+            return error_response("INVALID_INPUT", f"{SCOPES[scope]} is required", status_code=400)
+        try:
+            start, end = parse_date_range(args)
+        except ValueError as e:
+            return error_response("INVALID_INPUT", str(e), status_code=400)
+
+        return success_response({
+            "scope": scope,
+            "scope_id": scope_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "days": RollupService.get_range(scope, scope_id, start, end)
+        })
+
+    @staticmethod
+    def rebuild(page_size=BATCH_WRITE_LIMIT):
+        """Recompute every bucket from the raw performance collection (backfill).
+
+        Records are read a page at a time and only the fields in
+        RECORD_FIELDS, so memory grows with the number of buckets rather
+        than the number of submissions. Each bucket is written to shard 0
+        and its other shards are cleared.
+
+        Args:
+            page_size: Records read per page
+
+        Returns:
+            int: Number of bucket documents written
+        """
+        buckets = {}
+        model = PerformanceModel()
+        cursor = None
+        while True:
+            page, cursor = model.query_page(limit=page_size, start_after=cursor, fields=RECORD_FIELDS)
+            for record in page:
+                _count_record(buckets, record)
+            if cursor is None:
+                break
+
+        collection = RollupModel().collection_name
+        operations = []
+        for doc_id, data in buckets.items():
+            shards = shard_ids(data["scope"], data["scope_id"], data["date"])
+            operations.append(("set", collection, doc_id, data))
+            operations.extend(("delete", collection, shard, None) for shard in shards[1:])
+        get_backend().batch_write(operations)
+        for op in operations:
+            RollupModel().invalidate(op[2])
+        return len(buckets)
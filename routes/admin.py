@@ -14,10 +14,21 @@ from question_service import QuestionService
 from topic_service import TopicService
 from note_service import NoteService
 from cascade_service import CascadeService
+from job_service import JobService
+from stats_service import StatsService
+from rollup_service import RollupService
+from performance_service import PerformanceService
+from export_service import ExportService
+from analytics_service import AnalyticsService
 from agent_wrappers import generate_hidden_testcases
+from agents.groq_client import pool_stats as groq_pool_stats
+from agents.llm_cache import llm_cache
+import verdict_cache
+from hierarchy_cache import hierarchy_cache, enrichment_cache
+import hierarchy_index
 from utils import (
     validate_email, validate_username, validate_batch_name,
-    error_response, success_response, audit_log
+    error_response, success_response, audit_log, paginated_query, InvalidPaginationError
 )
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
@@ -44,6 +55,21 @@ admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 #     request.user = payload
 
 
+def _job_accepted(job_id, message):
+    """202 response pointing the client at a background job."""
+    return success_response(
+        {"job_id": job_id, "status_url": f"/api/admin/jobs/{job_id}"},
+        message,
+        status_code=202
+    )
+
+
+def _cascade_result(result):
+    """Convert a CascadeService (success, message, deleted_count) tuple to a job result."""
+    success, message, deleted_count = result
+    return {"success": success, "message": message, "deleted_count": deleted_count}
+
+
 # ============================================================================
 # COLLEGE ENDPOINTS
 # ============================================================================
@@ -97,11 +123,11 @@ def list_colleges():
     if request.method == "OPTIONS":
         return "", 200
     
-    colleges = CollegeModel().query()
+    colleges, next_cursor = paginated_query(CollegeModel())
     # Remove sensitive fields
     for c in colleges:
         c.pop("firebase_uid", None)
-    return success_response({"colleges": colleges})
+    return success_response({"colleges": colleges, "next_cursor": next_cursor})
 
 
 @admin_bp.route("/colleges/<college_id>", methods=["GET"])
@@ -187,10 +213,13 @@ def disable_college(college_id):
     if not college:
         return error_response("NOT_FOUND", "College not found", status_code=404)
     
-    disable_college_cascade(college_id)
-    audit_log(request.user.get("uid"), "disable_college_cascade", "college", college_id)
+    job_id = JobService.submit(
+        "disable_college_cascade", "college", college_id, request.user.get("uid"),
+        lambda progress: {"success": disable_college_cascade(college_id, progress=progress)}
+    )
+    audit_log(request.user.get("uid"), "disable_college_cascade", "college", college_id, {"job_id": job_id})
     
-    return success_response(None, "College and all related departments, batches, and students disabled")
+    return _job_accepted(job_id, "College disable started for all related departments, batches, and students")
 
 
 @admin_bp.route("/colleges/<college_id>/enable", methods=["POST"])
@@ -201,10 +230,13 @@ def enable_college(college_id):
     if not college:
         return error_response("NOT_FOUND", "College not found", status_code=404)
     
-    enable_college_cascade(college_id)
-    audit_log(request.user.get("uid"), "enable_college_cascade", "college", college_id)
+    job_id = JobService.submit(
+        "enable_college_cascade", "college", college_id, request.user.get("uid"),
+        lambda progress: {"success": enable_college_cascade(college_id, progress=progress)}
+    )
+    audit_log(request.user.get("uid"), "enable_college_cascade", "college", college_id, {"job_id": job_id})
     
-    return success_response(None, "College and all related departments, batches, and students enabled")
+    return _job_accepted(job_id, "College enable started for all related departments, batches, and students")
 
 
 @admin_bp.route("/colleges/<college_id>", methods=["DELETE"])
@@ -215,13 +247,14 @@ def delete_college(college_id):
     if not college:
         return error_response("NOT_FOUND", "College not found", status_code=404)
 
-    # Use cascade delete to remove college and all dependent entities
-    success, message, deleted_count = CascadeService.delete_college_cascade(college_id, request.user.get("uid"))
-    
-    if not success:
-        return error_response("DELETE_ERROR", message, status_code=400)
+    # Run the cascade delete of the college and all dependent entities in the background
+    user_id = request.user.get("uid")
+    job_id = JobService.submit(
+        "delete_college_cascade", "college", college_id, user_id,
+        lambda progress: _cascade_result(CascadeService.delete_college_cascade(college_id, user_id, progress=progress))
+    )
 
-    return success_response({"deleted_count": deleted_count}, f"College and {sum(deleted_count.values())-1} dependent entities deleted successfully")
+    return _job_accepted(job_id, "College deletion started")
 
 
 # ============================================================================
@@ -280,16 +313,14 @@ def list_departments():
     """List departments (optionally filtered by college)."""
     college_id = request.args.get("college_id")
     
-    if college_id:
-        depts = DepartmentModel().query(college_id=college_id)
-    else:
-        depts = DepartmentModel().query()
+    filters = {"college_id": college_id} if college_id else {}
+    depts, next_cursor = paginated_query(DepartmentModel(), **filters)
     
     # Remove sensitive fields
     for d in depts:
         d.pop("firebase_uid", None)
     
-    return success_response({"departments": depts})
+    return success_response({"departments": depts, "next_cursor": next_cursor})
 
 
 @admin_bp.route("/departments/<dept_id>", methods=["GET"])
@@ -374,10 +405,13 @@ def disable_department(dept_id):
     if not dept:
         return error_response("NOT_FOUND", "Department not found", status_code=404)
     
-    disable_department_cascade(dept_id)
-    audit_log(request.user.get("uid"), "disable_department_cascade", "department", dept_id)
+    job_id = JobService.submit(
+        "disable_department_cascade", "department", dept_id, request.user.get("uid"),
+        lambda progress: {"success": disable_department_cascade(dept_id, progress=progress)}
+    )
+    audit_log(request.user.get("uid"), "disable_department_cascade", "department", dept_id, {"job_id": job_id})
     
-    return success_response(None, "Department and all related batches and students disabled")
+    return _job_accepted(job_id, "Department disable started for all related batches and students")
 
 
 @admin_bp.route("/departments/<dept_id>/enable", methods=["POST"])
@@ -388,10 +422,13 @@ def enable_department(dept_id):
     if not dept:
         return error_response("NOT_FOUND", "Department not found", status_code=404)
     
-    enable_department_cascade(dept_id)
-    audit_log(request.user.get("uid"), "enable_department_cascade", "department", dept_id)
+    job_id = JobService.submit(
+        "enable_department_cascade", "department", dept_id, request.user.get("uid"),
+        lambda progress: {"success": enable_department_cascade(dept_id, progress=progress)}
+    )
+    audit_log(request.user.get("uid"), "enable_department_cascade", "department", dept_id, {"job_id": job_id})
     
-    return success_response(None, "Department and all related batches and students enabled")
+    return _job_accepted(job_id, "Department enable started for all related batches and students")
 
 
 # ============================================================================
@@ -457,15 +494,13 @@ def list_batches():
     """List batches (optionally filtered by department)."""
     dept_id = request.args.get("department_id")
     
-    if dept_id:
-        batches = BatchModel().query(department_id=dept_id)
-    else:
-        batches = BatchModel().query()
+    filters = {"department_id": dept_id} if dept_id else {}
+    batches, next_cursor = paginated_query(BatchModel(), **filters)
     
     for b in batches:
         b.pop("firebase_uid", None)
     
-    return success_response({"batches": batches})
+    return success_response({"batches": batches, "next_cursor": next_cursor})
 
 
 @admin_bp.route("/batches/<batch_id>", methods=["GET"])
@@ -556,10 +591,13 @@ def disable_batch(batch_id):
     if not batch:
         return error_response("NOT_FOUND", "Batch not found", status_code=404)
     
-    disable_batch_cascade(batch_id)
-    audit_log(request.user.get("uid"), "disable_batch_cascade", "batch", batch_id)
+    job_id = JobService.submit(
+        "disable_batch_cascade", "batch", batch_id, request.user.get("uid"),
+        lambda progress: {"success": disable_batch_cascade(batch_id, progress=progress)}
+    )
+    audit_log(request.user.get("uid"), "disable_batch_cascade", "batch", batch_id, {"job_id": job_id})
     
-    return success_response(None, "Batch and all related students disabled")
+    return _job_accepted(job_id, "Batch disable started for all related students")
 
 
 @admin_bp.route("/batches/<batch_id>/enable", methods=["POST"])
@@ -570,10 +608,13 @@ def enable_batch(batch_id):
     if not batch:
         return error_response("NOT_FOUND", "Batch not found", status_code=404)
     
-    enable_batch_cascade(batch_id)
-    audit_log(request.user.get("uid"), "enable_batch_cascade", "batch", batch_id)
+    job_id = JobService.submit(
+        "enable_batch_cascade", "batch", batch_id, request.user.get("uid"),
+        lambda progress: {"success": enable_batch_cascade(batch_id, progress=progress)}
+    )
+    audit_log(request.user.get("uid"), "enable_batch_cascade", "batch", batch_id, {"job_id": job_id})
     
-    return success_response(None, "Batch and all related students enabled")
+    return _job_accepted(job_id, "Batch enable started for all related students")
 
 
 @admin_bp.route("/departments/<dept_id>", methods=["DELETE"])
@@ -584,13 +625,14 @@ def delete_department(dept_id):
     if not dept:
         return error_response("NOT_FOUND", "Department not found", status_code=404)
 
-    # Use cascade delete to remove department and all dependent entities
-    success, message, deleted_count = CascadeService.delete_department_cascade(dept_id, request.user.get("uid"))
-    
-    if not success:
-        return error_response("DELETE_ERROR", message, status_code=400)
+    # Run the cascade delete of the department and all dependent entities in the background
+    user_id = request.user.get("uid")
+    job_id = JobService.submit(
+        "delete_department_cascade", "department", dept_id, user_id,
+        lambda progress: _cascade_result(CascadeService.delete_department_cascade(dept_id, user_id, progress=progress))
+    )
 
-    return success_response({"deleted_count": deleted_count}, f"Department and {sum(deleted_count.values())-1} dependent entities deleted successfully")
+    return _job_accepted(job_id, "Department deletion started")
 
 
 @admin_bp.route("/batches/<batch_id>", methods=["DELETE"])
@@ -601,13 +643,14 @@ def delete_batch(batch_id):
     if not batch:
         return error_response("NOT_FOUND", "Batch not found", status_code=404)
 
-    # Use cascade delete to remove batch and all dependent entities
-    success, message, deleted_count = CascadeService.delete_batch_cascade(batch_id, request.user.get("uid"))
-    
-    if not success:
-        return error_response("DELETE_ERROR", message, status_code=400)
+    # Run the cascade delete of the batch and all dependent entities in the background
+    user_id = request.user.get("uid")
+    job_id = JobService.submit(
+        "delete_batch_cascade", "batch", batch_id, user_id,
+        lambda progress: _cascade_result(CascadeService.delete_batch_cascade(batch_id, user_id, progress=progress))
+    )
 
-    return success_response({"deleted_count": deleted_count}, f"Batch and {sum(deleted_count.values())-1} dependent entities deleted successfully")
+    return _job_accepted(job_id, "Batch deletion started")
 
 
 @admin_bp.route("/students/<student_id>", methods=["PUT"])
@@ -792,17 +835,14 @@ def list_students():
     """List students (optionally filtered by batch)."""
     batch_id = request.args.get("batch_id")
     
-    if batch_id:
-        students = StudentModel().query(batch_id=batch_id)
-    else:
-        students = StudentModel().query()
+    filters = {"batch_id": batch_id} if batch_id else {}
+    students, next_cursor = paginated_query(StudentModel(), **filters)
     
-    # Pre-fetch lookup maps to avoid N+1 queries
-    # This assumes reasonable dataset size. For huge datasets, pagination + specific lookups would be better.
+    # Pre-fetch lookup maps for the IDs on this page only (avoids N+1 queries and full scans)
     try:
-        colleges = {c['id']: c.get('name', 'Unknown') for c in CollegeModel().query()}
-        departments = {d['id']: d.get('name', 'Unknown') for d in DepartmentModel().query()}
-        batches = {b['id']: b.get('batch_name', 'Unknown') for b in BatchModel().query()}
+        colleges = {cid: c.get('name', 'Unknown') for cid, c in CollegeModel().get_many(s.get('college_id') for s in students).items()}
+        departments = {did: d.get('name', 'Unknown') for did, d in DepartmentModel().get_many(s.get('department_id') for s in students).items()}
+        batches = {bid: b.get('batch_name', 'Unknown') for bid, b in BatchModel().get_many(s.get('batch_id') for s in students).items()}
     except Exception as e:
         print(f"Warning: Failed to fetch lookup maps: {e}")
         colleges, departments, batches = {}, {}, {}
@@ -814,7 +854,7 @@ def list_students():
         student['department_name'] = departments.get(student.get('department_id'), student.get('department_id'))
         student['batch_name'] = batches.get(student.get('batch_id'), student.get('batch_id'))
     
-    return success_response({"students": students})
+    return success_response({"students": students, "next_cursor": next_cursor})
 
 
 @admin_bp.route("/students/<student_id>", methods=["GET"])
@@ -895,83 +935,79 @@ def get_performance():
     
     # Special handling for student_id to support legacy/mismatched IDs
     performance = []
+    next_cursor = None
     
     if student_id:
         # 1. Try querying by the provided student_id (UUID)
         filters["student_id"] = student_id
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
         
         # 2. Fallback: If no results found, check if records use Firebase UID
-        if not performance:
+        if not performance and not request.args.get("cursor"):
             student = StudentModel().get(student_id)
             if student and student.get("firebase_uid"):
                 filters["student_id"] = student.get("firebase_uid")
-                performance = PerformanceModel().query(**filters)
+                performance, next_cursor = paginated_query(PerformanceModel(), **filters)
     else:
         # No specific student, just apply other filters
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
     
-    # Enrich performance data with Question and Topic details
-    if performance:
-        # 1. Collect Question IDs
-        question_ids = list(set([p.get("question_id") for p in performance if p.get("question_id")]))
-        
-        # 2. Fetch Questions (Batch fetch would be ideal, but looping for now or using a helper if exists)
-        # Assuming no batch_get, so we loop or query. Optimizing by fetching all questions might be heavy if db is large.
-        # But for a single student profile, N is small.
-        # However, listing ALL performance (no student_id) could be huge.
-        # Admin usually filters.
-        
-        # Let's verify we have access to models
-        from models import QuestionModel, TopicModel
-        
-        questions_map = {}
-        # Optimization: If fetching for a single student, N is generic.
-        # If fetching for dashboard (many students), this loop is bad. 
-        # But this endpoint is mostly used with filters.
-        
-        for qid in question_ids:
-            q = QuestionModel().get(qid)
-            if q:
-                questions_map[qid] = q
-                
-        # 3. Collect Topic IDs
-        topic_ids = list(set([q.get("topic_id") for q in questions_map.values() if q.get("topic_id")]))
-        topics_map = {}
-        
-        for tid in topic_ids:
-            t = TopicModel().get(tid)
-            if t:
-                topics_map[tid] = t
-        
-        # 4. Enrich Records
-        for p in performance:
-            qid = p.get("question_id")
-            if qid in questions_map:
-                question = questions_map[qid]
-                p["question_title"] = question.get("title") or question.get("heading") or "Unknown Question"
-                
-                tid = question.get("topic_id")
-                if tid and tid in topics_map:
-                    p["topic_name"] = topics_map[tid].get("name") or topics_map[tid].get("topic_name")
-                else:
-                    p["topic_name"] = "Unknown Topic"
-            else:
-                p["question_title"] = "Unknown Question"
-                p["topic_name"] = "Unknown Topic"
+    # Add question title/difficulty and topic name (cached, batched reads)
+    PerformanceService.enrich(performance)
 
-    return success_response({"performance": performance})
+    return success_response({"performance": performance, "next_cursor": next_cursor})
 
 
 @admin_bp.route("/performance/summary", methods=["GET"])
 @require_auth(allowed_roles=["admin"])
 def get_performance_summary():
-    """Get aggregated performance summary."""
-    # This is a complex aggregation that could be cached
-    # For now, return a placeholder
-    return success_response({
-        "summary": "Performance aggregation endpoint - implement with Firestore aggregation"
-    })
+    """Get aggregated performance summary from the per-student aggregates.
+    
+    Optional query params college_id, department_id and batch_id narrow the scope.
+    """
+    filters = {
+        key: request.args.get(key)
+        for key in ("college_id", "department_id", "batch_id")
+        if request.args.get(key)
+    }
+    return success_response({"summary": StatsService.summarize(**filters)})
+
+
+@admin_bp.route("/performance/trends", methods=["GET"])
+@require_auth(allowed_roles=["admin"])
+def get_performance_trends():
+    """Get daily submission counts and solve rate for a batch, department or college.
+    
+    Query params: one of batch_id / department_id / college_id (most specific
+    wins), plus optional from/to dates (YYYY-MM-DD).
+    """
+    for scope, field in (("batch", "batch_id"), ("department", "department_id"), ("college", "college_id")):
+        if request.args.get(field):
+            return RollupService.trends_response(scope, request.args.get(field), request.args)
+    return error_response("INVALID_INPUT", "One of batch_id, department_id or college_id is required")
+
+
+@admin_bp.route("/performance/export", methods=["GET"])
+@require_auth(allowed_roles=["admin"])
+def export_performance():
+    """Stream performance records as CSV or NDJSON.
+    
+    Query params: format (csv|ndjson, default csv), include_code (true|false),
+    and optional college_id / department_id / batch_id / student_id /
+    question_id / status filters.
+    """
+    return ExportService.export_response({}, request.args)
+
+
+@admin_bp.route("/analytics", methods=["GET"])
+@require_auth(allowed_roles=["admin"])
+def get_analytics():
+    """Get cohort analytics: per-topic solve rates by batch, student percentiles
+    and a difficulty histogram.
+    
+    Query params: optional college_id / department_id / batch_id / question_id.
+    """
+    return AnalyticsService.analytics_response({}, request.args)
 
 
 # ============================================================================
@@ -997,8 +1033,10 @@ def list_questions():
         return "", 200
     
     try:
-        questions = QuestionModel().query()
-        return success_response({"questions": questions if questions else []})
+        questions, next_cursor = paginated_query(QuestionModel())
+        return success_response({"questions": questions if questions else [], "next_cursor": next_cursor})
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e)), 500
 
@@ -1055,8 +1093,10 @@ def list_topics():
         return "", 200
     
     try:
-        topics = TopicModel().query()
-        return success_response({"topics": topics if topics else []})
+        topics, next_cursor = paginated_query(TopicModel())
+        return success_response({"topics": topics if topics else [], "next_cursor": next_cursor})
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e)), 500
 
@@ -1113,8 +1153,10 @@ def list_notes():
         return "", 200
     
     try:
-        notes = NoteModel().query()
-        return success_response({"notes": notes if notes else []})
+        notes, next_cursor = paginated_query(NoteModel())
+        return success_response({"notes": notes if notes else [], "next_cursor": next_cursor})
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e)), 500
 
@@ -1197,3 +1239,36 @@ def generate_testcases_admin():
         logger = logging.getLogger(__name__)
         logger.error(f"Test case generation error: {str(e)}", exc_info=True)
         return error_response("INTERNAL_ERROR", "Failed to generate test cases", status_code=500)
+
+
+# ============================================================================
+# JOB ENDPOINTS
+# ============================================================================
+
+@admin_bp.route("/jobs/<job_id>", methods=["GET"])
+@require_auth(allowed_roles=["admin"])
+def get_job(job_id):
+    """Get status, progress and result of a background job (cascade or rename fan-out)."""
+    job = JobService.get(job_id)
+    if not job:
+        return error_response("NOT_FOUND", "Job not found", status_code=404)
+    
+    return success_response({"job": job})
+
+
+# ============================================================================
+# DIAGNOSTICS
+# ============================================================================
+
+@admin_bp.route("/cache-stats", methods=["GET"])
+@require_auth(allowed_roles=["admin"])
+def cache_stats():
+    """Get hit/miss/eviction counters for this worker's in-process caches, the LLM response and verdict caches and the Groq connection pool."""
+    return success_response({
+        "hierarchy": hierarchy_cache.stats(),
+        "hierarchy_index": hierarchy_index.stats(),
+        "enrichment": enrichment_cache.stats(),
+        "groq_pool": groq_pool_stats(),
+        "llm": llm_cache.stats(),
+        "verdicts": verdict_cache.stats()
+    })
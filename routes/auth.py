@@ -3,6 +3,8 @@ from flask import Blueprint, request, jsonify
 from auth import create_jwt_token, verify_firebase_token, send_password_reset_email
 from firebase_init import get_auth
 from models import can_student_access
+from config import CASCADE_MODE
+import hierarchy_index
 from datetime import datetime
 import firebase_admin
 from firebase_admin import auth as firebase_auth
@@ -54,7 +56,7 @@ def login():
         else:
             user_data = user_doc.to_dict()
 
-        if user_data.get("is_disabled"):
+        if user_data.get("is_disabled") or (CASCADE_MODE == "lazy" and hierarchy_index.is_user_disabled(user_data)):
             return jsonify({"error": True, "code": "ACCOUNT_DISABLED", "message": "Your account has been disabled"}), 403
 
         # Create JWT token with all user data
@@ -2,13 +2,17 @@
 from flask import Blueprint, request, jsonify
 from firebase_init import get_auth, db
 from auth import require_auth, register_user_firebase, disable_user_firebase, enable_user_firebase, get_token_from_request, decode_jwt_token
-from models import StudentModel, BatchModel, QuestionModel, TopicModel, NoteModel, PerformanceModel
+from models import StudentModel, BatchModel, QuestionModel, NoteModel, PerformanceModel
 from question_service import QuestionService
 from topic_service import TopicService
 from note_service import NoteService
 from cascade_service import CascadeService
+from rollup_service import RollupService
+from performance_service import PerformanceService
+from export_service import ExportService
+from analytics_service import AnalyticsService
 from agent_wrappers import generate_hidden_testcases
-from utils import validate_email, error_response, success_response, audit_log
+from utils import validate_email, error_response, success_response, audit_log, paginated_query, InvalidPaginationError
 import logging
 
 # Configure logging
@@ -34,8 +38,10 @@ def get_students():
         return error_response("NO_BATCH", "Batch ID not found in token", status_code=400)
     
     try:
-        students = StudentModel().query(batch_id=batch_id)
-        return success_response({"students": students})
+        students, next_cursor = paginated_query(StudentModel(), batch_id=batch_id)
+        return success_response({"students": students, "next_cursor": next_cursor})
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e), status_code=500)
 
@@ -444,8 +450,10 @@ def get_questions():
         return error_response("NO_BATCH", "Batch ID not found in token", status_code=400)
     
     try:
-        questions = QuestionModel().query(batch_id=batch_id)
-        return success_response({"questions": questions})
+        questions, next_cursor = paginated_query(QuestionModel(), batch_id=batch_id)
+        return success_response({"questions": questions, "next_cursor": next_cursor})
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e), status_code=500)
 
@@ -510,6 +518,8 @@ def get_topics():
     try:
         result = TopicService.get_topics_for_batch(batch_id)
         return result
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e), status_code=500)
 
@@ -569,6 +579,8 @@ def get_notes():
     try:
         result = NoteService.get_notes_for_batch(batch_id)
         return result
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e), status_code=500)
 
@@ -667,6 +679,7 @@ def get_performance():
     filters = {"batch_id": batch_id}
     
     performance = []
+    next_cursor = None
     
     if student_id:
         # 1. Verify student belongs to this batch
@@ -678,52 +691,39 @@ def get_performance():
              
         # 2. Try querying by the provided student_id (UUID)
         filters["student_id"] = student_id
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
         
         # 3. Fallback: If no results found, check if records use Firebase UID
-        if not performance:
+        if not performance and not request.args.get("cursor"):
              if student.get("firebase_uid"):
                 filters["student_id"] = student.get("firebase_uid")
-                performance = PerformanceModel().query(**filters)
+                performance, next_cursor = paginated_query(PerformanceModel(), **filters)
     else:
         # List all performance for batch
-        performance = PerformanceModel().query(**filters)
-        
-    # Enrich performance data with Question and Topic details
-    if performance:
-        # 1. Collect Question IDs
-        question_ids = list(set([p.get("question_id") for p in performance if p.get("question_id")]))
-        
-        # 2. Fetch Questions
-        questions_map = {}
-        for qid in question_ids:
-            q = QuestionModel().get(qid)
-            if q:
-                questions_map[qid] = q
-                
-        # 3. Collect Topic IDs
-        topic_ids = list(set([q.get("topic_id") for q in questions_map.values() if q.get("topic_id")]))
-        topics_map = {}
-        
-        for tid in topic_ids:
-            t = TopicModel().get(tid)
-            if t:
-                topics_map[tid] = t
-        
-        # 4. Enrich Records
-        for p in performance:
-            qid = p.get("question_id")
-            if qid in questions_map:
-                question = questions_map[qid]
-                p["question_title"] = question.get("title") or question.get("heading") or "Unknown Question"
-                
-                tid = question.get("topic_id")
-                if tid and tid in topics_map:
-                    p["topic_name"] = topics_map[tid].get("name") or topics_map[tid].get("topic_name")
-                else:
-                    p["topic_name"] = "Unknown Topic"
-            else:
-                p["question_title"] = "Unknown Question"
-                p["topic_name"] = "Unknown Topic"
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
+        
+    # Add question title/difficulty and topic name (cached, batched reads)
+    PerformanceService.enrich(performance)
 
-    return success_response({"performance": performance})
+    return success_response({"performance": performance, "next_cursor": next_cursor})
+
+
+@batch_bp.route("/performance/trends", methods=["GET"])
+@require_auth(allowed_roles=["batch"])
+def get_performance_trends():
+    """Get daily submission trends for this batch."""
+    return RollupService.trends_response("batch", request.user.get("batch_id"), request.args)
+
+
+@batch_bp.route("/performance/export", methods=["GET"])
+@require_auth(allowed_roles=["batch"])
+def export_performance():
+    """Stream this batch's performance records as CSV or NDJSON."""
+    return ExportService.export_response({"batch_id": request.user.get("batch_id")}, request.args)
+
+
+@batch_bp.route("/analytics", methods=["GET"])
+@require_auth(allowed_roles=["batch"])
+def get_analytics():
+    """Get cohort analytics for this batch."""
+    return AnalyticsService.analytics_response({"batch_id": request.user.get("batch_id")}, request.args)
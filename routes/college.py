@@ -2,10 +2,15 @@
 from flask import Blueprint, request, jsonify
 from firebase_init import get_auth, db
 from auth import require_auth, get_token_from_request, decode_jwt_token, disable_user_firebase, enable_user_firebase, register_user_firebase
-from models import DepartmentModel, BatchModel, StudentModel, PerformanceModel, QuestionModel, TopicModel
+from models import DepartmentModel, BatchModel, StudentModel, PerformanceModel, QuestionModel
 from question_service import QuestionService
 from cascade_service import CascadeService
-from utils import error_response, success_response, validate_email, validate_username, validate_batch_name, audit_log
+from rollup_service import RollupService
+from performance_service import PerformanceService
+from export_service import ExportService
+from analytics_service import AnalyticsService
+import hierarchy_index
+from utils import error_response, success_response, validate_email, validate_username, validate_batch_name, audit_log, paginated_query, InvalidPaginationError
 
 college_bp = Blueprint("college", __name__, url_prefix="/api/college")
 
@@ -36,12 +41,12 @@ college_bp = Blueprint("college", __name__, url_prefix="/api/college")
 def list_departments():
     """List departments under this college."""
     college_id = request.user.get("college_id")
-    depts = DepartmentModel().query(college_id=college_id, is_disabled=False)
+    depts, next_cursor = paginated_query(DepartmentModel(), college_id=college_id, is_disabled=False)
 
     for d in depts:
         d.pop("firebase_uid", None)
 
-    return success_response({"departments": depts})
+    return success_response({"departments": depts, "next_cursor": next_cursor})
 
 
 @college_bp.route("/departments", methods=["POST", "OPTIONS"])
@@ -211,10 +216,10 @@ def list_batches_college():
         return "", 200
 
     college_id = request.user.get("college_id")
-    batches = BatchModel().query(college_id=college_id, is_disabled=False)
+    batches, next_cursor = paginated_query(BatchModel(), college_id=college_id, is_disabled=False)
     for b in batches:
         b.pop("firebase_uid", None)
-    return success_response({"batches": batches})
+    return success_response({"batches": batches, "next_cursor": next_cursor})
 
 
 @college_bp.route("/batches", methods=["POST", "OPTIONS"])
@@ -450,10 +455,10 @@ def list_students_college():
     if batch_id:
         filters["batch_id"] = batch_id
 
-    students = StudentModel().query(**filters)
+    students, next_cursor = paginated_query(StudentModel(), **filters)
     for s in students:
         s.pop("firebase_uid", None)
-    return success_response({"students": students})
+    return success_response({"students": students, "next_cursor": next_cursor})
 
 
 @college_bp.route("/students/<student_id>", methods=["GET"])
@@ -605,6 +610,7 @@ def get_performance():
         filters["batch_id"] = batch_id
         
     performance = []
+    next_cursor = None
     
     if student_id:
         # 1. Verify student belongs to this college
@@ -614,50 +620,20 @@ def get_performance():
              
         # 2. Try querying by the provided student_id (UUID)
         filters["student_id"] = student_id
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
         
         # 3. Fallback
-        if not performance:
+        if not performance and not request.args.get("cursor"):
              if student.get("firebase_uid"):
                 filters["student_id"] = student.get("firebase_uid")
-                performance = PerformanceModel().query(**filters)
+                performance, next_cursor = paginated_query(PerformanceModel(), **filters)
     else:
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
         
-    # Enrich performance data
-    if performance:
-        question_ids = list(set([p.get("question_id") for p in performance if p.get("question_id")]))
-        
-        questions_map = {}
-        for qid in question_ids:
-            q = QuestionModel().get(qid)
-            if q:
-                questions_map[qid] = q
-                
-        topic_ids = list(set([q.get("topic_id") for q in questions_map.values() if q.get("topic_id")]))
-        topics_map = {}
-        
-        for tid in topic_ids:
-            t = TopicModel().get(tid)
-            if t:
-                topics_map[tid] = t
-        
-        for p in performance:
-            qid = p.get("question_id")
-            if qid in questions_map:
-                question = questions_map[qid]
-                p["question_title"] = question.get("title") or question.get("heading") or "Unknown Question"
-                
-                tid = question.get("topic_id")
-                if tid and tid in topics_map:
-                    p["topic_name"] = topics_map[tid].get("name") or topics_map[tid].get("topic_name")
-                else:
-                    p["topic_name"] = "Unknown Topic"
-            else:
-                p["question_title"] = "Unknown Question"
-                p["topic_name"] = "Unknown Topic"
+    # Add question title/difficulty and topic name (cached, batched reads)
+    PerformanceService.enrich(performance)
 
-    return success_response({"performance": performance})
+    return success_response({"performance": performance, "next_cursor": next_cursor})
 
 
 # ============================================================================
@@ -694,8 +670,10 @@ def list_questions():
         if topic_id:
             filters["topic_id"] = topic_id
         
-        questions = QuestionModel().query(**filters)
-        return success_response({"questions": questions if questions else []})
+        questions, next_cursor = paginated_query(QuestionModel(), **filters)
+        return success_response({"questions": questions if questions else [], "next_cursor": next_cursor})
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         return error_response("QUERY_ERROR", str(e)), 500
 
@@ -728,3 +706,31 @@ def delete_question(question_id):
     """Delete a question."""
     response, status_code = QuestionService.delete_question(request.user, question_id)
     return response, status_code
+
+
+@college_bp.route("/performance/trends", methods=["GET"])
+@require_auth(allowed_roles=["college"])
+def get_performance_trends():
+    """Get daily submission trends for this college, or one of its departments/batches."""
+    college_id = request.user.get("college_id")
+    for scope, field, collection in (("batch", "batch_id", "batches"), ("department", "department_id", "departments")):
+        scope_id = request.args.get(field)
+        if scope_id:
+            if not hierarchy_index.in_scope(collection, scope_id, {"college_id": college_id}):
+                return error_response("NOT_FOUND", f"{scope.capitalize()} not found in this college", status_code=404)
+            return RollupService.trends_response(scope, scope_id, request.args)
+    return RollupService.trends_response("college", college_id, request.args)
+
+
+@college_bp.route("/performance/export", methods=["GET"])
+@require_auth(allowed_roles=["college"])
+def export_performance():
+    """Stream this college's performance records as CSV or NDJSON."""
+    return ExportService.export_response({"college_id": request.user.get("college_id")}, request.args)
+
+
+@college_bp.route("/analytics", methods=["GET"])
+@require_auth(allowed_roles=["college"])
+def get_analytics():
+    """Get cohort analytics for this college (optionally narrowed to a department/batch)."""
+    return AnalyticsService.analytics_response({"college_id": request.user.get("college_id")}, request.args)
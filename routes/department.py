@@ -7,10 +7,17 @@ from models import (
 )
 from question_service import QuestionService
 from cascade_service import CascadeService
+from rollup_service import RollupService
+from performance_service import PerformanceService
+from export_service import ExportService
+from analytics_service import AnalyticsService
+import hierarchy_index
+import scope_versions
 from agent_wrappers import generate_hidden_testcases
 from utils import (
     error_response, success_response, validate_batch_name, validate_email,
-    validate_username, validate_google_drive_link, parse_csv_students, audit_log
+    validate_username, validate_google_drive_link, parse_csv_students, audit_log,
+    paginated_query
 )
 import secrets
 
@@ -97,9 +104,9 @@ def create_batch():
 def list_batches():
     """List batches under this department."""
     dept_id = request.user.get("department_id")
-    batches = BatchModel().query(department_id=dept_id, is_disabled=False)
+    batches, next_cursor = paginated_query(BatchModel(), department_id=dept_id, is_disabled=False)
     
-    return success_response({"batches": batches})
+    return success_response({"batches": batches, "next_cursor": next_cursor})
 
 
 @department_bp.route("/batches/<batch_id>", methods=["GET"])
@@ -335,13 +342,13 @@ def list_students():
     if batch_id:
         filters["batch_id"] = batch_id
     
-    students = StudentModel().query(**filters)
+    students, next_cursor = paginated_query(StudentModel(), **filters)
     
     # Remove sensitive fields
     for student in students:
         student.pop("firebase_uid", None)
     
-    return success_response({"students": students})
+    return success_response({"students": students, "next_cursor": next_cursor})
 
 
 @department_bp.route("/students", methods=["POST"])
@@ -582,9 +589,9 @@ def list_topics():
         return "", 200
     
     dept_id = request.user.get("department_id")
-    topics = TopicModel().query(department_id=dept_id)
+    topics, next_cursor = paginated_query(TopicModel(), department_id=dept_id)
     
-    return success_response({"topics": topics})
+    return success_response({"topics": topics, "next_cursor": next_cursor})
 
 
 # ============================================================================
@@ -614,9 +621,9 @@ def list_questions():
     if topic_id:
         filters["topic_id"] = topic_id
     
-    questions = QuestionModel().query(**filters)
+    questions, next_cursor = paginated_query(QuestionModel(), **filters)
     
-    return success_response({"questions": questions})
+    return success_response({"questions": questions, "next_cursor": next_cursor})
 
 
 @department_bp.route("/questions/<question_id>", methods=["GET"])
@@ -696,9 +703,9 @@ def list_notes():
     if topic_id:
         filters["topic_id"] = topic_id
     
-    notes = NoteModel().query(**filters)
+    notes, next_cursor = paginated_query(NoteModel(), **filters)
     
-    return success_response({"notes": notes})
+    return success_response({"notes": notes, "next_cursor": next_cursor})
 
 
 @department_bp.route("/notes/<note_id>", methods=["DELETE"])
@@ -712,6 +719,7 @@ def delete_note(note_id):
         return error_response("NOT_FOUND", "Note not found", status_code=404)
     
     NoteModel().delete(note_id)
+    scope_versions.bump("notes", note.get("batch_id"))
     audit_log(dept_id, "delete_note", "note", note_id)
     
 # ============================================================================
@@ -733,6 +741,7 @@ def get_performance():
         filters["batch_id"] = batch_id
     
     performance = []
+    next_cursor = None
     
     if student_id:
         # 1. Verify student belongs to this department
@@ -742,47 +751,44 @@ def get_performance():
              
         # 2. Try querying by the provided student_id (UUID)
         filters["student_id"] = student_id
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
         
         # 3. Fallback
-        if not performance:
+        if not performance and not request.args.get("cursor"):
              if student.get("firebase_uid"):
                 filters["student_id"] = student.get("firebase_uid")
-                performance = PerformanceModel().query(**filters)
+                performance, next_cursor = paginated_query(PerformanceModel(), **filters)
     else:
-        performance = PerformanceModel().query(**filters)
+        performance, next_cursor = paginated_query(PerformanceModel(), **filters)
         
-    # Enrich performance data
-    if performance:
-        question_ids = list(set([p.get("question_id") for p in performance if p.get("question_id")]))
-        
-        questions_map = {}
-        for qid in question_ids:
-            q = QuestionModel().get(qid)
-            if q:
-                questions_map[qid] = q
-                
-        topic_ids = list(set([q.get("topic_id") for q in questions_map.values() if q.get("topic_id")]))
-        topics_map = {}
-        
-        for tid in topic_ids:
-            t = TopicModel().get(tid)
-            if t:
-                topics_map[tid] = t
-        
-        for p in performance:
-            qid = p.get("question_id")
-            if qid in questions_map:
-                question = questions_map[qid]
-                p["question_title"] = question.get("title") or question.get("heading") or "Unknown Question"
-                
-                tid = question.get("topic_id")
-                if tid and tid in topics_map:
-                    p["topic_name"] = topics_map[tid].get("name") or topics_map[tid].get("topic_name")
-                else:
-                    p["topic_name"] = "Unknown Topic"
-            else:
-                p["question_title"] = "Unknown Question"
-                p["topic_name"] = "Unknown Topic"
-
-    return success_response({"performance": performance})
+    # Add question title/difficulty and topic name (cached, batched reads)
+    PerformanceService.enrich(performance)
+
+    return success_response({"performance": performance, "next_cursor": next_cursor})
+
+
+@department_bp.route("/performance/trends", methods=["GET"])
+@require_auth(allowed_roles=["department"])
+def get_performance_trends():
+    """Get daily submission trends for this department, or one of its batches."""
+    dept_id = request.user.get("department_id")
+    batch_id = request.args.get("batch_id")
+    if batch_id:
+        if not hierarchy_index.in_scope("batches", batch_id, {"department_id": dept_id}):
+            return error_response("NOT_FOUND", "Batch not found in this department", status_code=404)
+        return RollupService.trends_response("batch", batch_id, request.args)
+    return RollupService.trends_response("department", dept_id, request.args)
+
+
+@department_bp.route("/performance/export", methods=["GET"])
+@require_auth(allowed_roles=["department"])
+def export_performance():
+    """Stream this department's performance records as CSV or NDJSON."""
+    return ExportService.export_response({"department_id": request.user.get("department_id")}, request.args)
+
+
+@department_bp.route("/analytics", methods=["GET"])
+@require_auth(allowed_roles=["department"])
+def get_analytics():
+    """Get cohort analytics for this department (optionally narrowed to a batch)."""
+    return AnalyticsService.analytics_response({"department_id": request.user.get("department_id")}, request.args)
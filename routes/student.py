@@ -3,13 +3,17 @@ from flask import Blueprint, request, jsonify
 from auth import require_auth, get_token_from_request, decode_jwt_token
 from models import (
     StudentModel, BatchModel, QuestionModel, NoteModel, TopicModel, PerformanceModel,
-    CollegeModel, DepartmentModel, can_student_access
+    CollegeModel, DepartmentModel, StudentProgressModel, can_student_access
 )
 from topic_service import TopicService
+from stats_service import StatsService, best_status
+from performance_service import PerformanceService
+import scope_versions
+import verdict_cache
 from agent_wrappers import (
-    compile_and_run_code, evaluate_code_against_testcases, get_efficiency_feedback
+    compile_and_run_code, evaluate_code_against_testcases, get_efficiency_feedback, agent_executor
 )
-from utils import error_response, success_response
+from utils import error_response, success_response, paginated_query, InvalidPaginationError
 from datetime import datetime
 
 student_bp = Blueprint("student", __name__, url_prefix="/api/student")
@@ -82,9 +86,12 @@ def get_topics():
     
     try:
         print(f"Querying topics for batch_id: {batch_id}")
-        result = TopicService.get_topics_for_batch(batch_id)
-        print(f"Result: {result}")
-        return result
+        return scope_versions.conditional_get(
+            ("topics", batch_id, scope_versions.current("topics", batch_id)),
+            lambda: TopicService.get_topics_for_batch(batch_id)
+        )
+    except InvalidPaginationError:
+        raise
     except Exception as e:
         print(f"ERROR: {str(e)}")
         import traceback
@@ -106,6 +113,51 @@ def test():
 # QUESTION ENDPOINTS
 # ============================================================================
 
+def _question_progress(student_id):
+    """Get {question_id: progress entry} for a student from their progress document.
+    
+    Students whose document does not cover their whole history yet (no
+    backfilled marker) fall back to scanning their submission history.
+    """
+    progress = StudentProgressModel().get(student_id)
+    if progress is not None and progress.get("backfilled"):
+        return progress.get("questions") or {}
+    
+    entries = {}
+    for attempt in PerformanceModel().query(student_id=student_id):
+        entry = entries.setdefault(attempt.get("question_id"), {})
+        if attempt.get("status"):
+            entry[attempt["status"]] = entry.get(attempt["status"], 0) + 1
+    return entries
+
+
+def _attach_progress(questions, progress):
+    """Strip hidden test cases and add is_attempted / is_solved / best_status."""
+    for q in questions:
+        q.pop("hidden_testcases", None)
+        entry = progress.get(q.get("id"))
+        q["is_attempted"] = entry is not None
+        q["is_solved"] = bool(entry and entry.get("correct"))
+        q["best_status"] = best_status(entry)
+
+
+def _questions_response(batch_id, student_id, **filters):
+    """List the batch's questions with progress flags, honouring If-None-Match.
+    
+    The ETag covers the batch's question version and the student's progress,
+    so a poll is answered with 304 after two small document reads.
+    """
+    progress = _question_progress(student_id)
+    
+    def build():
+        questions, next_cursor = paginated_query(QuestionModel(), batch_id=batch_id, **filters)
+        _attach_progress(questions, progress)
+        return success_response({"questions": questions, "next_cursor": next_cursor})
+    
+    version = scope_versions.current("questions", batch_id)
+    return scope_versions.conditional_get(("questions", batch_id, version, progress), build)
+
+
 @student_bp.route("/questions", methods=["GET", "OPTIONS"])
 @require_auth(allowed_roles=["student"])
 def get_questions():
@@ -121,25 +173,11 @@ def get_questions():
     topic_id = request.args.get("topic_id")
     
     # Query questions for student's batch
-    filters = {"batch_id": batch_id}
+    filters = {}
     if topic_id:
         filters["topic_id"] = topic_id
     
-    questions = QuestionModel().query(**filters)
-    
-    # Check attempts
-    student_id = request.user.get("student_id")
-    attempts = PerformanceModel().query(student_id=student_id)
-    attempted_ids = {a.get("question_id") for a in attempts}
-    solved_ids = {a.get("question_id") for a in attempts if a.get("status") == "correct"}
-    
-    # Remove hidden test cases and add flags
-    for q in questions:
-        q.pop("hidden_testcases", None)
-        q["is_attempted"] = q.get("id") in attempted_ids
-        q["is_solved"] = q.get("id") in solved_ids
-    
-    return success_response({"questions": questions})
+    return _questions_response(batch_id, request.user.get("student_id"), **filters)
 
 
 @student_bp.route("/questions/<question_id>", methods=["GET", "OPTIONS"])
@@ -179,21 +217,7 @@ def get_questions_by_topic(topic_id):
         return error_response("NO_BATCH", "Student not assigned to batch", status_code=400)
     
     # Query questions for this topic and batch
-    questions = QuestionModel().query(topic_id=topic_id, batch_id=batch_id)
-    
-    # Check attempts
-    student_id = request.user.get("student_id")
-    attempts = PerformanceModel().query(student_id=student_id)
-    attempted_ids = {a.get("question_id") for a in attempts}
-    solved_ids = {a.get("question_id") for a in attempts if a.get("status") == "correct"}
-    
-    # Remove hidden test cases and add flags
-    for q in questions:
-        q.pop("hidden_testcases", None)
-        q["is_attempted"] = q.get("id") in attempted_ids
-        q["is_solved"] = q.get("id") in solved_ids
-    
-    return success_response({"questions": questions})
+    return _questions_response(batch_id, request.user.get("student_id"), topic_id=topic_id)
 
 
 # ============================================================================
@@ -235,7 +259,9 @@ def run_code():
         question.get("description"), 
         code, 
         language, 
-        test_input
+        test_input,
+        # Lets the client force a fresh run instead of a cached result
+        bypass_cache=bool(data.get("bypass_cache"))
     )
     
     if not compile_result["success"]:
@@ -289,6 +315,90 @@ def get_code_efficiency():
     
     return success_response(eff_result["data"])
 
+def _grade_submission(question, code, language):
+    """Run the compile, evaluate and efficiency agents on a submission.
+    
+    The three agents are independent LLM calls, so they run concurrently on
+    the bounded agent executor and the submission takes about as long as the
+    slowest one. The results are joined in the original order: a failed
+    compile short-circuits to an execution error, and the (speculative)
+    efficiency feedback is only used for a correct verdict.
+    
+    Returns:
+        (dict, None) with status, test_results, efficiency_feedback and
+        reusable (whether the verdict may be stored in verdict_cache), or
+        (None, error) when the code failed to run on the sample input
+    """
+    description = question.get("description")
+    open_testcases = question.get("open_testcases", [])
+    all_testcases = open_testcases + question.get("hidden_testcases", [])
+    
+    executor = agent_executor()
+    compile_future = executor.submit(
+        compile_and_run_code, description, code, language, question.get("sample_input")
+    )
+    eval_future = executor.submit(
+        evaluate_code_against_testcases, description, code, language, all_testcases,
+        visible_count=len(open_testcases)
+    )
+    efficiency_future = executor.submit(get_efficiency_feedback, description, code)
+    
+    # Step 1: Code must run on the sample input
+    compile_result = compile_future.result()
+    if not compile_result["success"]:
+        # Calls that have not started yet are dropped; running ones are ignored
+        eval_future.cancel()
+        efficiency_future.cancel()
+        return None, compile_result["error"]
+    
+    # Step 2: Verdict across all test cases
+    eval_result = eval_future.result()
+    
+    is_correct = False
+    eval_reason = "Evaluation failed"
+    test_results = {}
+    
+    if eval_result["success"]:
+        is_correct = eval_result["data"]["is_correct"]
+        eval_reason = eval_result["data"]["reason"]
+        # Per-testcase results (status, time, memory) from local grading
+        if eval_result["data"].get("test_results"):
+            test_results = {
+                "passed": eval_result["data"]["passed"],
+                "total": eval_result["data"]["total"],
+                "cases": eval_result["data"]["test_results"]
+            }
+    else:
+        eval_reason = eval_result.get("error", "Evaluation failed")
+    
+    # Step 3: Efficiency feedback only for correct solutions
+    efficiency_feedback = None
+    if is_correct:
+        eff_result = efficiency_future.result()
+        if eff_result["success"]:
+            efficiency_feedback = eff_result["data"]
+    else:
+        efficiency_future.cancel()
+    
+    # Only genuine verdicts are reused: not agent failures, and not a correct
+    # verdict whose efficiency feedback is missing
+    reusable = (
+        eval_result["success"] and eval_result["data"].get("evaluated", False)
+        and (efficiency_feedback is not None or not is_correct)
+    )
+    
+    return {
+        "status": "correct" if is_correct else "incorrect",
+        "test_results": {
+            "is_correct": is_correct,
+            "reason": eval_reason,
+            **test_results
+        },
+        "efficiency_feedback": efficiency_feedback,
+        "reusable": reusable
+    }, None
+
+
 @student_bp.route("/submit", methods=["POST", "OPTIONS"])
 @require_auth(allowed_roles=["student"])
 def submit_code():
@@ -319,92 +429,73 @@ def submit_code():
     if not question or question.get("batch_id") != batch_id:
         return error_response("NOT_FOUND", "Question not found", status_code=404)
     
-    # Step 1: Compile and run code on sample input
-    compile_result = compile_and_run_code(
-        question.get("description"), 
-        code, 
-        language, 
-        question.get("sample_input")
-    )
+    # Question/topic display fields stored on the record (no joins when listing)
+    question_fields = PerformanceService.question_fields(question_id, question)
     
-    if not compile_result["success"]:
-        # Store failed submission
-        perf_data = {
-            "student_id": student_id,
-            "question_id": question_id,
-            "batch_id": batch_id,
-            "department_id": department_id,
-            "college_id": college_id,
-            "status": "execution_error",
-            "submission_code": code,
-            "submission_language": language,
-            "test_results": {"total": 0, "passed": 0, "failed": 0},
-            "submitted_at": datetime.utcnow(),
-            "attempts": 1
-        }
+    # Reuse the verdict of an equivalent earlier submission (same question,
+    # testcases and normalized code) instead of running the agents again
+    fingerprint = verdict_cache.fingerprint(question, code, language)
+    verdict = verdict_cache.lookup(fingerprint)
+    reused = verdict is not None
+    
+    if not reused:
+        verdict, compile_error = _grade_submission(question, code, language)
         
-        perf_id = PerformanceModel().create(perf_data)
+        if compile_error is not None:
+            # Store failed submission
+            perf_data = {
+                "student_id": student_id,
+                "question_id": question_id,
+                **question_fields,
+                "batch_id": batch_id,
+                "department_id": department_id,
+                "college_id": college_id,
+                "status": "execution_error",
+                "submission_code": code,
+                "submission_language": language,
+                "test_results": {"total": 0, "passed": 0, "failed": 0},
+                "submitted_at": datetime.utcnow(),
+                "attempts": 1
+            }
+            
+            perf_id = StatsService.record_submission(perf_data, question)
+            
+            return success_response({
+                "status": "execution_error",
+                "error": compile_error,
+                "performance_id": perf_id
+            })
         
-        return success_response({
-            "status": "execution_error",
-            "error": compile_result["error"],
-            "performance_id": perf_id
-        }), 200
-    
-    # Step 2: Evaluate against all test cases
-    all_testcases = (
-        question.get("open_testcases", []) +
-        question.get("hidden_testcases", [])
-    )
-    
-    eval_result = evaluate_code_against_testcases(
-        question.get("description"), 
-        code, 
-        language, 
-        all_testcases
-    )
-    
-    is_correct = False
-    eval_reason = "Evaluation failed"
-    
-    if eval_result["success"]:
-        is_correct = eval_result["data"]["is_correct"]
-        eval_reason = eval_result["data"]["reason"]
-    else:
-        eval_reason = eval_result.get("error", "Evaluation failed")
+        if verdict.pop("reusable"):
+            verdict_cache.store(fingerprint, question, language, verdict)
     
-    # Step 3: If correct, get efficiency feedback
-    efficiency_feedback = None
-    if is_correct:
-        eff_result = get_efficiency_feedback(question.get("description"), code)
-        if eff_result["success"]:
-            efficiency_feedback = eff_result["data"]
+    is_correct = verdict["status"] == "correct"
+    efficiency_feedback = verdict.get("efficiency_feedback")
     
     # Store performance record
     perf_data = {
         "student_id": student_id,
         "question_id": question_id,
+        **question_fields,
         "batch_id": batch_id,
         "department_id": department_id,
         "college_id": college_id,
-        "status": "correct" if is_correct else "incorrect",
+        "status": verdict["status"],
         "submission_code": code,
         "submission_language": language,
-        "test_results": {
-            "is_correct": is_correct,
-            "reason": eval_reason
-        },
+        "test_results": verdict["test_results"],
         "efficiency_feedback": efficiency_feedback if efficiency_feedback else None,
         "submitted_at": datetime.utcnow(),
         "attempts": 1
     }
     
-    perf_id = PerformanceModel().create(perf_data)
+    perf_id = StatsService.record_submission(perf_data, question)
     
     response_data = {
-        "status": "correct" if is_correct else "incorrect",
+        "status": verdict["status"],
         "test_results": perf_data["test_results"],
-        "performance_id": perf_id
+        "performance_id": perf_id,
+        "verdict_reused": reused
     }
     
     if efficiency_feedback:
@@ -430,12 +521,12 @@ def get_notes():
     if not batch_id:
         return error_response("NO_BATCH", "Student not assigned to batch", status_code=400)
     
-    # Query notes for this batch
-    filters = {"batch_id": batch_id}
-    
-    notes = NoteModel().query(**filters)
+    def build():
+        # Query notes for this batch
+        notes, next_cursor = paginated_query(NoteModel(), batch_id=batch_id)
+        return success_response({"notes": notes, "next_cursor": next_cursor})
     
-    return success_response({"notes": notes})
+    return scope_versions.conditional_get(("notes", batch_id, scope_versions.current("notes", batch_id)), build)
 
 
 # ============================================================================
@@ -456,15 +547,12 @@ def get_performance():
     if question_id:
         filters["question_id"] = question_id
     
-    performance = PerformanceModel().query(**filters)
+    performance, next_cursor = paginated_query(PerformanceModel(), **filters)
     
-    # Enriched performance data with question details
-    for p in performance:
-        q = QuestionModel().get(p.get("question_id"))
-        p["question_title"] = q.get("title") if q else "Unknown Question"
-        p["question_difficulty"] = q.get("difficulty") if q else "Medium"
+    # Add question title/difficulty and topic name (cached, batched reads)
+    PerformanceService.enrich(performance)
     
-    # Sort by submission time (descending)
+    # Sort by submission time (descending); with ?limit= this orders the current page
     performance.sort(key=lambda x: x.get("submitted_at"), reverse=True)
     
-    return success_response({"performance": performance})
+    return success_response({"performance": performance, "next_cursor": next_cursor})
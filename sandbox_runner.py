@@ -0,0 +1,370 @@
+"""Local sandboxed code execution.
+
+Submissions are written to a private temporary directory, compiled when the
+language needs it, and run as subprocesses under resource limits:
+
+- CPU time (RLIMIT_CPU) and wall-clock time (the process group is killed)
+  (rlimits are applied with prlimit(1) when installed, else in a preexec_fn)
+- memory: RLIMIT_AS for native code and Python; heap flags for the JVM and
+  Node, whose runtimes reserve far more address space than they use
+- output: stdout/stderr go to files capped with RLIMIT_FSIZE
+- no core dumps, a minimal environment, its own session/process group, and
+  optionally a different user (SANDBOX_UID, whose process count is then
+  capped at SANDBOX_MAX_PROCESSES against fork bombs)
+
+prepare() compiles once and returns a Program that can be run against many
+inputs (concurrently: every run gets its own subdirectory). run_code() is the
+one-shot form used by /run and /submit when CODE_RUNNER is "local".
+
+This is process-level isolation only. Untrusted code can still read files its
+user can read and open network connections; see the CODE_RUNNER notes in
+config.py.
+"""
+import logging
+import math
+import os
+import re
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from config import (
+    SANDBOX_TIME_LIMIT, SANDBOX_WALL_LIMIT, SANDBOX_MEMORY_MB, SANDBOX_OUTPUT_KB,
+    SANDBOX_COMPILE_TIME_LIMIT, SANDBOX_COMPILE_MEMORY_MB, SANDBOX_COMPILE_FSIZE_MB, SANDBOX_UID,
+    SANDBOX_MAX_PROCESSES
+)
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_COMPILE_ERROR = "compile_error"
+STATUS_RUNTIME_ERROR = "runtime_error"
+STATUS_TIME_LIMIT = "time_limit"
+STATUS_MEMORY_LIMIT = "memory_limit"
+STATUS_OUTPUT_LIMIT = "output_limit"
+STATUS_CANCELLED = "cancelled"
+
+# Per language: source file, toolchain binaries, compile and run commands.
+# {dir} is the program directory, {memory_mb} the run memory limit.
+LANGUAGES = {
+    "python": {
+        "source": "main.py",
+        "tools": [sys.executable],
+        "run": [sys.executable, "-I", "-S", "-B", "{dir}/main.py"],
+        "limit_address_space": True,
+    },
+    "c": {
+        "source": "main.c",
+        "tools": ["gcc"],
+        "compile": ["gcc", "-O2", "-std=gnu11", "-pipe", "-o", "main", "main.c", "-lm"],
+        "run": ["{dir}/main"],
+        "limit_address_space": True,
+    },
+    "cpp": {
+        "source": "main.cpp",
+        "tools": ["g++"],
+        "compile": ["g++", "-O2", "-std=gnu++17", "-pipe", "-o", "main", "main.cpp"],
+        "run": ["{dir}/main"],
+        "limit_address_space": True,
+    },
+    "java": {
+        "source": "{class_name}.java",
+        "tools": ["javac", "java"],
+        "compile": ["javac", f"-J-Xmx{SANDBOX_COMPILE_MEMORY_MB // 2}m", "-encoding", "UTF-8", "{class_name}.java"],
+        "run": ["java", "-Xmx{memory_mb}m", "-Xss64m", "-XX:+UseSerialGC", "-XX:TieredStopAtLevel=1",
+                "-cp", "{dir}", "{class_name}"],
+        "limit_address_space": False,
+    },
+    "javascript": {
+        "source": "main.js",
+        "tools": ["node"],
+        "run": ["node", "--max-old-space-size={memory_mb}", "--stack-size=65500", "{dir}/main.js"],
+        "limit_address_space": False,
+    },
+}
+
+# Runtime messages that mean the program ran out of memory
+_MEMORY_ERRORS = re.compile(r"MemoryError|std::bad_alloc|OutOfMemoryError|heap out of memory|Cannot allocate memory")
+_JAVA_CLASS = re.compile(r"public\s+(?:final\s+)?class\s+([A-Za-z_$][\w$]*)")
+
+_PRLIMIT = shutil.which("prlimit")
+
+
+def _tool_path(tool):
+    return tool if os.path.isabs(tool) else shutil.which(tool)
+
+
+def supported(language):
+    """Whether language can run locally (known and its toolchain is installed)."""
+    spec = LANGUAGES.get((language or "").lower())
+    return spec is not None and all(_tool_path(tool) for tool in spec["tools"])
+
+
+def _limited(command, cpu_seconds, memory_mb, fsize_bytes):
+    """Apply rlimits to command: via prlimit(1) when installed, else in a preexec_fn.
+
+    prlimit lets subprocess spawn without a preexec_fn (no full fork of the
+    worker, safe with threads) and execs straight into the command.
+
+    Returns:
+        (command, preexec_fn or None)
+    """
+    cpu = max(1, math.ceil(cpu_seconds))
+    memory = memory_mb * 1024 * 1024 if memory_mb else None
+    # RLIMIT_NPROC counts every process of the user, so only a dedicated one
+    nproc = SANDBOX_MAX_PROCESSES if SANDBOX_UID is not None and os.getuid() == 0 else None
+    if _PRLIMIT:
+        limits = [f"--cpu={cpu}:{cpu + 1}", f"--fsize={fsize_bytes}", "--core=0"]
+        if memory:
+            limits.append(f"--as={memory}")
+        if nproc:
+            limits.append(f"--nproc={nproc}")
+        return [_PRLIMIT, *limits, "--", *command], None
+
+    def apply():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (fsize_bytes, fsize_bytes))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        if memory:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        if nproc:
+            resource.setrlimit(resource.RLIMIT_NPROC, (nproc, nproc))
+    return command, apply
+
+
+def _peak_rss_kb(pid):
+    """High-water resident memory of a running process (0 once it has exited).
+
+    ru_maxrss cannot be used: Linux carries the spawning worker's own peak
+    across exec, so every run would report at least the worker's size.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _private_dir(parent=None):
+    path = tempfile.mkdtemp(prefix="sandbox-", dir=parent)
+    os.chmod(path, 0o700)
+    if SANDBOX_UID is not None and os.getuid() == 0:
+        os.chown(path, SANDBOX_UID, SANDBOX_UID)
+    return path
+
+
+def _kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _read_capped(path, limit):
+    with open(path, "rb") as f:
+        return f.read(limit).decode("utf-8", errors="replace")
+
+
+def _execute(command, cwd, stdin_text, cpu_limit, wall_limit, memory_mb, output_kb, cancel=None,
+             file_size_mb=None):
+    """Run command in cwd under limits and classify the outcome.
+
+    Args:
+        memory_mb: RLIMIT_AS in MB, or None for runtimes limited by flags
+        output_kb: Cap on captured stdout/stderr
+        file_size_mb: RLIMIT_FSIZE in MB for files the command writes (compilers
+            and linkers); None limits files to output_kb like the output
+        cancel: Optional threading.Event; setting it kills the run (status cancelled)
+
+    Returns:
+        dict: status, stdout, stderr, exit_code, time_ms (CPU), wall_ms and
+            memory_kb (sampled peak RSS; 0 for runs too short to sample)
+    """
+    output_bytes = output_kb * 1024
+    stdin_path = os.path.join(cwd, ".stdin")
+    stdout_path = os.path.join(cwd, ".stdout")
+    stderr_path = os.path.join(cwd, ".stderr")
+    with open(stdin_path, "w", encoding="utf-8") as f:
+        f.write(stdin_text or "")
+
+    env = {"PATH": "/usr/local/bin:/usr/bin:/bin", "LANG": "C.UTF-8", "HOME": cwd, "TMPDIR": cwd}
+    user = {}
+    if SANDBOX_UID is not None and os.getuid() == 0:
+        user = {"user": SANDBOX_UID, "group": SANDBOX_UID, "extra_groups": []}
+
+    fsize_bytes = file_size_mb * 1024 * 1024 if file_size_mb else output_bytes
+    command, preexec_fn = _limited(command, cpu_limit, memory_mb, fsize_bytes)
+    timed_out = cancelled = False
+    peak_kb = 0
+    with open(stdin_path, "rb") as stdin, open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            command, cwd=cwd, stdin=stdin, stdout=stdout, stderr=stderr, env=env,
+            start_new_session=True, close_fds=True, preexec_fn=preexec_fn, **user
+        )
+        # Poll (backing off to 20ms) to sample memory and enforce the wall limit;
+        # wait4 reaps the child and reports its own CPU time
+        deadline = started + wall_limit
+        delay = 0.001
+        while True:
+            peak_kb = max(peak_kb, _peak_rss_kb(proc.pid))
+            pid, wait_status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            if not timed_out and time.perf_counter() >= deadline:
+                timed_out = True
+                _kill_group(proc.pid)
+            if not cancelled and cancel is not None and cancel.is_set():
+                cancelled = True
+                _kill_group(proc.pid)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.02)
+        wall = time.perf_counter() - started
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+        # Leftover background children die with the group
+        _kill_group(proc.pid)
+
+    cpu = usage.ru_utime + usage.ru_stime
+    result = {
+        "stdout": _read_capped(stdout_path, output_bytes),
+        "stderr": _read_capped(stderr_path, output_bytes),
+        "exit_code": proc.returncode,
+        "time_ms": round(cpu * 1000, 1),
+        "wall_ms": round(wall * 1000, 1),
+        "memory_kb": peak_kb,
+    }
+
+    signum = -proc.returncode if proc.returncode < 0 else None
+    output_size = max(os.path.getsize(stdout_path), os.path.getsize(stderr_path))
+    if cancelled:
+        result["status"] = STATUS_CANCELLED
+    elif timed_out or signum == signal.SIGXCPU or cpu >= cpu_limit:
+        result["status"] = STATUS_TIME_LIMIT
+    elif signum == signal.SIGXFSZ or output_size >= output_bytes:
+        result["status"] = STATUS_OUTPUT_LIMIT
+    elif proc.returncode != 0 and _MEMORY_ERRORS.search(result["stderr"]):
+        result["status"] = STATUS_MEMORY_LIMIT
+    elif proc.returncode != 0:
+        result["status"] = STATUS_RUNTIME_ERROR
+    else:
+        result["status"] = STATUS_OK
+    return result
+
+
+class Program:
+    """A submission written (and compiled) in its private sandbox directory.
+
+    Picklable, so prepared programs can be handed to worker processes.
+    """
+
+    def __init__(self, language, workdir, command, limit_address_space):
+        self.language = language
+        self.workdir = workdir
+        self.command = command
+        self.limit_address_space = limit_address_space
+
+    def run(self, stdin="", time_limit=None, wall_limit=None, memory_mb=None, output_kb=None, cancel=None):
+        """Run the program once on stdin.
+
+        Args:
+            cancel: Optional threading.Event that stops the run early
+
+        Returns:
+            dict: status (ok, runtime_error, time_limit, memory_limit,
+                output_limit, cancelled), stdout, stderr, exit_code, time_ms,
+                wall_ms, memory_kb
+        """
+        time_limit = time_limit or SANDBOX_TIME_LIMIT
+        memory_mb = memory_mb or SANDBOX_MEMORY_MB
+        command = [part.replace("{memory_mb}", str(memory_mb)) for part in self.command]
+        run_dir = _private_dir(self.workdir)
+        try:
+            return _execute(
+                command, run_dir, stdin, time_limit, wall_limit or max(SANDBOX_WALL_LIMIT, time_limit),
+                memory_mb if self.limit_address_space else None, output_kb or SANDBOX_OUTPUT_KB, cancel
+            )
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+def prepare(code, language):
+    """Write and compile code.
+
+    Returns:
+        (Program, None) on success, or (None, result) where result has
+        status compile_error (stderr holds the compiler output)
+    """
+    language = language.lower()
+    spec = LANGUAGES[language]
+    match = _JAVA_CLASS.search(code) if language == "java" else None
+    names = {"class_name": match.group(1) if match else "Main"}
+
+    workdir = _private_dir()
+    try:
+        with open(os.path.join(workdir, spec["source"].format(**names)), "w", encoding="utf-8") as f:
+            f.write(code)
+
+        if "compile" in spec:
+            command = [part.format(**names) for part in spec["compile"]]
+            command[0] = _tool_path(command[0])
+            result = _execute(
+                command, workdir, "", SANDBOX_COMPILE_TIME_LIMIT, SANDBOX_COMPILE_TIME_LIMIT * 2,
+                SANDBOX_COMPILE_MEMORY_MB if spec["limit_address_space"] else None, SANDBOX_OUTPUT_KB,
+                file_size_mb=SANDBOX_COMPILE_FSIZE_MB
+            )
+            if result["status"] != STATUS_OK:
+                if result["status"] == STATUS_TIME_LIMIT:
+                    result["stderr"] = f"Compilation timed out ({SANDBOX_COMPILE_TIME_LIMIT:g}s)"
+                result["status"] = STATUS_COMPILE_ERROR
+                shutil.rmtree(workdir, ignore_errors=True)
+                return None, result
+
+        # {memory_mb} is filled in per run
+        command = [part.replace("{dir}", workdir).format(memory_mb="{memory_mb}", **names) for part in spec["run"]]
+        command[0] = _tool_path(command[0]) or command[0]
+        if SANDBOX_UID is not None and os.getuid() == 0:
+            for name in os.listdir(workdir):
+                os.chown(os.path.join(workdir, name), SANDBOX_UID, SANDBOX_UID)
+        return Program(language, workdir, command, spec["limit_address_space"]), None
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+
+def run_code(code, language, stdin=""):
+    """Compile (if needed) and run code once; see Program.run for the result."""
+    program, failure = prepare(code, language)
+    if failure is not None:
+        return failure
+    with program:
+        return program.run(stdin)
+
+
+def describe_failure(result):
+    """Human-readable error message for a non-ok result."""
+    status = result["status"]
+    if status == STATUS_COMPILE_ERROR:
+        return f"Compilation error:\n{result['stderr'].strip()}"
+    if status == STATUS_TIME_LIMIT:
+        return f"Time limit exceeded ({SANDBOX_TIME_LIMIT:g}s)"
+    if status == STATUS_MEMORY_LIMIT:
+        return f"Memory limit exceeded ({SANDBOX_MEMORY_MB} MB)"
+    if status == STATUS_OUTPUT_LIMIT:
+        return f"Output limit exceeded ({SANDBOX_OUTPUT_KB} KB)"
+    return result["stderr"].strip() or f"Process exited with code {result['exit_code']}"
@@ -0,0 +1,81 @@
+"""Per-scope version counters for conditional GETs.
+
+Every create/update/delete of a question, topic or note bumps the counter of
+its (collection, batch) scope in scope_versions/{collection}_{batch_id}.
+Student list endpoints derive a strong ETag from the counter (plus the
+request path/query and any per-student state), so a poll with a matching
+If-None-Match gets a 304 after one small counter read, without querying the
+list itself.
+
+Counters are bumped after the write commits: a client that races the bump
+may cache fresh data under the old tag, but the bump then changes the tag
+and the next poll refetches. Never the reverse.
+"""
+import hashlib
+import json
+import logging
+
+from flask import request, make_response
+
+from models import ScopeVersionModel
+from storage import Increment
+
+logger = logging.getLogger(__name__)
+
+
+def _version_id(collection, batch_id):
+    return f"{collection}_{batch_id}"
+
+
+def bump(collection, batch_id):
+    """Increment the version of a (collection, batch) scope after a write."""
+    if not batch_id:
+        return
+    model = ScopeVersionModel()
+    doc_id = _version_id(collection, batch_id)
+    try:
+        model.backend.set(model.collection_name, doc_id, {
+            "collection": collection,
+            "batch_id": batch_id,
+            "version": Increment(1)
+        }, merge=True)
+        model.invalidate(doc_id)
+    except Exception as e:
+        # A missed bump only delays cache revalidation; never fail the write
+        logger.error(f"Failed to bump version of {doc_id}: {e}")
+
+
+def current(collection, batch_id):
+    """Get the version of a (collection, batch) scope (0 if never bumped)."""
+    doc = ScopeVersionModel().get(_version_id(collection, batch_id))
+    return (doc or {}).get("version", 0)
+
+
+def etag_for(*parts):
+    """Strong ETag value (unquoted) for the given JSON-serializable parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def conditional_get(parts, build):
+    """Return 304 when If-None-Match matches the scope's ETag, else build() with an ETag.
+
+    Args:
+        parts: Values identifying the response content, e.g.
+            ("topics", batch_id, current("topics", batch_id))
+        build: Callable producing the full response
+
+    Returns:
+        Response
+    """
+    tag = etag_for(request.full_path, *parts)
+    # Weak comparison: compressed responses carry the tag as W/"..."
+    if request.if_none_match.contains_weak(tag):
+        response = make_response("", 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(tag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,297 @@
+"""Materialized performance aggregates.
+
+Each submission is written together with increments to the submitting
+student's student_stats document in a single atomic batch, so dashboards can
+read one small document per student instead of every performance record.
+
+student_stats/{student_id}:
+    student_id, batch_id, department_id, college_id, last_submitted_at,
+    attempts, correct, incorrect, execution_error,
+    by_difficulty: {difficulty: {attempts, correct, incorrect, execution_error}},
+    by_topic: {topic_id: {attempts, correct, incorrect, execution_error}}
+
+The same batch maintains the student's progress document, which question
+lists read with a single get instead of the whole submission history:
+
+student_progress/{student_id}:
+    student_id, backfilled,
+    questions: {question_id: {attempts, correct, incorrect, execution_error,
+                              last_status, last_submitted_at}}
+
+backfilled marks a document that covers the student's whole history. The
+first submission of a student without one (e.g. their first since the
+document was introduced) seeds it from the existing performance records in
+the same batch; until then readers fall back to the history.
+"""
+from datetime import datetime
+
+from storage import BATCH_WRITE_LIMIT, Increment, get_backend
+from models import PerformanceModel, StudentStatsModel, StudentProgressModel, QuestionModel, JobModel
+import rollup_service
+
+STATUSES = ("correct", "incorrect", "execution_error")
+COUNTERS = ("attempts",) + STATUSES
+
+# Performance fields the stats and progress documents are computed from
+RECORD_FIELDS = ("student_id", "question_id", "batch_id", "department_id", "college_id", "status", "submitted_at")
+REBUILD_CHECKPOINT_ID = "backfill_student_stats"
+DEFAULT_REBUILD_PAGE_SIZE = 100  # Students per page
+
+
+def _difficulty_key(question):
+    value = str((question or {}).get("difficulty") or "").strip()
+    return value.lower() if value else "unknown"
+
+
+def _topic_key(question):
+    return (question or {}).get("topic_id") or "none"
+
+
+def _counter_increments(status, count=1):
+    counts = {"attempts": Increment(count)}
+    if status in STATUSES:
+        counts[status] = Increment(count)
+    return counts
+
+
+def stats_op(perf_data, question):
+    """Build the student_stats merge operation for one submission."""
+    status = perf_data.get("status")
+    counts = _counter_increments(status)
+    update = {
+        "student_id": perf_data.get("student_id"),
+        "batch_id": perf_data.get("batch_id"),
+        "department_id": perf_data.get("department_id"),
+        "college_id": perf_data.get("college_id"),
+        "last_submitted_at": perf_data.get("submitted_at"),
+        **counts,
+        "by_difficulty": {_difficulty_key(question): dict(counts)},
+        "by_topic": {_topic_key(question): dict(counts)},
+    }
+    return ("merge", StudentStatsModel().collection_name, perf_data.get("student_id"), update)
+
+
+def progress_op(perf_data):
+    """Build the student_progress merge operation for one submission."""
+    update = {
+        "student_id": perf_data.get("student_id"),
+        "questions": {
+            perf_data.get("question_id"): {
+                **_counter_increments(perf_data.get("status")),
+                "last_status": perf_data.get("status"),
+                "last_submitted_at": perf_data.get("submitted_at"),
+            }
+        },
+    }
+    return ("merge", StudentProgressModel().collection_name, perf_data.get("student_id"), update)
+
+
+def _progress_entries(records):
+    """Build the progress document's questions map from performance records."""
+    progress = {}
+    for record in sorted(records, key=lambda r: str(r.get("submitted_at") or "")):
+        status = record.get("status")
+        entry = progress.setdefault(record.get("question_id"), {"attempts": 0})
+        entry["attempts"] += 1
+        if status in STATUSES:
+            entry[status] = entry.get(status, 0) + 1
+        entry["last_status"] = status
+        entry["last_submitted_at"] = record.get("submitted_at")
+    return progress
+
+
+def _progress_doc(student_id, records):
+    return {"student_id": student_id, "backfilled": True, "questions": _progress_entries(records)}
+
+
+def best_status(entry):
+    """Best status reached on a question from its progress entry (None if never attempted)."""
+    for status in STATUSES:
+        if (entry or {}).get(status):
+            return status
+    return (entry or {}).get("last_status")
+
+
+class StatsService:
+    """Service for recording submissions and reading aggregates."""
+
+    @staticmethod
+    def record_submission(perf_data, question, extra_ops=None):
+        """Store a performance record and update aggregates and progress atomically.
+
+        The daily rollups are incremented afterwards, outside the batch, so
+        contention on a hot rollup bucket cannot fail the submission.
+
+        Args:
+            perf_data: Performance document to create
+            question: The question document (for difficulty/topic buckets)
+            extra_ops: Further batch operations to commit in the same batch
+
+        Returns:
+            str: New performance record ID
+        """
+        perf_model = PerformanceModel()
+        student_id = perf_data.get("student_id")
+        perf_id, create = perf_model.create_op(perf_data)
+        operations = [create, stats_op(perf_data, question)]
+        # Seed the progress document from the earlier history before counting this submission
+        if not (StudentProgressModel().get(student_id) or {}).get("backfilled"):
+            history = perf_model.query(student_id=student_id)
+            operations.append(("set", StudentProgressModel().collection_name, student_id,
+                               _progress_doc(student_id, history)))
+        operations += [progress_op(perf_data)] + list(extra_ops or [])
+        get_backend().batch_write(operations)
+        rollup_service.record(perf_data)
+
+        perf_model.invalidate(perf_id)
+        StudentStatsModel().invalidate(student_id)
+        StudentProgressModel().invalidate(student_id)
+        return perf_id
+
+    @staticmethod
+    def summarize(**filters):
+        """Combine student_stats documents matching scope filters into totals.
+
+        Args:
+            **filters: Optional college_id / department_id / batch_id
+
+        Returns:
+            dict: Totals, solve rate and per-difficulty / per-topic breakdowns
+        """
+        totals = dict.fromkeys(COUNTERS, 0)
+        by_difficulty = {}
+        by_topic = {}
+        students = StudentStatsModel().query(**filters)
+
+        def add(target, counts):
+            for key in COUNTERS:
+                target[key] = target.get(key, 0) + (counts.get(key) or 0)
+
+        for doc in students:
+            add(totals, doc)
+            for key, counts in (doc.get("by_difficulty") or {}).items():
+                add(by_difficulty.setdefault(key, {}), counts)
+            for key, counts in (doc.get("by_topic") or {}).items():
+                add(by_topic.setdefault(key, {}), counts)
+
+        return {
+            "students": len(students),
+            "active_students": sum(1 for doc in students if doc.get("attempts")),
+            "totals": totals,
+            "solve_rate": round(totals["correct"] / totals["attempts"], 4) if totals["attempts"] else 0.0,
+            "by_difficulty": by_difficulty,
+            "by_topic": by_topic,
+        }
+
+    @staticmethod
+    def rebuild(student_ids=None, page_size=DEFAULT_REBUILD_PAGE_SIZE, start_after=None, progress=None):
+        """Recompute student_stats and student_progress from raw performance records (backfill).
+
+        Students are rebuilt in pages of page_size, in student ID order: each
+        page reads only its students' records, projected to RECORD_FIELDS.
+        A full rebuild first collects the IDs of students with submissions
+        (reading just student_id) and is resumable: the cursor is
+        checkpointed in jobs/backfill_student_stats after every page, and a
+        run without start_after continues from an unfinished run's checkpoint.
+
+        Args:
+            student_ids: Students to rebuild (None = every student with submissions)
+            page_size: Students rebuilt per page
+            start_after: Student ID to resume after (full rebuilds; overrides the checkpoint)
+            progress: Optional callable(checkpoint dict) after each page
+
+        Returns:
+            int: Number of students rebuilt
+        """
+        backend = get_backend()
+        jobs = JobModel().collection_name
+        full = student_ids is None
+        if full:
+            checkpoint = backend.get(jobs, REBUILD_CHECKPOINT_ID) or {}
+            if start_after is None and checkpoint.get("status") == "running":
+                start_after = checkpoint.get("cursor")
+            student_ids = StatsService._students_with_submissions()
+
+        pending = sorted(sid for sid in set(student_ids) if sid and (start_after is None or sid > start_after))
+        rebuilt = 0
+        for start in range(0, max(len(pending), 1), page_size):
+            page = pending[start:start + page_size]
+            rebuilt += StatsService._rebuild_students(page)
+            cursor = page[-1] if start + page_size < len(pending) else None
+            state = {
+                "kind": REBUILD_CHECKPOINT_ID,
+                "status": "running" if cursor else "succeeded",
+                "cursor": cursor,
+                "rebuilt": rebuilt,
+                "updated_at": datetime.utcnow(),
+            }
+            if full:
+                backend.set(jobs, REBUILD_CHECKPOINT_ID, state, merge=True)
+            if progress:
+                progress(state)
+        return rebuilt
+
+    @staticmethod
+    def _students_with_submissions():
+        """IDs of every student with a performance record (reads only student_id)."""
+        model = PerformanceModel()
+        student_ids = set()
+        cursor = None
+        while True:
+            page, cursor = model.query_page(limit=BATCH_WRITE_LIMIT, start_after=cursor, fields=("student_id",))
+            student_ids.update(record.get("student_id") for record in page)
+            if cursor is None:
+                return student_ids
+
+    @staticmethod
+    def _rebuild_students(student_ids):
+        """Rewrite the stats and progress documents of the given students.
+
+        Returns:
+            int: Number of students with submissions
+        """
+        if not student_ids:
+            return 0
+        records = PerformanceModel().query_in("student_id", list(student_ids), fields=RECORD_FIELDS)
+
+        questions = QuestionModel().get_many(r.get("question_id") for r in records)
+        by_student = {}
+        for record in records:
+            if record.get("student_id"):
+                by_student.setdefault(record["student_id"], []).append(record)
+
+        operations = []
+        for student_id, student_records in by_student.items():
+            first = student_records[0]
+            stats = {
+                "student_id": student_id,
+                "batch_id": first.get("batch_id"),
+                "department_id": first.get("department_id"),
+                "college_id": first.get("college_id"),
+                "last_submitted_at": max((r.get("submitted_at") for r in student_records if r.get("submitted_at")), default=None),
+                **dict.fromkeys(COUNTERS, 0),
+                "by_difficulty": {},
+                "by_topic": {},
+            }
+            for record in student_records:
+                question = questions.get(record.get("question_id"))
+                status = record.get("status")
+                buckets = (
+                    stats,
+                    stats["by_difficulty"].setdefault(_difficulty_key(question), dict.fromkeys(COUNTERS, 0)),
+                    stats["by_topic"].setdefault(_topic_key(question), dict.fromkeys(COUNTERS, 0)),
+                )
+                for bucket in buckets:
+                    bucket["attempts"] += 1
+                    if status in STATUSES:
+                        bucket[status] += 1
+            operations.append(("set", StudentStatsModel().collection_name, student_id, stats))
+
+            operations.append(("set", StudentProgressModel().collection_name, student_id,
+                               _progress_doc(student_id, student_records)))
+
+        get_backend().batch_write(operations)
+        for student_id in by_student:
+            StudentStatsModel().invalidate(student_id)
+            StudentProgressModel().invalidate(student_id)
+        return len(by_student)
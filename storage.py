@@ -0,0 +1,605 @@
+"""Pluggable storage backends behind FirestoreModel.
+
+The production backend talks to Cloud Firestore. The in-memory and SQLite
+backends implement the same equality-filter semantics so the Flask app can
+run offline (local development, CI, load tests). Select one with the
+STORAGE_BACKEND environment variable.
+"""
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import STORAGE_BACKEND, STORAGE_SQLITE_PATH, STORAGE_LATENCY_MS
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of document references sent in a single get_all() call
+GET_ALL_CHUNK_SIZE = 100
+
+# Firestore rejects write batches with more than 500 operations
+BATCH_WRITE_LIMIT = 500
+
+# Attempts per write batch before giving up (transient errors are retried with backoff)
+BATCH_WRITE_RETRIES = 3
+
+# Firestore "in" filters accept at most 30 values
+QUERY_IN_LIMIT = 30
+
+_MISSING = object()
+
+
+class DocumentNotFoundError(Exception):
+    """Raised when updating a document that does not exist."""
+
+
+class Increment:
+    """Atomic numeric increment usable as a value in set(merge=True)/update().
+
+    Mirrors google.cloud.firestore.Increment: a missing field starts at 0.
+    """
+
+    def __init__(self, amount=1):
+        self.amount = amount
+
+    def __repr__(self):
+        return f"Increment({self.amount})"
+
+
+def _incremented(current, value):
+    if isinstance(value, Increment):
+        return (current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0) + value.amount
+    return copy.deepcopy(value)
+
+
+class StorageBackend:
+    """Interface implemented by every storage engine.
+
+    Documents are plain dicts without the "id" key; the model layer adds it.
+    Batch operations are tuples of (op, collection, doc_id, data) where op is
+    "set", "merge" (set with merge=True), "update" or "delete". Values may be
+    Increment(n) in "merge"/"update" operations.
+    """
+
+    name = "base"
+
+    def set(self, collection, doc_id, data, merge=False):
+        """Create or overwrite a document."""
+        raise NotImplementedError
+
+    def get(self, collection, doc_id):
+        """Return the document dict or None."""
+        raise NotImplementedError
+
+    def get_many(self, collection, doc_ids):
+        """Return {doc_id: document} for every existing document."""
+        raise NotImplementedError
+
+    def update(self, collection, doc_id, data):
+        """Update fields of an existing document."""
+        raise NotImplementedError
+
+    def delete(self, collection, doc_id):
+        """Delete a document (no error if it does not exist)."""
+        raise NotImplementedError
+
+    def query(self, collection, filters, limit=None, start_after=None, fields=None):
+        """Return [(doc_id, document), ...] matching all equality filters.
+
+        With limit/start_after the results are ordered by document ID and
+        only documents after `start_after` are returned (cursor pagination).
+        With fields, documents only carry those top-level fields (a
+        projection: the other fields are never read or transferred).
+        """
+        raise NotImplementedError
+
+    def query_in(self, collection, field, values, filters=None, fields=None):
+        """Return [(doc_id, document), ...] whose field equals any of values.
+
+        Values are sent in chunks of QUERY_IN_LIMIT, so this costs one
+        round-trip per 30 values instead of one per value. fields projects
+        the documents as in query().
+        """
+        unique_values = list(dict.fromkeys(values))
+        results = []
+        for start in range(0, len(unique_values), QUERY_IN_LIMIT):
+            results.extend(self._query_in_chunk(
+                collection, field, unique_values[start:start + QUERY_IN_LIMIT], filters or {}, fields
+            ))
+        return results
+
+    def _query_in_chunk(self, collection, field, values, filters, fields):
+        raise NotImplementedError
+
+    def batch_write(self, operations, retries=BATCH_WRITE_RETRIES):
+        """Apply write operations in chunks of BATCH_WRITE_LIMIT.
+
+        Each chunk is committed atomically and retried with exponential
+        backoff on failure; chunks already committed are not rolled back.
+
+        Returns:
+            int: Number of operations written
+        """
+        operations = list(operations)
+        for start in range(0, len(operations), BATCH_WRITE_LIMIT):
+            chunk = operations[start:start + BATCH_WRITE_LIMIT]
+            for attempt in range(1, retries + 1):
+                try:
+                    self._commit_chunk(chunk)
+                    break
+                except Exception as e:
+                    if attempt == retries:
+                        raise
+                    logger.warning(f"Batch write of {len(chunk)} ops failed (attempt {attempt}/{retries}): {e}")
+                    time.sleep(0.1 * 2 ** (attempt - 1))
+        return len(operations)
+
+    def _commit_chunk(self, operations):
+        raise NotImplementedError
+
+
+def _to_firestore(data):
+    """Replace storage.Increment values with Firestore transforms."""
+    from google.cloud import firestore
+    if isinstance(data, Increment):
+        return firestore.Increment(data.amount)
+    if isinstance(data, dict):
+        return {key: _to_firestore(value) for key, value in data.items()}
+    return data
+
+
+class FirestoreBackend(StorageBackend):
+    """Cloud Firestore backend (production)."""
+
+    name = "firestore"
+
+    def __init__(self, db):
+        self.db = db
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.db.collection(collection).document(doc_id).set(_to_firestore(data), merge=merge)
+
+    def get(self, collection, doc_id):
+        doc = self.db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_many(self, collection, doc_ids):
+        unique_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+        collection_ref = self.db.collection(collection)
+
+        docs = {}
+        for start in range(0, len(unique_ids), GET_ALL_CHUNK_SIZE):
+            refs = [collection_ref.document(doc_id) for doc_id in unique_ids[start:start + GET_ALL_CHUNK_SIZE]]
+            for doc in self.db.get_all(refs):
+                if doc.exists:
+                    docs[doc.id] = doc.to_dict()
+        return docs
+
+    def update(self, collection, doc_id, data):
+        self.db.collection(collection).document(doc_id).update(_to_firestore(data))
+
+    def delete(self, collection, doc_id):
+        self.db.collection(collection).document(doc_id).delete()
+
+    def query(self, collection, filters, limit=None, start_after=None, fields=None):
+        query = self.db.collection(collection)
+        for key, value in filters.items():
+            query = query.where(key, "==", value)
+        if fields is not None:
+            query = query.select(list(fields))
+        if limit is not None or start_after is not None:
+            query = query.order_by("__name__")
+            if start_after is not None:
+                query = query.start_after({"__name__": start_after})
+            if limit is not None:
+                query = query.limit(limit)
+        return [(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    def _query_in_chunk(self, collection, field, values, filters, fields):
+        query = self.db.collection(collection).where(field, "in", values)
+        for key, value in filters.items():
+            query = query.where(key, "==", value)
+        if fields is not None:
+            query = query.select(list(fields))
+        return [(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    def _commit_chunk(self, operations):
+        batch = self.db.batch()
+        for op, collection, doc_id, data in operations:
+            ref = self.db.collection(collection).document(doc_id)
+            if op == "set":
+                batch.set(ref, _to_firestore(data))
+            elif op == "merge":
+                batch.set(ref, _to_firestore(data), merge=True)
+            elif op == "update":
+                batch.update(ref, _to_firestore(data))
+            elif op == "delete":
+                batch.delete(ref)
+            else:
+                raise ValueError(f"Unknown batch operation: {op}")
+        batch.commit()
+
+
+# ============================================================================
+# LOCAL BACKENDS
+# ============================================================================
+
+def _lookup(data, field_path):
+    """Resolve a dotted field path ("a.b.c") inside a document."""
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _values_equal(actual, expected):
+    """Firestore equality: booleans never match numbers, 1 == 1.0 does."""
+    if isinstance(actual, bool) or isinstance(expected, bool):
+        return isinstance(actual, bool) and isinstance(expected, bool) and actual == expected
+    return actual == expected
+
+
+def _project(data, fields):
+    """Keep only the given top-level fields (all of them when fields is None)."""
+    if fields is None:
+        return data
+    return {key: data[key] for key in fields if key in data}
+
+
+def _matches(data, filters):
+    for key, expected in filters.items():
+        actual = _lookup(data, key)
+        if actual is _MISSING or not _values_equal(actual, expected):
+            return False
+    return True
+
+
+def _apply_update(data, updates):
+    """Apply an update() payload, honouring dotted field paths."""
+    for key, value in updates.items():
+        target = data
+        parts = key.split(".")
+        for part in parts[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        target[parts[-1]] = _incremented(target.get(parts[-1]), value)
+
+
+def _merge(data, updates):
+    """Recursive merge used by set(..., merge=True)."""
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            _merge(data[key], value)
+        elif isinstance(value, dict):
+            data[key] = {}
+            _merge(data[key], value)
+        else:
+            data[key] = _incremented(data.get(key), value)
+
+
+class _LocalSnapshot:
+    """Minimal DocumentSnapshot look-alike returned by the local facade."""
+
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return self._data
+
+
+class _LocalDocumentRef:
+    """Minimal DocumentReference look-alike for direct db.collection() callers."""
+
+    def __init__(self, backend, collection, doc_id):
+        self._backend = backend
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data, merge=False):
+        self._backend.set(self._collection, self.id, data, merge=merge)
+
+    def update(self, data):
+        self._backend.update(self._collection, self.id, data)
+
+    def get(self):
+        return _LocalSnapshot(self.id, self._backend.get(self._collection, self.id))
+
+    def delete(self):
+        self._backend.delete(self._collection, self.id)
+
+
+class _LocalCollectionRef:
+    """Minimal CollectionReference look-alike."""
+
+    def __init__(self, backend, collection):
+        self._backend = backend
+        self._collection = collection
+
+    def document(self, doc_id):
+        return _LocalDocumentRef(self._backend, self._collection, doc_id)
+
+
+class LocalBackend(StorageBackend):
+    """Shared behaviour for the offline engines.
+
+    Every public call sleeps for `latency_ms` first so that round-trip costs
+    can be simulated when benchmarking. Local backends also expose
+    collection()/document() so code that talks to firebase_init.db directly
+    keeps working.
+    """
+
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+        self.lock = threading.RLock()
+
+    def _simulate_latency(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def collection(self, collection):
+        return _LocalCollectionRef(self, collection)
+
+    def set(self, collection, doc_id, data, merge=False):
+        self._simulate_latency()
+        with self.lock:
+            self._set(collection, doc_id, data, merge)
+
+    def get(self, collection, doc_id):
+        self._simulate_latency()
+        with self.lock:
+            return self._load(collection, doc_id)
+
+    def get_many(self, collection, doc_ids):
+        unique_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+        docs = {}
+        for start in range(0, len(unique_ids), GET_ALL_CHUNK_SIZE):
+            self._simulate_latency()
+            with self.lock:
+                for doc_id in unique_ids[start:start + GET_ALL_CHUNK_SIZE]:
+                    data = self._load(collection, doc_id)
+                    if data is not None:
+                        docs[doc_id] = data
+        return docs
+
+    def update(self, collection, doc_id, data):
+        self._simulate_latency()
+        with self.lock:
+            self._update(collection, doc_id, data)
+
+    def delete(self, collection, doc_id):
+        self._simulate_latency()
+        with self.lock:
+            self._delete(collection, doc_id)
+
+    def query(self, collection, filters, limit=None, start_after=None, fields=None):
+        self._simulate_latency()
+        with self.lock:
+            results = self._query(collection, filters, limit, start_after)
+        return [(doc_id, _project(data, fields)) for doc_id, data in results]
+
+    def _query_in_chunk(self, collection, field, values, filters, fields):
+        self._simulate_latency()
+        with self.lock:
+            results = self._query(collection, filters, None, None)
+        return [
+            (doc_id, _project(data, fields)) for doc_id, data in results
+            if any(_values_equal(_lookup(data, field), value) for value in values)
+        ]
+
+    def _commit_chunk(self, operations):
+        self._simulate_latency()
+        with self.lock:
+            for op, collection, doc_id, data in operations:
+                if op == "set":
+                    self._set(collection, doc_id, data, False)
+                elif op == "merge":
+                    self._set(collection, doc_id, data, True)
+                elif op == "update":
+                    self._update(collection, doc_id, data)
+                elif op == "delete":
+                    self._delete(collection, doc_id)
+                else:
+                    raise ValueError(f"Unknown batch operation: {op}")
+
+    def _update(self, collection, doc_id, data):
+        current = self._load(collection, doc_id)
+        if current is None:
+            raise DocumentNotFoundError(f"No document to update: {collection}/{doc_id}")
+        _apply_update(current, data)
+        self._store(collection, doc_id, current)
+
+    def _set(self, collection, doc_id, data, merge):
+        current = self._load(collection, doc_id) if merge else None
+        if current is None:
+            current = {}
+        _merge(current, data)
+        self._store(collection, doc_id, current)
+
+    def _load(self, collection, doc_id):
+        raise NotImplementedError
+
+    def _store(self, collection, doc_id, data):
+        raise NotImplementedError
+
+    def _delete(self, collection, doc_id):
+        raise NotImplementedError
+
+    def _query(self, collection, filters, limit, start_after):
+        raise NotImplementedError
+
+
+class MemoryBackend(LocalBackend):
+    """Process-local dict storage. Documents are deep-copied in and out."""
+
+    name = "memory"
+
+    def __init__(self, latency_ms=0):
+        super().__init__(latency_ms)
+        self.collections = {}
+
+    def _load(self, collection, doc_id):
+        data = self.collections.get(collection, {}).get(doc_id)
+        return copy.deepcopy(data) if data is not None else None
+
+    def _store(self, collection, doc_id, data):
+        self.collections.setdefault(collection, {})[doc_id] = copy.deepcopy(data)
+
+    def _delete(self, collection, doc_id):
+        self.collections.get(collection, {}).pop(doc_id, None)
+
+    def _query(self, collection, filters, limit, start_after):
+        docs = self.collections.get(collection, {})
+        results = []
+        for doc_id in sorted(docs):
+            if start_after is not None and doc_id <= start_after:
+                continue
+            if limit is not None and len(results) >= limit:
+                break
+            if _matches(docs[doc_id], filters):
+                results.append((doc_id, copy.deepcopy(docs[doc_id])))
+        return results
+
+    def clear(self):
+        """Drop every collection (used by tests)."""
+        with self.lock:
+            self.collections.clear()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj):
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class SQLiteBackend(LocalBackend):
+    """SQLite storage: one row per document, JSON body, filters via json_extract."""
+
+    name = "sqlite"
+
+    def __init__(self, path, latency_ms=0):
+        super().__init__(latency_ms)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " collection TEXT NOT NULL,"
+            " doc_id TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (collection, doc_id))"
+        )
+
+    def _load(self, collection, doc_id):
+        row = self.conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND doc_id = ?",
+            (collection, doc_id)
+        ).fetchone()
+        return json.loads(row[0], object_hook=_json_object_hook) if row else None
+
+    def _store(self, collection, doc_id, data):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents (collection, doc_id, data) VALUES (?, ?, ?)",
+            (collection, doc_id, json.dumps(data, default=_json_default))
+        )
+
+    def _delete(self, collection, doc_id):
+        self.conn.execute(
+            "DELETE FROM documents WHERE collection = ? AND doc_id = ?",
+            (collection, doc_id)
+        )
+
+    def _query(self, collection, filters, limit, start_after):
+        clauses = ["collection = ?"]
+        params = [collection]
+        if start_after is not None:
+            clauses.append("doc_id > ?")
+            params.append(start_after)
+        post_filters = {}
+
+        for key, value in filters.items():
+            path = "$." + ".".join(f'"{part}"' for part in key.split("."))
+            if value is None:
+                clauses.append("json_type(data, ?) = 'null'")
+                params.append(path)
+            elif isinstance(value, bool):
+                clauses.append("json_type(data, ?) = ?")
+                params.extend([path, "true" if value else "false"])
+            elif isinstance(value, (int, float)):
+                clauses.append("json_type(data, ?) IN ('integer', 'real') AND json_extract(data, ?) = ?")
+                params.extend([path, path, value])
+            elif isinstance(value, str):
+                clauses.append("json_type(data, ?) = 'text' AND json_extract(data, ?) = ?")
+                params.extend([path, path, value])
+            else:
+                # Maps, arrays and timestamps are compared after decoding
+                post_filters[key] = value
+
+        sql = f"SELECT doc_id, data FROM documents WHERE {' AND '.join(clauses)} ORDER BY doc_id"
+        if limit is not None and not post_filters:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        results = []
+        for doc_id, raw in self.conn.execute(sql, params):
+            if limit is not None and len(results) >= limit:
+                break
+            data = json.loads(raw, object_hook=_json_object_hook)
+            if _matches(data, post_filters):
+                results.append((doc_id, data))
+        return results
+
+    def clear(self):
+        """Drop every document (used by tests)."""
+        with self.lock:
+            self.conn.execute("DELETE FROM documents")
+
+
+# ============================================================================
+# BACKEND SELECTION
+# ============================================================================
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(kind, sqlite_path=STORAGE_SQLITE_PATH, latency_ms=STORAGE_LATENCY_MS):
+    """Build a backend by name ("firestore", "memory" or "sqlite")."""
+    if kind == "firestore":
+        from firebase_init import get_db
+        return FirestoreBackend(get_db())
+    if kind == "memory":
+        return MemoryBackend(latency_ms=latency_ms)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path, latency_ms=latency_ms)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {kind}. Use firestore, memory or sqlite")
+
+
+def get_backend():
+    """Get the process-wide storage backend selected by STORAGE_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(STORAGE_BACKEND)
+                logger.info(f"Using '{_backend.name}' storage backend")
+    return _backend
+
+
+def is_local_backend():
+    """True when the app runs without Firestore (memory or sqlite)."""
+    return STORAGE_BACKEND != "firestore"
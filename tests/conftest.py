@@ -0,0 +1,17 @@
+import os
+
+# Run the suite against the in-memory storage backend (no Firebase credentials needed)
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_hierarchy_cache():
+    """Keep the process-wide caches and hierarchy index from leaking between tests."""
+    import hierarchy_index
+    from hierarchy_cache import hierarchy_cache, enrichment_cache
+    hierarchy_cache.clear()
+    enrichment_cache.clear()
+    hierarchy_index.clear()
+    yield
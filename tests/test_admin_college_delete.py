@@ -1,32 +1,22 @@
 from app import app
 from auth import create_jwt_token
+from job_service import JobService
+from models import CollegeModel, DepartmentModel
+from storage import get_backend
 
 
-def test_college_delete(monkeypatch):
-    storage = {"colleges": {}}
-
-    class FakeCollege:
-        def create(self, data):
-            cid = 'col-1'
-            storage['colleges'][cid] = data
-            return cid
-        def get(self, cid):
-            val = storage['colleges'].get(cid)
-            return (val and {**val, 'id': cid})
-        def query(self, **filters):
-            return [{**v, 'id': k} for k, v in storage['colleges'].items()]
-        def hard_delete(self, cid):
-            if cid in storage['colleges']:
-                del storage['colleges'][cid]
-
-    monkeypatch.setattr('routes.admin.CollegeModel', lambda: FakeCollege())
+def test_college_delete():
+    # The cascade resolves its models itself (cascade_service/models), so the
+    # test goes through the real models on the in-memory backend
+    get_backend().clear()
 
     client = app.test_client()
     token = create_jwt_token({'role': 'admin', 'admin_id': 'admin-1'})
     headers = {'Authorization': f'Bearer {token}'}
 
     # Create a college via the model directly
-    cid = FakeCollege().create({'name': 'X', 'email': 'x@test'})
+    cid = CollegeModel().create({'name': 'X', 'email': 'x@test', 'is_disabled': False})
+    dept_id = DepartmentModel().create({'name': 'CS', 'college_id': cid, 'is_disabled': False})
 
     # Verify it's present
     rv = client.get('/api/admin/colleges', headers=headers)
@@ -34,9 +24,13 @@ def test_college_delete(monkeypatch):
     data = rv.get_json()
     assert len(data['data']['colleges']) == 1
 
-    # Delete
+    # Delete (runs as a background job)
     rv = client.delete(f'/api/admin/colleges/{cid}', headers=headers)
-    assert rv.status_code == 200
+    assert rv.status_code == 202
+    job = JobService.wait(rv.get_json()['data']['job_id'], timeout=10)
+    assert job['status'] == 'succeeded'
+    assert CollegeModel().get(cid) is None
+    assert DepartmentModel().get(dept_id) is None
 
     # List should be empty now
     rv = client.get('/api/admin/colleges', headers=headers)
@@ -0,0 +1,82 @@
+from app import app
+from auth import create_jwt_token
+from analytics_service import (
+    CohortFrame, FRAME_FIELDS, topic_solve_rates, student_percentiles, difficulty_histogram, overview
+)
+from bench_analytics import (
+    synthetic_records, synthetic_questions,
+    loop_topic_solve_rates, loop_student_percentiles, loop_difficulty_histogram
+)
+from models import PerformanceModel, QuestionModel
+from storage import get_backend
+
+
+def test_vectorized_statistics_match_python_loops():
+    records = synthetic_records(3000, 60, 40, batches=4)
+    questions = synthetic_questions(40, topics=6)
+    frame = CohortFrame.from_pages([records[:1000], records[1000:]]).attach_questions(questions)
+
+    assert overview(frame)["attempts"] == 3000
+    assert {
+        (r["batch_id"], r["topic_id"]): (r["attempts"], r["correct"]) for r in topic_solve_rates(frame)
+    } == loop_topic_solve_rates(records, questions)
+
+    ranked = student_percentiles(frame)
+    assert {r["student_id"]: r["percentile"] for r in ranked} == loop_student_percentiles(records)
+    assert [r["solved"] for r in ranked] == sorted((r["solved"] for r in ranked), reverse=True)
+
+    assert {
+        d: (h["attempts"], h["correct"], h["questions_attempted"], h["questions_solved"])
+        for d, h in difficulty_histogram(frame).items()
+    } == loop_difficulty_histogram(records, questions)
+
+
+def test_empty_cohort():
+    frame = CohortFrame.from_pages([[]]).attach_questions({})
+    assert overview(frame)["attempts"] == 0
+    assert topic_solve_rates(frame) == []
+    assert student_percentiles(frame) == []
+    assert difficulty_histogram(frame) == {}
+
+
+def test_analytics_endpoints_are_scoped():
+    get_backend().clear()
+    question_id = QuestionModel().create({"title": "Two Sum", "topic_id": "t1", "difficulty": "Easy"})
+    for student, batch, status in (("s1", "b1", "correct"), ("s1", "b1", "incorrect"), ("s2", "b1", "incorrect"), ("s3", "b2", "correct")):
+        PerformanceModel().create({
+            "student_id": student, "question_id": question_id, "batch_id": batch,
+            "department_id": "d1", "college_id": "c1", "status": status
+        })
+    client = app.test_client()
+
+    batch = {"Authorization": f"Bearer {create_jwt_token({'role': 'batch', 'batch_id': 'b1'})}"}
+    data = client.get("/api/batch/analytics?batch_id=b2", headers=batch).get_json()["data"]
+    assert data["overview"]["attempts"] == 3
+    assert data["topic_solve_rates"] == [
+        {"batch_id": "b1", "topic_id": "t1", "attempts": 3, "correct": 1, "solve_rate": 0.3333}
+    ]
+    assert [(s["student_id"], s["percentile"]) for s in data["student_percentiles"]] == [("s1", 75.0), ("s2", 25.0)]
+    assert data["difficulty_histogram"]["easy"]["questions_solved"] == 1
+
+    admin = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+    assert client.get("/api/admin/analytics", headers=admin).get_json()["data"]["overview"]["students"] == 3
+
+
+def test_only_frame_fields_are_read_and_large_scopes_are_refused(monkeypatch):
+    get_backend().clear()
+    for i in range(5):
+        PerformanceModel().create({"student_id": f"s{i}", "question_id": "q1", "batch_id": "b1",
+                                   "status": "correct", "submission_code": "x" * 1000})
+    projections = []
+    original = get_backend().query
+    monkeypatch.setattr(get_backend(), "query", lambda *a, **k: projections.append(k.get("fields")) or original(*a, **k))
+
+    admin = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+    client = app.test_client()
+    assert client.get("/api/admin/analytics?batch_id=b1", headers=admin).get_json()["data"]["overview"]["attempts"] == 5
+    assert projections and all(fields == FRAME_FIELDS for fields in projections)
+
+    monkeypatch.setattr("analytics_service.ANALYTICS_MAX_RECORDS", 4)
+    rv = client.get("/api/admin/analytics?batch_id=b1", headers=admin)
+    assert rv.status_code == 400
+    assert rv.get_json()["code"] == "SCOPE_TOO_LARGE"
@@ -0,0 +1,70 @@
+import pytest
+
+from cascade_service import CascadeService
+from models import (
+    CollegeModel, DepartmentModel, BatchModel, StudentModel,
+    QuestionModel, NoteModel, PerformanceModel
+)
+from storage import MemoryBackend, get_backend
+
+
+def _make_college(students=3, submissions=250):
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT"})
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": college_id})
+    batch_id = BatchModel().create({"batch_name": "2024", "department_id": dept_id, "college_id": college_id})
+    QuestionModel().create({"title": "Q1", "batch_id": batch_id})
+    for i in range(students):
+        student_id = StudentModel().create({"username": f"s{i}", "batch_id": batch_id})
+        NoteModel().create({"student_id": student_id, "content": "n"})
+        for _ in range(submissions):
+            PerformanceModel().create({"student_id": student_id, "question_id": "q"})
+    return college_id, dept_id, batch_id
+
+
+def test_college_cascade_deletes_whole_tree_in_batches():
+    college_id, dept_id, batch_id = _make_college()
+    get_backend().set("questions", "other", {"title": "kept", "batch_id": "other-batch"})
+
+    success, _, deleted_count = CascadeService.delete_college_cascade(college_id, "admin-1")
+
+    assert success
+    assert deleted_count == {
+        "college": 1, "departments": 1, "batches": 1, "students": 3,
+        "questions": 1, "notes": 3, "performance": 750
+    }
+    assert CollegeModel().get(college_id) is None
+    assert BatchModel().get(batch_id) is None
+    assert PerformanceModel().query() == []
+    assert [q["id"] for q in QuestionModel().query()] == ["other"]
+    log = [entry for entry in get_backend().query("audit_logs", {}) if entry[1]["action"] == "delete_college_cascade"]
+    assert log[0][1]["details"]["metrics"]["ops"] == 766  # includes the 3 student_stats and 3 student_progress docs
+
+
+def test_cascade_not_found_returns_three_tuple():
+    get_backend().clear()
+    assert CascadeService.delete_college_cascade("missing", "admin-1") == (False, "College not found", {})
+
+
+def test_batch_write_retries_failed_chunk(monkeypatch):
+    backend = MemoryBackend()
+    original = backend._commit_chunk
+    calls = []
+
+    def flaky(operations):
+        calls.append(len(operations))
+        if len(calls) == 1:
+            raise RuntimeError("unavailable")
+        original(operations)
+
+    monkeypatch.setattr(backend, "_commit_chunk", flaky)
+    monkeypatch.setattr("storage.time.sleep", lambda seconds: None)
+    ops = [("set", "c", str(i), {"n": i}) for i in range(501)]
+
+    assert backend.batch_write(ops) == 501
+    assert calls == [500, 500, 1]
+    assert backend.get("c", "500") == {"n": 500}
+
+    monkeypatch.setattr(backend, "_commit_chunk", lambda operations: (_ for _ in ()).throw(RuntimeError("down")))
+    with pytest.raises(RuntimeError):
+        backend.batch_write(ops)
@@ -0,0 +1,59 @@
+from firebase_init import get_auth
+from models import (
+    CollegeModel, DepartmentModel, BatchModel, StudentModel,
+    disable_college_cascade, enable_college_cascade, disable_batch_cascade
+)
+from storage import get_backend
+
+
+def _user(name):
+    return get_auth().create_user(email=f"{name}@test", display_name=name).uid
+
+
+def _make_tree(batches=3, students=4):
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT", "is_disabled": False, "firebase_uid": _user("college")})
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": college_id, "is_disabled": False})
+    batch_ids, student_ids = [], []
+    for b in range(batches):
+        batch_id = BatchModel().create({"batch_name": str(b), "department_id": dept_id, "is_disabled": False})
+        batch_ids.append(batch_id)
+        for s in range(students):
+            student_ids.append(StudentModel().create({
+                "username": f"s{b}{s}", "batch_id": batch_id, "is_disabled": False,
+                "firebase_uid": _user(f"s{b}{s}")
+            }))
+    return college_id, batch_ids, student_ids
+
+
+def test_disable_and_enable_college_cascade_level_by_level(monkeypatch):
+    college_id, batch_ids, student_ids = _make_tree()
+    queries = []
+    original = get_backend().query_in
+    monkeypatch.setattr(get_backend(), "query_in", lambda *args, **kwargs: queries.append(args[0]) or original(*args, **kwargs))
+
+    assert disable_college_cascade(college_id)
+    assert queries == ["departments", "batches", "students"]
+    assert all(StudentModel().get(sid)["is_disabled"] for sid in student_ids)
+    assert all(BatchModel().get(bid)["is_disabled"] for bid in batch_ids)
+    uid = StudentModel().get(student_ids[0])["firebase_uid"]
+    assert get_auth().users[uid].disabled is True
+
+    assert enable_college_cascade(college_id)
+    assert not any(StudentModel().get(sid)["is_disabled"] for sid in student_ids)
+    assert get_auth().users[uid].disabled is False
+    assert not disable_college_cascade("missing")
+
+
+def test_disable_skips_descendants_of_already_disabled_nodes():
+    college_id, batch_ids, student_ids = _make_tree(batches=2, students=1)
+    BatchModel().update(batch_ids[0], {"is_disabled": True})
+
+    disable_college_cascade(college_id)
+
+    # Students under the batch that was already disabled are left as they were
+    assert StudentModel().get(student_ids[0])["is_disabled"] is False
+    assert StudentModel().get(student_ids[1])["is_disabled"] is True
+
+    disable_batch_cascade(batch_ids[0])
+    assert StudentModel().get(student_ids[0])["is_disabled"] is True
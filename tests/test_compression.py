@@ -0,0 +1,82 @@
+import gzip
+import json
+from datetime import datetime
+
+from werkzeug.http import parse_accept_header
+
+import compression
+from app import app
+from auth import create_jwt_token
+from models import PerformanceModel, TopicModel
+from storage import get_backend
+
+ADMIN = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+
+
+def _seed(count=40):
+    get_backend().clear()
+    for i in range(count):
+        PerformanceModel().create({
+            "student_id": f"s{i}", "question_id": "q1", "status": "correct",
+            "submission_code": "def solve(nums):\n    return sorted(nums)\n" * 20,
+            "submitted_at": datetime(2024, 3, 1)
+        })
+
+
+def test_large_json_is_gzipped_when_accepted():
+    _seed()
+    client = app.test_client()
+    plain = client.get("/api/admin/performance", headers=ADMIN)
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    rv = client.get("/api/admin/performance", headers={**ADMIN, "Accept-Encoding": "gzip, deflate"})
+    assert rv.headers["Content-Encoding"] == "gzip"
+    body = rv.get_data()
+    assert len(body) < len(plain.get_data()) / 5
+    assert json.loads(gzip.decompress(body)) == plain.get_json()
+
+    refused = client.get("/api/admin/performance", headers={**ADMIN, "Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in refused.headers
+
+
+def test_small_bodies_are_sent_as_is():
+    rv = app.test_client().get("/api/student/ping", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in rv.headers
+
+
+def test_streamed_export_is_compressed_per_chunk(monkeypatch):
+    _seed()
+    monkeypatch.setattr("export_service.EXPORT_PAGE_SIZE", 10)
+    client = app.test_client()
+    rv = client.get("/api/admin/performance/export?format=ndjson&include_code=true",
+                    headers={**ADMIN, "Accept-Encoding": "gzip"})
+    assert rv.is_streamed
+    assert rv.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in rv.headers
+    lines = gzip.decompress(rv.get_data()).decode().splitlines()
+    assert len(lines) == 40
+
+
+def test_etag_becomes_weak_and_still_revalidates():
+    get_backend().clear()
+    for i in range(60):
+        TopicModel().create({"batch_id": "b1", "topic_name": f"Topic number {i}", "is_disabled": False})
+    client = app.test_client()
+    headers = {
+        "Authorization": f"Bearer {create_jwt_token({'role': 'student', 'student_id': 's1', 'batch_id': 'b1'})}",
+        "Accept-Encoding": "gzip"
+    }
+    rv = client.get("/api/student/topics", headers=headers)
+    assert rv.headers["Content-Encoding"] == "gzip"
+    assert rv.headers["ETag"].startswith('W/"')
+    assert client.get("/api/student/topics", headers={**headers, "If-None-Match": rv.headers["ETag"]}).status_code == 304
+
+
+def test_negotiation_honours_quality_values():
+    accept = lambda value: parse_accept_header(value)
+    expected = "br" if "br" in compression.ENCODERS else "gzip"
+    assert compression.negotiate(accept("br;q=1.0, gzip;q=0.5")) == expected
+    assert compression.negotiate(accept("*")) == next(iter(compression.ENCODERS))
+    assert compression.negotiate(accept("identity")) is None
+    assert compression.negotiate(accept("")) is None
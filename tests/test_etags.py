@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from app import app
+from auth import create_jwt_token
+from models import TopicModel
+from stats_service import StatsService
+from storage import get_backend
+from topic_service import TopicService
+
+STUDENT = {"role": "student", "student_id": "s1", "batch_id": "b1"}
+
+
+def _headers(etag=None):
+    headers = {"Authorization": f"Bearer {create_jwt_token(STUDENT)}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    return headers
+
+
+def test_topics_revalidate_with_version_counter(monkeypatch):
+    get_backend().clear()
+    client = app.test_client()
+    with app.app_context():
+        TopicService._save_topic("c1", "d1", "b1", "u", {"topic_name": "Arrays"})
+
+    rv = client.get("/api/student/topics", headers=_headers())
+    etag = rv.headers["ETag"]
+    assert rv.status_code == 200 and len(rv.get_json()["data"]["topics"]) == 1
+
+    # Unchanged scope: 304 without querying the list
+    monkeypatch.setattr(TopicModel, "query", lambda *a, **k: (_ for _ in ()).throw(AssertionError("queried list")))
+    rv = client.get("/api/student/topics", headers=_headers(etag))
+    assert rv.status_code == 304
+    assert rv.headers["ETag"] == etag
+    monkeypatch.undo()
+
+    # A write through the service bumps the version
+    with app.app_context():
+        TopicService._save_topic("c1", "d1", "b1", "u", {"topic_name": "Graphs"})
+    rv = client.get("/api/student/topics", headers=_headers(etag))
+    assert rv.status_code == 200
+    assert rv.headers["ETag"] != etag
+    assert len(rv.get_json()["data"]["topics"]) == 2
+
+    # Other batches are unaffected
+    with app.app_context():
+        TopicService._save_topic("c1", "d1", "b2", "u", {"topic_name": "Trees"})
+    assert client.get("/api/student/topics", headers=_headers(rv.headers["ETag"])).status_code == 304
+
+
+def test_question_etag_tracks_student_progress():
+    get_backend().clear()
+    client = app.test_client()
+    rv = client.get("/api/student/questions", headers=_headers())
+    etag = rv.headers["ETag"]
+    assert client.get("/api/student/questions", headers=_headers(etag)).status_code == 304
+
+    StatsService.record_submission({
+        "student_id": "s1", "question_id": "q1", "batch_id": "b1", "status": "correct",
+        "submitted_at": datetime.utcnow()
+    }, None)
+    assert client.get("/api/student/questions", headers=_headers(etag)).status_code == 200
+
+    # Different query strings get different tags
+    assert client.get("/api/student/questions?topic_id=t1", headers=_headers(etag)).headers["ETag"] != etag
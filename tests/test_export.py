@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import export_service
+from app import app
+from auth import create_jwt_token
+from models import PerformanceModel, QuestionModel, TopicModel
+from storage import get_backend
+
+
+def _seed():
+    get_backend().clear()
+    topic_id = TopicModel().create({"name": "Arrays"})
+    question_id = QuestionModel().create({"title": "Two Sum", "topic_id": topic_id})
+    for i in range(7):
+        PerformanceModel().create({
+            "student_id": f"s{i % 2}", "question_id": question_id if i else "missing",
+            "college_id": "c1", "department_id": "d1", "batch_id": "b1" if i < 5 else "b2",
+            "status": "correct", "submission_language": "python", "submission_code": "print(1)",
+            "submitted_at": datetime(2024, 3, 1, 12, i)
+        })
+    PerformanceModel().create({"student_id": "x", "question_id": question_id, "college_id": "c2", "status": "incorrect"})
+
+
+def test_csv_export_streams_every_page(monkeypatch):
+    _seed()
+    monkeypatch.setattr(export_service, "EXPORT_PAGE_SIZE", 3)
+    client = app.test_client()
+    college = {"Authorization": f"Bearer {create_jwt_token({'role': 'college', 'college_id': 'c1'})}"}
+
+    rv = client.get("/api/college/performance/export", headers=college)
+    assert rv.status_code == 200
+    assert rv.mimetype == "text/csv"
+    assert rv.is_streamed
+    assert "attachment" in rv.headers["Content-Disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(rv.get_data(as_text=True))))
+    assert len(rows) == 7
+    assert "submission_code" not in rows[0]
+    assert {r["question_title"] for r in rows} == {"Two Sum", "Unknown Question"}
+    assert {r["topic_name"] for r in rows} == {"Arrays", "Unknown Topic"}
+    assert rows[0]["submitted_at"].startswith("2024-03-01T12:")
+
+    rv = client.get("/api/college/performance/export?batch_id=b2&include_code=true", headers=college)
+    rows = list(csv.DictReader(io.StringIO(rv.get_data(as_text=True))))
+    assert len(rows) == 2
+    assert rows[0]["submission_code"] == "print(1)"
+
+
+def test_ndjson_export_and_scoping():
+    _seed()
+    client = app.test_client()
+    admin = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+
+    rv = client.get("/api/admin/performance/export?format=ndjson", headers=admin)
+    assert rv.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in rv.get_data(as_text=True).splitlines() if line]
+    assert len(lines) == 8
+    assert all("submission_code" not in line for line in lines)
+
+    batch = {"Authorization": f"Bearer {create_jwt_token({'role': 'batch', 'batch_id': 'b2'})}"}
+    rv = client.get("/api/batch/performance/export?format=ndjson&batch_id=b1", headers=batch)
+    lines = [json.loads(line) for line in rv.get_data(as_text=True).splitlines() if line]
+    assert {line["batch_id"] for line in lines} == {"b2"}
+
+    assert client.get("/api/admin/performance/export?format=xlsx", headers=admin).status_code == 400
+
+
+def test_export_reads_only_exported_fields(monkeypatch):
+    _seed()
+    backend = get_backend()
+    real_query = backend.query
+    seen = []
+
+    def spy(collection, filters, limit=None, start_after=None, fields=None):
+        seen.append(fields)
+        return real_query(collection, filters, limit=limit, start_after=start_after, fields=fields)
+
+    monkeypatch.setattr(backend, "query", spy)
+    client = app.test_client()
+    admin = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+
+    lines = client.get("/api/admin/performance/export?format=ndjson", headers=admin).get_data(as_text=True)
+    assert "submission_code" not in seen[0]
+    assert set(seen[0]) >= set(export_service.CSV_COLUMNS)
+    assert "print(1)" not in lines
+
+    seen.clear()
+    rows = client.get("/api/admin/performance/export?include_code=true", headers=admin).get_data(as_text=True)
+    assert "submission_code" in seen[0]
+    assert "print(1)" in rows
@@ -0,0 +1,65 @@
+import time
+
+import agent_wrappers
+import grader
+
+DOUBLE = "print(int(input()) * 2)"
+
+
+def test_full_mode_reports_every_case():
+    testcases = [
+        {"input": "1", "expected_output": "2"},
+        {"input": "2", "expected_output": "4  \n\n"},  # trailing whitespace is ignored
+        {"input": "3", "expected_output": "7"},
+        {"input": "x", "expected_output": "0"},
+    ]
+    result = grader.grade(DOUBLE, "python", testcases, visible_count=1)
+
+    assert not result["is_correct"]
+    assert (result["passed"], result["total"]) == (2, 4)
+    assert [case["status"] for case in result["test_results"]] == ["passed", "passed", "failed", "runtime_error"]
+    assert result["reason"] == "Test case 3 of 4: failed"
+
+    visible, hidden = result["test_results"][0], result["test_results"][2]
+    assert (visible["hidden"], visible["output"], visible["expected_output"]) == (False, "2\n", "2")
+    assert hidden["hidden"] and "output" not in hidden and "expected_output" not in hidden
+    assert all(key in hidden for key in ("time_ms", "wall_ms", "memory_kb"))
+
+
+def test_cases_run_in_parallel(monkeypatch):
+    monkeypatch.setattr(grader, "_executor", None)
+    monkeypatch.setattr(grader, "GRADER_WORKERS", 4)
+    code = "import time\ntime.sleep(0.4)\nprint(input())"
+    started = time.perf_counter()
+    result = grader.grade(code, "python", [{"input": str(i), "expected_output": str(i)} for i in range(4)])
+    assert result["is_correct"] and result["reason"] == "All 4 test cases passed"
+    assert time.perf_counter() - started < 1.2  # sequential would take 1.6s+
+
+
+def test_stop_on_failure_skips_remaining_cases(monkeypatch):
+    monkeypatch.setattr(grader, "_executor", None)
+    monkeypatch.setattr(grader, "GRADER_WORKERS", 2)
+    code = "import time\nn = int(input())\nif n: time.sleep(3)\nprint(n)"
+    testcases = [{"input": "0", "expected_output": "wrong"}] + [{"input": "1", "expected_output": "1"}] * 5
+
+    started = time.perf_counter()
+    result = grader.grade(code, "python", testcases, stop_on_failure=True)
+    assert time.perf_counter() - started < 2
+
+    statuses = [case["status"] for case in result["test_results"]]
+    assert statuses[0] == "failed"
+    assert set(statuses[1:]) == {"skipped"}
+    assert not result["is_correct"]
+
+
+def test_wrapper_fills_test_results_when_running_locally(monkeypatch):
+    monkeypatch.setattr(agent_wrappers, "CODE_RUNNER", "local")
+    result = agent_wrappers.evaluate_code_against_testcases(
+        "", DOUBLE, "python", [{"input": "5", "expected_output": "10"}], visible_count=1
+    )
+    assert result["success"]
+    assert result["data"]["is_correct"] and result["data"]["evaluated"]
+    assert result["data"]["test_results"][0]["status"] == "passed"
+
+    result = agent_wrappers.evaluate_code_against_testcases("", "def broken(:", "python", [{"input": "", "expected_output": ""}])
+    assert not result["data"]["is_correct"]
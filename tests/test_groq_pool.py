@@ -0,0 +1,54 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents import groq_client
+from agents.groq_client import GroqClient
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def chat_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(groq_client, "GROQ_API_URL", f"http://127.0.0.1:{server.server_port}/chat")
+    groq_client._reset_after_fork()
+    yield
+    server.shutdown()
+    groq_client._reset_after_fork()
+
+
+def test_clients_share_pooled_keep_alive_connections(chat_server):
+    for _ in range(3):
+        assert GroqClient(api_key="k").chat([{"role": "user", "content": "hi"}]) == "ok"
+
+    stats = groq_client.pool_stats()
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["reused"] == 2
+    assert stats["handshake_seconds_saved"] >= 0
+
+
+def test_session_is_recreated_after_fork(chat_server):
+    session = groq_client.get_session()
+    assert groq_client.get_session() is session
+    groq_client._reset_after_fork()
+    assert groq_client.get_session() is not session
+    assert groq_client.pool_stats()["requests"] == 0
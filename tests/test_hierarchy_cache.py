@@ -0,0 +1,52 @@
+import time
+
+from hierarchy_cache import TTLCache, hierarchy_cache, warm_up
+from models import CollegeModel, DepartmentModel
+from storage import get_backend
+
+
+def test_ttl_cache_lru_eviction_and_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    assert cache.get("a") == (True, {"n": 1})  # "a" is now most recently used
+    cache.set("c", {"n": 3})
+    assert cache.get("b") == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+    short = TTLCache(maxsize=10, ttl=0.01)
+    short.set("a", 1)
+    time.sleep(0.02)
+    assert short.get("a") == (False, None)
+    assert short.stats()["expirations"] == 1
+
+
+def test_model_writes_invalidate_shared_cache():
+    get_backend().clear()
+    hierarchy_cache.clear()
+    college_id = CollegeModel().create({"name": "MIT", "is_disabled": False})
+
+    assert CollegeModel().get(college_id)["name"] == "MIT"
+    before = hierarchy_cache.stats()["hits"]
+    assert CollegeModel().get(college_id)["name"] == "MIT"
+    assert hierarchy_cache.stats()["hits"] == before + 1
+
+    # A direct storage write is invisible until the model layer invalidates
+    get_backend().update("colleges", college_id, {"name": "Renamed"})
+    assert CollegeModel().get(college_id)["name"] == "MIT"
+    CollegeModel().update(college_id, {"name": "Caltech"})
+    assert CollegeModel().get(college_id)["name"] == "Caltech"
+
+    CollegeModel().delete(college_id)
+    assert CollegeModel().get(college_id)["is_disabled"] is True
+
+
+def test_warm_up_preloads_hierarchy():
+    get_backend().clear()
+    hierarchy_cache.clear()
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": "c1"})
+    hierarchy_cache.clear()
+
+    assert warm_up() == 1
+    found, dept = hierarchy_cache.get(("departments", dept_id))
+    assert found and dept["name"] == "CSE"
@@ -0,0 +1,54 @@
+import hierarchy_index
+from models import (
+    CollegeModel, DepartmentModel, BatchModel, StudentModel,
+    can_student_access, disable_department_cascade, is_batch_disabled
+)
+from storage import get_backend
+
+
+def _make_tree():
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT", "is_disabled": False})
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": college_id, "is_disabled": False})
+    batch_id = BatchModel().create({"batch_name": "2024", "department_id": dept_id, "college_id": college_id, "is_disabled": False})
+    student_id = StudentModel().create({"username": "s1", "batch_id": batch_id, "department_id": dept_id, "college_id": college_id, "is_disabled": False})
+    return college_id, dept_id, batch_id, student_id
+
+
+def test_access_checks_answered_from_index():
+    college_id, dept_id, batch_id, student_id = _make_tree()
+    assert can_student_access(student_id)
+    assert hierarchy_index.ancestor_ids("students", student_id) == {
+        "college_id": college_id, "department_id": dept_id,
+        "batch_id": batch_id, "student_id": student_id
+    }
+
+    # Disabling an ancestor is seen through the chain without touching the student
+    CollegeModel().delete(college_id)
+    assert not can_student_access(student_id)
+    assert hierarchy_index.chain("students", student_id)[-1]["effectively_disabled"]
+    assert not hierarchy_index.is_disabled("students", student_id)
+
+    CollegeModel().enable(college_id)
+    assert can_student_access(student_id)
+    assert not can_student_access("missing")
+
+
+def test_index_loads_lazily_and_follows_cascades():
+    college_id, dept_id, batch_id, student_id = _make_tree()
+    hierarchy_index.clear()
+    assert can_student_access(student_id)  # rebuilt from storage
+
+    disable_department_cascade(dept_id)
+    assert is_batch_disabled(batch_id)
+    assert not can_student_access(student_id)
+
+    StudentModel().hard_delete(student_id)
+    assert not can_student_access(student_id)
+
+
+def test_in_scope_compares_user_scope_fields():
+    college_id, dept_id, batch_id, student_id = _make_tree()
+    assert hierarchy_index.in_scope("students", student_id, {"role": "college", "college_id": college_id})
+    assert hierarchy_index.in_scope("batches", batch_id, {"department_id": dept_id})
+    assert not hierarchy_index.in_scope("batches", batch_id, {"department_id": "other"})
@@ -0,0 +1,56 @@
+from app import app
+from auth import create_jwt_token
+from job_service import JobService
+from models import CollegeModel, DepartmentModel, StudentModel, BatchModel
+from storage import get_backend
+
+
+def _headers():
+    token = create_jwt_token({'role': 'admin', 'admin_id': 'admin-1', 'uid': 'admin-uid'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_college_delete_runs_as_job_with_progress():
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT", "is_disabled": False})
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": college_id, "is_disabled": False})
+    batch_id = BatchModel().create({"batch_name": "2024", "department_id": dept_id, "is_disabled": False})
+    StudentModel().create({"username": "s1", "batch_id": batch_id, "is_disabled": False})
+    client = app.test_client()
+
+    rv = client.delete(f'/api/admin/colleges/{college_id}', headers=_headers())
+    assert rv.status_code == 202
+    job_id = rv.get_json()['data']['job_id']
+    JobService.wait(job_id, timeout=10)
+
+    rv = client.get(f'/api/admin/jobs/{job_id}', headers=_headers())
+    assert rv.status_code == 200
+    job = rv.get_json()['data']['job']
+    assert job['status'] == 'succeeded'
+    assert job['kind'] == 'delete_college_cascade'
+    assert job['result']['deleted_count']['students'] == 1
+    assert job['progress']['deleted']['colleges'] == 1
+    assert CollegeModel().get(college_id) is None
+
+
+def test_disable_job_and_failures():
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT", "is_disabled": False})
+    client = app.test_client()
+
+    rv = client.post(f'/api/admin/colleges/{college_id}/disable', headers=_headers())
+    assert rv.status_code == 202
+    job = JobService.wait(rv.get_json()['data']['job_id'], timeout=10)
+    assert job['status'] == 'succeeded'
+    assert CollegeModel().get(college_id)['is_disabled'] is True
+
+    def boom(progress):
+        progress({"step": 1})
+        raise RuntimeError("storage unavailable")
+
+    job = JobService.wait(JobService.submit("test", "college", college_id, "u", boom), timeout=10)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'storage unavailable'
+    assert job['progress'] == {"step": 1}
+
+    assert client.get('/api/admin/jobs/missing', headers=_headers()).status_code == 404
@@ -0,0 +1,69 @@
+from app import app
+from auth import create_jwt_token
+from firebase_init import get_auth
+from models import (
+    CollegeModel, DepartmentModel, BatchModel, StudentModel,
+    disable_college_cascade, enable_batch_cascade, reconcile_pending_cascades
+)
+from storage import get_backend
+
+
+def _make_tree():
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT", "is_disabled": False})
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": college_id, "is_disabled": False})
+    batch_id = BatchModel().create({"batch_name": "2024", "department_id": dept_id, "is_disabled": False})
+    uid = get_auth().create_user(email="s1@test").uid
+    student_id = StudentModel().create({"username": "s1", "batch_id": batch_id, "is_disabled": False, "firebase_uid": uid})
+    return college_id, batch_id, student_id, uid
+
+
+def test_lazy_disable_writes_only_target_and_blocks_descendants(monkeypatch):
+    monkeypatch.setattr("models.CASCADE_MODE", "lazy")
+    monkeypatch.setattr("auth.CASCADE_MODE", "lazy")
+    college_id, batch_id, student_id, uid = _make_tree()
+    client = app.test_client()
+    token = create_jwt_token({"role": "student", "student_id": student_id, "uid": uid})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/student/profile", headers=headers).status_code != 403
+
+    assert disable_college_cascade(college_id)
+    assert StudentModel().get(student_id)["is_disabled"] is False
+    assert CollegeModel().get(college_id)["pending_cascade"] == "disable"
+    rv = client.get("/api/student/profile", headers=headers)
+    assert rv.status_code == 403
+    assert rv.get_json()["code"] == "ACCOUNT_DISABLED"
+
+    assert reconcile_pending_cascades() == 1
+    assert StudentModel().get(student_id)["is_disabled"] is True
+    assert get_auth().users[uid].disabled is True
+    assert CollegeModel().get(college_id)["pending_cascade"] is None
+    assert reconcile_pending_cascades() == 0
+
+
+def test_reconciler_replays_in_chronological_order(monkeypatch):
+    monkeypatch.setattr("models.CASCADE_MODE", "lazy")
+    college_id, batch_id, student_id, uid = _make_tree()
+
+    disable_college_cascade(college_id)
+    enable_batch_cascade(batch_id)
+    assert reconcile_pending_cascades() == 2
+
+    # Same end state as running both cascades eagerly in that order
+    assert BatchModel().get(batch_id)["is_disabled"] is False
+    assert StudentModel().get(student_id)["is_disabled"] is False
+    assert DepartmentModel().query(is_disabled=True)
+
+
+def test_reconcile_script_drains_pending_cascades(monkeypatch, capsys):
+    import reconcile_cascades
+
+    monkeypatch.setattr("models.CASCADE_MODE", "lazy")
+    college_id, _, student_id, _ = _make_tree()
+    assert disable_college_cascade(college_id)
+
+    reconcile_cascades.main()
+    assert "Applied 1 pending cascades" in capsys.readouterr().out
+    assert StudentModel().get(student_id)["is_disabled"] is True
+    assert CollegeModel().get(college_id)["pending_cascade"] is None
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from agents import groq_client, llm_cache as llm_cache_module
+from agents.groq_client import GroqClient
+from agents.llm_cache import LLMCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "print(1)"}]
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).calls += 1
+        body = json.dumps({"choices": [{"message": {"content": f"answer {self.calls}"}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMCache(path=str(tmp_path / "llm.sqlite3"))
+    monkeypatch.setattr(groq_client, "llm_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def chat_server(monkeypatch):
+    _CountingHandler.calls = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(groq_client, "GROQ_API_URL", f"http://127.0.0.1:{server.server_port}/chat")
+    groq_client._reset_after_fork()
+    yield _CountingHandler
+    server.shutdown()
+    groq_client._reset_after_fork()
+
+
+def test_key_covers_model_temperature_tokens_and_messages():
+    key = cache_key("m", 0.1, 400, MESSAGES)
+    assert key == cache_key("m", 0.1, 400, [dict(MESSAGES[0])])
+    assert key != cache_key("m", 0.2, 400, MESSAGES)
+    assert key != cache_key("m", 0.1, 300, MESSAGES)
+    assert key != cache_key("other", 0.1, 400, MESSAGES)
+    assert key != cache_key("m", 0.1, 400, [{"role": "user", "content": "print(2)"}])
+
+
+def test_identical_requests_are_served_from_cache(cache, chat_server):
+    client = GroqClient(api_key="k")
+    assert client.chat(MESSAGES, cache="compiler") == "answer 1"
+    assert client.chat(MESSAGES, cache="compiler") == "answer 1"
+    assert chat_server.calls == 1
+
+    # Uncached callers and bypassed calls always reach the API
+    assert client.chat(MESSAGES) == "answer 2"
+    assert client.chat(MESSAGES, cache="compiler", bypass_cache=True) == "answer 3"
+    assert client.chat(MESSAGES, cache="compiler") == "answer 3"
+
+    stats = cache.stats()["namespaces"]["compiler"]
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["bypassed"] == 1
+    assert stats["stores"] == 2
+
+
+def test_disk_tier_is_shared_between_processes(cache, tmp_path):
+    key = cache_key("m", 0.1, 400, MESSAGES)
+    cache.set("evaluator", key, '{"is_correct": true}')
+
+    # A second worker has an empty memory tier but the same database
+    other = LLMCache(path=cache.path)
+    assert other.get("evaluator", key) == '{"is_correct": true}'
+    assert other.stats()["namespaces"]["evaluator"]["disk_hits"] == 1
+    assert other.get("evaluator", key) == '{"is_correct": true}'
+    assert other.stats()["namespaces"]["evaluator"]["memory_hits"] == 1
+
+
+def test_ttl_and_size_are_per_agent(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "_PRUNE_EVERY", 1)
+    monkeypatch.setenv("LLM_CACHE_EFFICIENCY_SIZE", "2")
+    for i in range(4):
+        cache.set("efficiency", f"k{i}", f"v{i}")
+    rows = cache._connection().execute("SELECT COUNT(*) FROM llm_cache WHERE namespace = 'efficiency'").fetchone()
+    assert rows[0] == 2
+
+    # Testcase generation is not cached by default
+    cache.set("testcase", "k", "v")
+    assert cache.get("testcase", "k") is None
+
+    monkeypatch.setenv("LLM_CACHE_COMPILER_TTL", "-1")
+    cache.set("compiler", "k", "v")
+    assert cache.get("compiler", "k") is None
+
+
+def test_expired_entries_are_not_served(cache, monkeypatch):
+    cache.set("compiler", "k", "v")
+    later = time.time() + 10 * 24 * 3600
+    monkeypatch.setattr(llm_cache_module, "time", SimpleNamespace(time=lambda: later))
+    assert cache.get("compiler", "k") is None
+
+
+def test_unparseable_responses_are_not_cached(cache, chat_server, monkeypatch):
+    from agents.evaluator_agent import evaluate_submission
+    monkeypatch.setenv("GROQ_API_KEY", "k")
+
+    # The stub answers plain text, which the evaluator cannot parse
+    for calls in (1, 2):
+        verdict = evaluate_submission("echo", [{"input": "1", "expected_output": "1"}], "print(1)", "python")
+        assert verdict["evaluated"] is False
+        assert chat_server.calls == calls
+    assert cache.stats()["namespaces"]["evaluator"]["stores"] == 0
+
+    # An entry stored before it was validated is fetched again, then replaced
+    client = GroqClient(api_key="k")
+    cache.set("compiler", cache_key("llama-3.3-70b-versatile", 0.1, 800, MESSAGES), "not json")
+    accept = lambda text: text.startswith("answer")
+    assert client.chat(MESSAGES, cache="compiler", validate=accept) == "answer 3"
+    assert client.chat(MESSAGES, cache="compiler", validate=accept) == "answer 3"
+    assert chat_server.calls == 3
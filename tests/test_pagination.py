@@ -0,0 +1,36 @@
+from app import app
+from auth import create_jwt_token
+from models import StudentModel
+from storage import get_backend
+
+
+def test_admin_students_cursor_pagination():
+    get_backend().clear()
+    for i in range(5):
+        StudentModel().create({"username": f"user{i}", "batch_id": "b1", "is_disabled": False})
+
+    client = app.test_client()
+    token = create_jwt_token({'role': 'admin', 'uid': 'admin-1'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/admin/students?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        rv = client.get(url, headers=headers)
+        assert rv.status_code == 200
+        data = rv.get_json()['data']
+        assert len(data['students']) <= 2
+        seen.extend(s['username'] for s in data['students'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert sorted(seen) == [f"user{i}" for i in range(5)]
+
+    # Without pagination parameters the full list is returned
+    rv = client.get('/api/admin/students', headers=headers)
+    assert len(rv.get_json()['data']['students']) == 5
+
+    rv = client.get('/api/admin/students?cursor=not-a-cursor', headers=headers)
+    assert rv.status_code == 400
@@ -0,0 +1,66 @@
+import pytest
+
+from app import app
+from job_service import JobService
+from models import PerformanceModel, QuestionModel, TopicModel
+from performance_service import PerformanceService, BACKFILL_CHECKPOINT_ID
+from question_service import QuestionService
+from topic_service import TopicService
+from storage import get_backend
+
+ADMIN = {"role": "admin", "uid": "admin"}
+
+
+def _seed(count=5):
+    get_backend().clear()
+    topic_id = TopicModel().create({"topic_name": "Arrays"})
+    question_id = QuestionModel().create({"title": "Two Sum", "topic_id": topic_id, "difficulty": "Easy"})
+    for i in range(count):
+        PerformanceModel().create({"student_id": f"s{i}", "question_id": question_id, "status": "correct"})
+    return topic_id, question_id
+
+
+def test_backfill_is_resumable():
+    _seed()
+
+    def interrupt(state):
+        if state["scanned"] == 2:
+            raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        PerformanceService.backfill(page_size=2, progress=interrupt)
+    assert get_backend().get("jobs", BACKFILL_CHECKPOINT_ID)["status"] == "running"
+
+    # A plain re-run continues after the checkpoint instead of starting over
+    result = PerformanceService.backfill(page_size=2)
+    assert result == {"scanned": 3, "updated": 3, "cursor": None}
+    records = PerformanceModel().query()
+    assert {(r["question_title"], r["topic_name"], r["difficulty"]) for r in records} == {("Two Sum", "Arrays", "Easy")}
+
+    assert PerformanceService.backfill(page_size=2)["updated"] == 0
+
+
+def test_renames_fan_out_to_performance_records(monkeypatch):
+    topic_id, question_id = _seed(3)
+    PerformanceService.backfill()
+
+    # Older topics also carry a name field; the updated topic_name must win
+    TopicModel().update(topic_id, {"name": "Arrays"})
+
+    with app.app_context():
+        for response, status_code in (
+            QuestionService.update_question(ADMIN, question_id, {"title": "Two Sum II", "difficulty": "Hard"}),
+            TopicService.update_topic(ADMIN, topic_id, {"topic_name": "Hashing"}),
+        ):
+            # The fan-out runs as a background job
+            assert status_code == 200
+            job = JobService.wait(response.get_json()["data"]["job_id"], timeout=10)
+            assert (job["status"], job["result"]["updated"]) == ("succeeded", 3)
+
+    records = PerformanceModel().query(question_id=question_id)
+    assert {(r["question_title"], r["difficulty"], r["topic_name"]) for r in records} == {("Two Sum II", "Hard", "Hashing")}
+
+    # Listing denormalized records needs no question/topic reads
+    monkeypatch.setattr(PerformanceService, "question_info", lambda ids: pytest.fail("joined questions"))
+    enriched = PerformanceService.enrich(records)
+    assert enriched[0]["question_difficulty"] == "Hard"
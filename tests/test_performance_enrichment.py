@@ -0,0 +1,63 @@
+from app import app
+from auth import create_jwt_token
+from hierarchy_cache import enrichment_cache
+from models import PerformanceModel, QuestionModel, TopicModel
+from performance_service import PerformanceService
+from storage import get_backend
+
+
+def _counting_get_many(monkeypatch):
+    backend = get_backend()
+    calls = []
+    original = backend.get_many
+
+    def get_many(collection, doc_ids):
+        calls.append((collection, list(doc_ids)))
+        return original(collection, calls[-1][1])
+
+    monkeypatch.setattr(backend, "get_many", get_many)
+    return calls
+
+
+def test_enrichment_is_cached_and_invalidated_on_write(monkeypatch):
+    get_backend().clear()
+    topic_id = TopicModel().create({"name": "Arrays"})
+    question_id = QuestionModel().create({"title": "Two Sum", "topic_id": topic_id, "difficulty": "Easy"})
+    calls = _counting_get_many(monkeypatch)
+
+    records = PerformanceService.enrich([{"question_id": question_id}, {"question_id": "gone"}])
+    assert records[0]["question_title"] == "Two Sum"
+    assert records[0]["question_difficulty"] == "Easy"
+    assert records[0]["topic_name"] == "Arrays"
+    assert records[1]["question_title"] == "Unknown Question"
+    assert [c[0] for c in calls] == ["questions", "topics"]
+
+    # Warm: only the unknown question is re-read
+    calls.clear()
+    PerformanceService.enrich([{"question_id": question_id}, {"question_id": "gone"}])
+    assert calls == [("questions", ["gone"])]
+
+    QuestionModel().update(question_id, {"title": "Two Sum II"})
+    TopicModel().update(topic_id, {"name": "Hashing"})
+    record = PerformanceService.enrich([{"question_id": question_id}])[0]
+    assert (record["question_title"], record["topic_name"]) == ("Two Sum II", "Hashing")
+    assert enrichment_cache.stats()["invalidations"] >= 2
+
+
+def test_every_role_gets_enriched_performance():
+    get_backend().clear()
+    topic_id = TopicModel().create({"topic_name": "Graphs"})
+    question_id = QuestionModel().create({"heading": "BFS", "topic_id": topic_id})
+    PerformanceModel().create({
+        "student_id": "s1", "question_id": question_id, "batch_id": "b1",
+        "department_id": "d1", "college_id": "c1", "status": "correct"
+    })
+    client = app.test_client()
+
+    for role, claims in (
+        ("admin", {}), ("college", {"college_id": "c1"}), ("department", {"department_id": "d1"}),
+        ("batch", {"batch_id": "b1"}), ("student", {"student_id": "s1"}),
+    ):
+        headers = {"Authorization": f"Bearer {create_jwt_token({'role': role, **claims})}"}
+        record = client.get(f"/api/{role}/performance", headers=headers).get_json()["data"]["performance"][0]
+        assert (record["question_title"], record["topic_name"], record["question_difficulty"]) == ("BFS", "Graphs", "Medium"), role
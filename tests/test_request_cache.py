@@ -0,0 +1,29 @@
+from app import app
+from models import BatchModel
+from request_cache import get_read_stats
+from storage import get_backend
+
+
+def test_identity_map_serves_repeated_reads_and_invalidates_on_write():
+    get_backend().clear()
+    batch_id = BatchModel().create({"batch_name": "2020-2024", "is_disabled": False})
+
+    with app.test_request_context():
+        first = BatchModel().get(batch_id)
+        first["batch_name"] = "mutated by caller"
+        second = BatchModel().get(batch_id)
+        assert second["batch_name"] == "2020-2024"
+        assert get_read_stats()["hits"] == 1
+
+        BatchModel().delete(batch_id)
+        assert BatchModel().get(batch_id)["is_disabled"] is True
+
+        assert BatchModel().get("missing") is None
+        assert BatchModel().get_many([batch_id, "missing"]).keys() == {batch_id}
+
+        stats = get_read_stats()
+        assert stats["invalidations"] == 1
+        assert stats["hits"] == 3
+
+    # Outside a request nothing is cached
+    assert get_read_stats() is None
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from app import app
+from auth import create_jwt_token
+from models import BatchModel, CollegeModel, DepartmentModel
+from models import PerformanceModel
+from rollup_service import RECORD_FIELDS, RollupService, shard_ids
+from stats_service import StatsService
+from storage import get_backend
+
+
+def _record(day, status, language="Python", batch_id="b1", college_id="c1"):
+    StatsService.record_submission({
+        "student_id": "s1", "question_id": "q1", "batch_id": batch_id,
+        "department_id": "d1", "college_id": college_id, "status": status,
+        "submission_language": language, "submitted_at": datetime(2024, 3, day, 12, 0)
+    }, None)
+
+
+def test_rollups_are_incremented_on_submit_and_read_by_range(monkeypatch):
+    get_backend().clear()
+    _record(1, "correct")
+    _record(1, "incorrect", "Java")
+    _record(3, "correct")
+
+    day = datetime(2024, 3, 1).date()
+    bucket = RollupService.get_range("college", "c1", day, day)[0]
+    assert (bucket["submissions"], bucket["correct"], bucket["incorrect"]) == (2, 1, 1)
+    assert bucket["by_language"] == {"python": 1, "java": 1}
+
+    days = RollupService.get_range("batch", "b1", datetime(2024, 3, 1).date(), datetime(2024, 3, 3).date())
+    assert [d["submissions"] for d in days] == [2, 0, 1]
+    assert days[0]["solve_rate"] == 0.5
+
+    # Backfill reproduces the incremental buckets
+    for doc_id in shard_ids("batch", "b1", "2024-03-01"):
+        get_backend().delete("daily_rollups", doc_id)
+    reads = []
+    original = get_backend().query
+    monkeypatch.setattr(get_backend(), "query", lambda *a, **k: reads.append(k) or original(*a, **k))
+    assert RollupService.rebuild(page_size=2) == 6
+    # Paged, and submission code etc. are never read
+    assert [(k["limit"], k["fields"]) for k in reads] == [(2, RECORD_FIELDS)] * 2
+    monkeypatch.undo()
+    assert RollupService.get_range("batch", "b1", datetime(2024, 3, 1).date(), datetime(2024, 3, 3).date()) == days
+
+
+def test_bucket_shards_are_summed_and_rollup_failures_do_not_fail_submit(monkeypatch):
+    get_backend().clear()
+    monkeypatch.setattr("rollup_service.ROLLUP_SHARDS", 4)
+    shards = iter([0, 3, 3])
+    monkeypatch.setattr("rollup_service.random.randrange", lambda n: next(shards))
+    for status in ("correct", "incorrect", "correct"):
+        _record(2, status)
+
+    ids = shard_ids("batch", "b1", "2024-03-02")
+    assert [(get_backend().get("daily_rollups", i) or {}).get("submissions") for i in ids] == [1, None, None, 2]
+    day = datetime(2024, 3, 2).date()
+    assert RollupService.get_range("batch", "b1", day, day)[0]["correct"] == 2
+
+    # Rebuild folds the shards back into shard 0
+    RollupService.rebuild()
+    assert get_backend().get("daily_rollups", ids[3]) is None
+    assert RollupService.get_range("batch", "b1", day, day)[0]["submissions"] == 3
+
+    # A contended bucket only loses the rollup increment, not the submission
+    original = get_backend().batch_write
+
+    def batch_write(operations, **kwargs):
+        operations = list(operations)
+        if any(op[1] == "daily_rollups" for op in operations):
+            raise RuntimeError("too much contention on these documents")
+        return original(operations, **kwargs)
+
+    monkeypatch.setattr(get_backend(), "batch_write", batch_write)
+    _record(2, "correct")
+    assert len(PerformanceModel().query(student_id="s1")) == 4
+    assert RollupService.get_range("batch", "b1", day, day)[0]["submissions"] == 3
+
+
+def test_trends_endpoints_scope_and_validate():
+    get_backend().clear()
+    college_id = CollegeModel().create({"name": "MIT"})
+    dept_id = DepartmentModel().create({"name": "CSE", "college_id": college_id})
+    batch_id = BatchModel().create({"batch_name": "2024", "department_id": dept_id})
+    _record(5, "correct", batch_id=batch_id, college_id=college_id)
+    client = app.test_client()
+
+    college = {"Authorization": f"Bearer {create_jwt_token({'role': 'college', 'college_id': college_id})}"}
+    rv = client.get(f"/api/college/performance/trends?batch_id={batch_id}&from=2024-03-04&to=2024-03-06", headers=college)
+    assert rv.status_code == 200
+    assert [d["submissions"] for d in rv.get_json()["data"]["days"]] == [0, 1, 0]
+
+    other = {"Authorization": f"Bearer {create_jwt_token({'role': 'college', 'college_id': 'c2'})}"}
+    assert client.get(f"/api/college/performance/trends?batch_id={batch_id}", headers=other).status_code == 404
+
+    admin = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+    url = f"/api/admin/performance/trends?college_id={college_id}"
+    assert client.get(url + "&from=2024-03-06&to=2024-03-01", headers=admin).status_code == 400
+    assert client.get(url + "&from=2023-01-01&to=2024-03-01", headers=admin).status_code == 400
+    assert client.get(url + "&from=yesterday", headers=admin).status_code == 400
+    assert client.get("/api/admin/performance/trends", headers=admin).status_code == 400
+    rv = client.get(url + "&from=2024-03-05&to=2024-03-05", headers=admin)
+    assert rv.get_json()["data"]["days"][0]["correct"] == 1
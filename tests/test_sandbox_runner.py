@@ -0,0 +1,77 @@
+import shutil
+
+import pytest
+
+import agent_wrappers
+import sandbox_runner
+
+needs_gcc = pytest.mark.skipif(not shutil.which("gcc"), reason="gcc not installed")
+needs_gxx = pytest.mark.skipif(not shutil.which("g++"), reason="g++ not installed")
+
+
+def test_python_runs_with_stdin_and_reports_usage():
+    result = sandbox_runner.run_code("import sys\nprint(sys.stdin.read().upper())", "python", "hi")
+    assert result["status"] == "ok"
+    assert result["stdout"] == "HI\n"
+    assert result["exit_code"] == 0
+    assert result["wall_ms"] > 0 and result["time_ms"] >= 0
+
+
+def test_limits_are_enforced():
+    assert sandbox_runner.run_code("raise SystemExit(3)", "python")["status"] == "runtime_error"
+
+    with sandbox_runner.prepare("while True: pass", "python")[0] as program:
+        result = program.run(time_limit=1)
+    assert result["status"] == "time_limit"
+    assert result["wall_ms"] < 4000
+
+    with sandbox_runner.prepare("x = bytearray(512 * 1024 * 1024)", "python")[0] as program:
+        assert program.run(memory_mb=128)["status"] == "memory_limit"
+
+    with sandbox_runner.prepare("print('x' * 100000)", "python")[0] as program:
+        result = program.run(output_kb=4)
+    assert result["status"] == "output_limit"
+    assert len(result["stdout"]) == 4 * 1024
+
+
+@needs_gcc
+def test_compiled_program_is_reused_across_inputs():
+    code = '#include <stdio.h>\nint main(){int a,b;scanf("%d %d",&a,&b);printf("%d\\n",a+b);return 0;}'
+    program, failure = sandbox_runner.prepare(code, "c")
+    assert failure is None
+    with program:
+        assert [program.run(stdin)["stdout"] for stdin in ("1 2", "40 2")] == ["3\n", "42\n"]
+
+    program, failure = sandbox_runner.prepare("int main() { oops }", "c")
+    assert program is None
+    assert failure["status"] == "compile_error"
+    assert sandbox_runner.describe_failure(failure).startswith("Compilation error:")
+
+
+@needs_gxx
+def test_stl_program_compiles_past_the_output_limit(monkeypatch):
+    # The STL binary is larger than the output cap, which only applies to run output
+    monkeypatch.setattr(sandbox_runner, "SANDBOX_OUTPUT_KB", 4)
+    code = (
+        "#include <iostream>\n#include <vector>\n#include <map>\n#include <string>\n"
+        "int main(){std::vector<int> v{3,1,2};std::map<std::string,int> m{{\"a\",1}};"
+        "std::cout << v.size() + m.size() << std::endl;return 0;}"
+    )
+    program, failure = sandbox_runner.prepare(code, "cpp")
+    assert failure is None, failure and failure["stderr"]
+    with program:
+        assert program.run()["stdout"] == "4\n"
+
+
+def test_wrapper_uses_local_runner_and_falls_back_to_llm(monkeypatch):
+    monkeypatch.setattr(agent_wrappers, "CODE_RUNNER", "local")
+    monkeypatch.setattr(agent_wrappers, "run_code_with_agent", lambda *a: {"output": "simulated"})
+
+    result = agent_wrappers.compile_and_run_code("", "print(int(input()) * 2)", "python", "21")
+    assert result["success"] and result["data"]["output"] == "42\n"
+
+    result = agent_wrappers.compile_and_run_code("", "print(undefined_name)", "python")
+    assert not result["success"] and "NameError" in result["error"]
+
+    monkeypatch.setattr(sandbox_runner, "supported", lambda language: False)
+    assert agent_wrappers.compile_and_run_code("", "code", "java")["data"]["output"] == "simulated"
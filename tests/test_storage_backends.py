@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+
+from storage import MemoryBackend, SQLiteBackend, DocumentNotFoundError
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(":memory:")
+
+
+def test_crud_roundtrip(backend):
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    backend.set("students", "s1", {"username": "alice", "is_disabled": False, "created_at": created})
+
+    assert backend.get("students", "s1") == {"username": "alice", "is_disabled": False, "created_at": created}
+    assert backend.get("students", "missing") is None
+
+    backend.update("students", "s1", {"is_disabled": True, "stats.attempts": 2})
+    doc = backend.get("students", "s1")
+    assert doc["is_disabled"] is True
+    assert doc["stats"] == {"attempts": 2}
+
+    with pytest.raises(DocumentNotFoundError):
+        backend.update("students", "missing", {"is_disabled": True})
+
+    backend.delete("students", "s1")
+    assert backend.get("students", "s1") is None
+
+
+def test_equality_filter_semantics(backend):
+    backend.set("docs", "a", {"flag": True, "count": 1, "name": "x", "parent": None})
+    backend.set("docs", "b", {"flag": False, "count": 1.0, "name": "y"})
+    backend.set("docs", "c", {"flag": 1, "count": "1", "name": "x"})
+
+    def ids(**filters):
+        return [doc_id for doc_id, _ in backend.query("docs", filters)]
+
+    assert ids(flag=True) == ["a"]
+    assert ids(flag=1) == ["c"]
+    assert ids(count=1) == ["a", "b"]
+    assert ids(name="x") == ["a", "c"]
+    assert ids(name="x", flag=True) == ["a"]
+    assert ids(parent=None) == ["a"]
+    assert ids() == ["a", "b", "c"]
+
+
+def test_get_many_and_batch_write(backend):
+    backend.batch_write(
+        [("set", "q", f"q{i}", {"n": i}) for i in range(5)]
+        + [("update", "q", "q1", {"n": 10}), ("delete", "q", "q4", None)]
+    )
+    docs = backend.get_many("q", ["q0", "q1", "q4", "q1", None])
+    assert docs == {"q0": {"n": 0}, "q1": {"n": 10}}
+
+
+def test_returned_documents_are_copies(backend):
+    backend.set("docs", "a", {"tags": ["x"]})
+    backend.get("docs", "a")["tags"].append("y")
+    assert backend.get("docs", "a") == {"tags": ["x"]}
+
+
+def test_query_pagination(backend):
+    for i in range(7):
+        backend.set("docs", f"d{i}", {"batch_id": "b1" if i % 2 == 0 else "b2"})
+
+    page = backend.query("docs", {"batch_id": "b1"}, limit=2)
+    assert [doc_id for doc_id, _ in page] == ["d0", "d2"]
+
+    page = backend.query("docs", {"batch_id": "b1"}, limit=2, start_after="d2")
+    assert [doc_id for doc_id, _ in page] == ["d4", "d6"]
+
+    page = backend.query("docs", {"batch_id": "b1"}, limit=2, start_after="d6")
+    assert page == []
+
+
+def test_query_field_projection(backend):
+    backend.set("docs", "a", {"batch_id": "b1", "status": "correct", "submission_code": "x" * 100})
+    assert backend.query("docs", {"batch_id": "b1"}, fields=["status", "missing"]) == [("a", {"status": "correct"})]
+    assert backend.get("docs", "a")["submission_code"] == "x" * 100
+
+
+def test_query_in_chunks_values(backend):
+    for i in range(40):
+        backend.set("perf", f"p{i}", {"student_id": f"s{i}", "flag": i % 2 == 0})
+
+    values = [f"s{i}" for i in range(35)] + ["s0", "missing"]
+    assert len(backend.query_in("perf", "student_id", values)) == 35
+    assert sorted(doc_id for doc_id, _ in backend.query_in("perf", "student_id", ["s1", "s2", "s3"], {"flag": True})) == ["p2"]
+
+
+def test_increment_in_merge_and_update(backend):
+    from storage import Increment
+
+    backend.batch_write([
+        ("merge", "stats", "s1", {"attempts": Increment(1), "by_topic": {"t1": {"correct": Increment(1)}}}),
+        ("merge", "stats", "s1", {"attempts": Increment(2), "name": "alice"}),
+    ])
+    backend.update("stats", "s1", {"by_topic.t1.correct": Increment(3)})
+
+    assert backend.get("stats", "s1") == {"attempts": 3, "name": "alice", "by_topic": {"t1": {"correct": 4}}}
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+import pytest
+
+from app import app
+from auth import create_jwt_token
+from models import QuestionModel, PerformanceModel, StudentStatsModel, StudentProgressModel
+from stats_service import RECORD_FIELDS, StatsService
+from storage import get_backend
+
+
+def test_submit_updates_aggregates_and_summary(monkeypatch):
+    get_backend().clear()
+    easy = QuestionModel().create({"title": "A", "batch_id": "b1", "difficulty": "Easy", "topic_id": "t1"})
+    hard = QuestionModel().create({"title": "B", "batch_id": "b1", "difficulty": "Hard", "topic_id": "t2"})
+
+    outcomes = iter([
+        {"success": True, "data": {"is_correct": True, "reason": "ok"}},
+        {"success": True, "data": {"is_correct": False, "reason": "wrong"}},
+    ])
+    monkeypatch.setattr("routes.student.compile_and_run_code", lambda *a: {"success": a[2] != "broken", "error": "SyntaxError"})
+    monkeypatch.setattr("routes.student.evaluate_code_against_testcases", lambda *a, **k: next(outcomes))
+    monkeypatch.setattr("routes.student.get_efficiency_feedback", lambda *a: {"success": False})
+
+    client = app.test_client()
+    student = {"role": "student", "student_id": "s1", "batch_id": "b1", "department_id": "d1", "college_id": "c1"}
+    headers = {"Authorization": f"Bearer {create_jwt_token(student)}"}
+
+    assert client.post("/api/student/submit", json={"question_id": easy, "code": "x", "language": "python"}, headers=headers).status_code == 200
+    assert client.post("/api/student/submit", json={"question_id": hard, "code": "x", "language": "python"}, headers=headers).status_code == 200
+    rv = client.post("/api/student/submit", json={"question_id": hard, "code": "x", "language": "broken"}, headers=headers)
+    assert rv.get_json()["data"]["status"] == "execution_error"
+
+    stats = StudentStatsModel().get("s1")
+    assert (stats["attempts"], stats["correct"], stats["incorrect"], stats["execution_error"]) == (3, 1, 1, 1)
+    assert stats["by_difficulty"]["hard"] == {"attempts": 2, "incorrect": 1, "execution_error": 1}
+    assert stats["by_topic"]["t1"] == {"attempts": 1, "correct": 1}
+    assert len(PerformanceModel().query(student_id="s1")) == 3
+    stored = PerformanceModel().query(question_id=easy)[0]
+    assert (stored["question_title"], stored["difficulty"], stored["topic_id"]) == ("A", "Easy", "t1")
+
+    admin = {"Authorization": f"Bearer {create_jwt_token({'role': 'admin'})}"}
+    summary = client.get("/api/admin/performance/summary?batch_id=b1", headers=admin).get_json()["data"]["summary"]
+    assert summary["totals"] == {"attempts": 3, "correct": 1, "incorrect": 1, "execution_error": 1}
+    assert summary["students"] == 1
+    assert summary["by_difficulty"]["easy"]["correct"] == 1
+
+    # The backfill produces the same aggregates from the raw records
+    get_backend().delete("student_stats", "s1")
+    assert StatsService.rebuild() == 1
+    rebuilt = StatsService.summarize(batch_id="b1")
+    assert rebuilt["totals"] == summary["totals"]
+    assert rebuilt["by_topic"]["t2"] == {"attempts": 2, "correct": 0, "incorrect": 1, "execution_error": 1}
+
+
+def test_question_list_flags_come_from_progress_document(monkeypatch):
+    get_backend().clear()
+    solved = QuestionModel().create({"title": "A", "batch_id": "b1"})
+    failed = QuestionModel().create({"title": "B", "batch_id": "b1"})
+    QuestionModel().create({"title": "C", "batch_id": "b1"})
+    for question_id, status in ((solved, "incorrect"), (solved, "correct"), (failed, "execution_error")):
+        StatsService.record_submission({
+            "student_id": "s1", "question_id": question_id, "batch_id": "b1", "status": status,
+            "submission_code": "x" * 1000, "submitted_at": datetime.utcnow()
+        }, None)
+
+    progress = StudentProgressModel().get("s1")["questions"]
+    assert progress[solved]["attempts"] == 2
+    assert progress[solved]["last_status"] == "correct"
+
+    # One progress get; the submission history is never scanned
+    monkeypatch.setattr(PerformanceModel, "query", lambda self, **f: pytest.fail("scanned history"))
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {create_jwt_token({'role': 'student', 'student_id': 's1', 'batch_id': 'b1'})}"}
+    questions = client.get("/api/student/questions", headers=headers).get_json()["data"]["questions"]
+    flags = {q["title"]: (q["is_attempted"], q["is_solved"], q["best_status"]) for q in questions}
+    assert flags == {"A": (True, True, "correct"), "B": (True, False, "execution_error"), "C": (False, False, None)}
+    monkeypatch.undo()
+
+    # The backfill rebuilds the same document
+    get_backend().delete("student_progress", "s1")
+    StatsService.rebuild()
+    assert StudentProgressModel().get("s1")["questions"][solved] == progress[solved]
+
+
+def test_first_submission_seeds_progress_from_earlier_history(monkeypatch):
+    get_backend().clear()
+    earlier = QuestionModel().create({"title": "A", "batch_id": "b1"})
+    later = QuestionModel().create({"title": "B", "batch_id": "b1"})
+    # Solved before student_progress existed
+    PerformanceModel().create({"student_id": "s1", "question_id": earlier, "status": "correct",
+                               "submitted_at": datetime(2024, 1, 1)})
+    # A document written by a submission without the seed (no backfilled marker)
+    get_backend().set("student_progress", "s1", {"student_id": "s1", "questions": {}})
+
+    StatsService.record_submission({
+        "student_id": "s1", "question_id": later, "batch_id": "b1", "status": "incorrect",
+        "submitted_at": datetime.utcnow()
+    }, None)
+    progress = StudentProgressModel().get("s1")
+    assert progress["backfilled"] is True
+    assert progress["questions"][earlier]["correct"] == 1
+    assert progress["questions"][later]["attempts"] == 1
+
+    monkeypatch.setattr(PerformanceModel, "query", lambda self, **f: pytest.fail("scanned history"))
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {create_jwt_token({'role': 'student', 'student_id': 's1', 'batch_id': 'b1'})}"}
+    questions = client.get("/api/student/questions", headers=headers).get_json()["data"]["questions"]
+    assert {q["title"]: q["is_solved"] for q in questions} == {"A": True, "B": False}
+
+
+def test_rebuild_is_paged_projected_and_resumable(monkeypatch):
+    get_backend().clear()
+    question_id = QuestionModel().create({"title": "A", "batch_id": "b1", "difficulty": "Easy"})
+    for student in ("s1", "s2", "s3"):
+        for status in ("incorrect", "correct"):
+            PerformanceModel().create({"student_id": student, "question_id": question_id, "batch_id": "b1",
+                                       "status": status, "submission_code": "x" * 1000,
+                                       "submitted_at": datetime.utcnow()})
+    reads = []
+    original = get_backend().query_in
+    monkeypatch.setattr(get_backend(), "query_in", lambda *a, **k: reads.append((a[2], k.get("fields"))) or original(*a, **k))
+
+    def interrupt(state):
+        if state["rebuilt"] == 2:
+            raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        StatsService.rebuild(page_size=2, progress=interrupt)
+    assert get_backend().get("jobs", "backfill_student_stats")["cursor"] == "s2"
+    assert StudentStatsModel().get("s3") is None
+
+    # A plain re-run continues with the students after the checkpoint
+    assert StatsService.rebuild(page_size=2) == 1
+    assert StudentStatsModel().get("s3")["correct"] == 1
+    assert StudentProgressModel().get("s3")["questions"][question_id]["last_status"] == "correct"
+    assert get_backend().get("jobs", "backfill_student_stats")["status"] == "succeeded"
+    # One read per page of students, without the submitted code
+    assert [values for values, _ in reads] == [["s1", "s2"], ["s3"]]
+    assert all(fields == RECORD_FIELDS for _, fields in reads)
@@ -0,0 +1,57 @@
+import time
+
+from app import app
+from auth import create_jwt_token
+from models import QuestionModel
+from storage import get_backend
+
+DELAY = 0.3
+
+
+def _slow(result):
+    def call(*args, **kwargs):
+        time.sleep(DELAY)
+        return result
+    return call
+
+
+def _submit(question_id, code="x"):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {create_jwt_token({'role': 'student', 'student_id': 's1', 'batch_id': 'b1'})}"}
+    started = time.perf_counter()
+    data = client.post("/api/student/submit", json={"question_id": question_id, "code": code, "language": "python"},
+                       headers=headers).get_json()["data"]
+    return data, time.perf_counter() - started
+
+
+def test_agents_run_concurrently(monkeypatch):
+    get_backend().clear()
+    question_id = QuestionModel().create({"title": "A", "batch_id": "b1"})
+    monkeypatch.setattr("routes.student.compile_and_run_code", _slow({"success": True, "data": {"output": ""}}))
+    monkeypatch.setattr("routes.student.evaluate_code_against_testcases",
+                        _slow({"success": True, "data": {"is_correct": True, "reason": "ok"}}))
+    monkeypatch.setattr("routes.student.get_efficiency_feedback", _slow({"success": True, "data": {"time": "O(n)"}}))
+
+    data, elapsed = _submit(question_id)
+    assert data["status"] == "correct"
+    assert data["efficiency_feedback"] == {"time": "O(n)"}
+    assert elapsed < 2 * DELAY  # about one call, not three
+
+
+def test_incorrect_verdict_ignores_efficiency_and_compile_errors_short_circuit(monkeypatch):
+    get_backend().clear()
+    question_id = QuestionModel().create({"title": "A", "batch_id": "b1"})
+    monkeypatch.setattr("routes.student.compile_and_run_code",
+                        lambda *a: {"success": a[1] != "broken", "error": "SyntaxError", "data": {"output": ""}})
+    monkeypatch.setattr("routes.student.evaluate_code_against_testcases",
+                        _slow({"success": True, "data": {"is_correct": False, "reason": "wrong"}}))
+    monkeypatch.setattr("routes.student.get_efficiency_feedback", _slow({"success": True, "data": {"time": "O(n)"}}))
+
+    data, _ = _submit(question_id)
+    assert data["status"] == "incorrect"
+    assert "efficiency_feedback" not in data
+
+    # The evaluation is not waited for when the code does not run
+    data, elapsed = _submit(question_id, code="broken")
+    assert (data["status"], data["error"]) == ("execution_error", "SyntaxError")
+    assert elapsed < DELAY
@@ -0,0 +1,99 @@
+from app import app
+from auth import create_jwt_token
+from models import QuestionModel, PerformanceModel, StudentStatsModel
+from storage import get_backend
+from verdict_cache import normalize_code, fingerprint
+
+
+def test_formatting_and_comments_normalize_away():
+    assert normalize_code("x = 1  # set x\nif x:\n    print(x)\n", "python") == \
+        normalize_code("x=1\n\n\nif x :\n  print( x )", "python")
+    # Indentation is structure in Python
+    assert normalize_code("for i in r:\n    a()\n    b()", "python") != normalize_code("for i in r:\n    a()\nb()", "python")
+    # Literals are kept verbatim
+    assert normalize_code('print("a  b")', "python") != normalize_code('print("a b")', "python")
+
+    cpp = '#include <cstdio>\n// main\nint main() {\n    /* say hi */ printf("hi // there");\n    return 0;\n}\n'
+    assert normalize_code(cpp, "cpp") == '#include<cstdio>\nint main(){printf("hi // there");return 0;}'
+    assert normalize_code("#define A 1\nint b;", "c") != normalize_code("#define A 1 int b;", "c")
+
+    # Newlines can end statements in JavaScript
+    assert normalize_code("return\nx", "javascript") != normalize_code("return x", "javascript")
+    assert normalize_code("let  a = 1;  // one\n\n\nlet b", "javascript") == "let a=1;\nlet b"
+
+
+def test_whitespace_between_operators_is_kept():
+    # Dropping the space would merge two operators into a different token
+    assert normalize_code("k = i + ++j;", "cpp") != normalize_code("k = i++ + j;", "cpp")
+    assert normalize_code("k = a - -b;", "c") != normalize_code("k = a--b;", "c")
+    assert normalize_code("k = a + +b;", "javascript") != normalize_code("k = a++b;", "javascript")
+    assert normalize_code("k = a / *p;", "c") == "k=a/ *p;"  # not a comment opener
+    assert normalize_code("k = a / *p;", "c") == normalize_code("k=a /  *p ;", "c")
+
+
+def test_fingerprint_changes_with_testcases():
+    question = {"id": "q1", "description": "d", "hidden_testcases": [{"input": "1", "expected_output": "1"}]}
+    before = fingerprint(question, "print(1)", "python")
+    assert before == fingerprint(question, "print(1)  # same", "python")
+    assert before != fingerprint(question, "print(1)", "cpp")
+    question["hidden_testcases"].append({"input": "2", "expected_output": "2"})
+    assert before != fingerprint(question, "print(1)", "python")
+
+
+def test_equivalent_submissions_reuse_the_verdict(monkeypatch):
+    get_backend().clear()
+    question_id = QuestionModel().create({"title": "A", "batch_id": "b1", "description": "echo",
+                                          "hidden_testcases": [{"input": "1", "expected_output": "1"}]})
+    calls = []
+
+    def agent(result):
+        def call(*args, **kwargs):
+            calls.append(result)
+            return result
+        return call
+
+    monkeypatch.setattr("routes.student.compile_and_run_code", agent({"success": True, "data": {"output": "1"}}))
+    monkeypatch.setattr("routes.student.evaluate_code_against_testcases",
+                        agent({"success": True, "data": {"is_correct": True, "reason": "ok", "evaluated": True}}))
+    monkeypatch.setattr("routes.student.get_efficiency_feedback",
+                        agent({"success": True, "data": {"time_complexity": "O(1)"}}))
+
+    client = app.test_client()
+
+    def submit(student_id, code):
+        student = {"role": "student", "student_id": student_id, "batch_id": "b1"}
+        headers = {"Authorization": f"Bearer {create_jwt_token(student)}"}
+        rv = client.post("/api/student/submit", json={"question_id": question_id, "code": code, "language": "python"},
+                         headers=headers)
+        return rv.get_json()["data"]
+
+    first = submit("s1", "print(input())")
+    assert (first["status"], first["verdict_reused"], len(calls)) == ("correct", False, 3)
+
+    # A classmate's comment/whitespace-only variant is graded without the agents
+    second = submit("s2", "print( input() )  # echo\n")
+    assert (second["status"], second["verdict_reused"], len(calls)) == ("correct", True, 3)
+    assert second["efficiency_feedback"] == {"time_complexity": "O(1)"}
+    assert second["test_results"] == first["test_results"]
+    assert StudentStatsModel().get("s2")["correct"] == 1
+    assert len(PerformanceModel().query(question_id=question_id)) == 2
+
+    # Changing the hidden testcases invalidates the stored verdict
+    QuestionModel().update(question_id, {"hidden_testcases": [{"input": "2", "expected_output": "2"}]})
+    assert submit("s2", "print(input())")["verdict_reused"] is False
+    assert len(calls) == 6
+
+
+def test_agent_failures_are_not_reused(monkeypatch):
+    get_backend().clear()
+    question_id = QuestionModel().create({"title": "A", "batch_id": "b1"})
+    monkeypatch.setattr("routes.student.compile_and_run_code", lambda *a: {"success": True, "data": {"output": ""}})
+    monkeypatch.setattr("routes.student.evaluate_code_against_testcases", lambda *a, **k: {
+        "success": True, "data": {"is_correct": False, "reason": "Groq API error", "evaluated": False}})
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {create_jwt_token({'role': 'student', 'student_id': 's1', 'batch_id': 'b1'})}"}
+    for _ in range(2):
+        data = client.post("/api/student/submit", json={"question_id": question_id, "code": "x", "language": "python"},
+                           headers=headers).get_json()["data"]
+        assert (data["status"], data["verdict_reused"]) == ("incorrect", False)
@@ -4,7 +4,9 @@ Handles role-aware topic creation, retrieval, and management
 """
 
 from models import TopicModel, BatchModel, DepartmentModel, CollegeModel
-from utils import error_response, success_response, audit_log
+from performance_service import PerformanceService
+import scope_versions
+from utils import error_response, success_response, audit_log, paginated_query, InvalidPaginationError
 from flask import jsonify
 
 
@@ -139,6 +141,7 @@ class TopicService:
             }
             
             topic_id = TopicModel().create(topic_data)
+            scope_versions.bump("topics", batch_id)
             
             # Audit log
             audit_log(user_uid, "create_topic", "topic", topic_id, {"topic_name": data.get("topic_name")})
@@ -162,14 +165,16 @@ class TopicService:
         
         try:
             print(f"Querying TopicModel with batch_id={batch_id}, is_disabled=False")
-            topics = TopicModel().query(batch_id=batch_id, is_disabled=False)
+            topics, next_cursor = paginated_query(TopicModel(), batch_id=batch_id, is_disabled=False)
             print(f"Query returned type: {type(topics)}")
             print(f"Query returned {len(topics) if topics else 0} topics")
             print(f"Topics: {topics}")
             
-            result = success_response({"topics": topics if topics else []})
+            result = success_response({"topics": topics if topics else [], "next_cursor": next_cursor})
             print(f"Returning result: {result}")
             return result
+        except InvalidPaginationError:
+            raise
         except Exception as e:
             print(f"ERROR in get_topics_for_batch: {str(e)}")
             import traceback
@@ -234,11 +239,17 @@ class TopicService:
                 update_data["topic_name"] = data["topic_name"].strip()
             
             TopicModel().update(topic_id, update_data)
+            scope_versions.bump("topics", topic.get("batch_id"))
+            
+            # Keep the denormalized copies on performance records in sync (background job)
+            job_id = None
+            if "topic_name" in update_data:
+                job_id = PerformanceService.propagate_topic(topic_id, request_user.get("uid"))
             
             # Audit log
             audit_log(request_user.get("uid"), "update_topic", "topic", topic_id, update_data)
             
-            return success_response(None, "Topic updated successfully")
+            return success_response({"job_id": job_id} if job_id else None, "Topic updated successfully")
         except Exception as e:
             return error_response("UPDATE_ERROR", str(e), status_code=500)
     
@@ -266,6 +277,7 @@ class TopicService:
         
         try:
             TopicModel().delete(topic_id)
+            scope_versions.bump("topics", topic.get("batch_id"))
             
             # Audit log
             audit_log(request_user.get("uid"), "delete_topic", "topic", topic_id, {})
@@ -1,9 +1,19 @@
 """Utility functions for CODEPRAC 2.0."""
+import base64
 import csv
 import io
+import json
 import re
 from datetime import datetime
-from flask import jsonify
+from flask import jsonify, request
+
+# Cursor pagination for list endpoints (opt-in via ?limit= / ?cursor=)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPaginationError(ValueError):
+    """Raised for malformed ?limit= or ?cursor= query parameters."""
 
 
 def validate_email(email):
@@ -122,6 +132,68 @@ def success_response(data=None, message="Success", status_code=200):
     return jsonify(response), status_code
 
 
+def encode_cursor(last_id):
+    """Encode the last document ID of a page as an opaque cursor token."""
+    if last_id is None:
+        return None
+    raw = json.dumps({"after": last_id}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a cursor token back to the document ID to start after."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"]
+    except Exception:
+        raise InvalidPaginationError("Invalid cursor")
+
+
+def get_page_args():
+    """Read pagination parameters from the current request.
+    
+    Returns:
+        (limit, start_after): both None when the client did not ask for
+        pagination, so the endpoint returns the full list as before.
+    
+    Raises:
+        InvalidPaginationError: on a non-numeric limit or a bad cursor
+    """
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limit is None and cursor is None:
+        return None, None
+    
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidPaginationError("limit must be an integer")
+        if limit < 1:
+            raise InvalidPaginationError("limit must be at least 1")
+        limit = min(limit, MAX_PAGE_SIZE)
+    
+    start_after = decode_cursor(cursor) if cursor else None
+    return limit, start_after
+
+
+def paginated_query(model, **filters):
+    """Run a list query, honouring the request's ?limit= / ?cursor= parameters.
+    
+    Returns:
+        (documents, next_cursor): next_cursor is None on the last page and
+        whenever the client did not request pagination
+    """
+    limit, start_after = get_page_args()
+    if limit is None:
+        return model.query(**filters), None
+    
+    docs, last_id = model.query_page(limit, start_after, **filters)
+    return docs, encode_cursor(last_id)
+
+
 def audit_log(admin_id, action, target_type, target_id, details=None):
     """Create audit log entry."""
     from models import AuditLogModel
@@ -0,0 +1,224 @@
+"""Verdict reuse for equivalent submissions.
+
+A submission's fingerprint hashes the question ID, the language, the
+question's testcase version and the submitted code normalized per language
+(comments dropped, formatting-only whitespace collapsed). When a fingerprint
+already has a stored verdict in verdicts/{fingerprint}, submit_code reuses
+its status, test results and efficiency feedback instead of calling the
+agents again.
+
+The testcase version is a hash of everything the agents see besides the
+code (description, sample input, open and hidden testcases), so editing or
+regenerating a question's testcases changes every fingerprint for it and
+old verdicts are simply never looked up again.
+
+Normalization is deliberately conservative: string literals are copied
+verbatim, Python is compared token by token (indentation kept), and
+newlines stay significant where the language gives them meaning
+(JavaScript ASI, C/C++ preprocessor lines). Code that cannot be tokenized
+is only stripped of trailing whitespace.
+"""
+import hashlib
+import io
+import json
+import logging
+import threading
+import tokenize
+from datetime import datetime
+
+from config import VERDICT_CACHE_ENABLED
+from models import VerdictModel
+
+logger = logging.getLogger(__name__)
+
+C_LIKE_LANGUAGES = ("c", "cpp", "java", "javascript")
+_QUOTES = "\"'`"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def stats():
+    """Hit/miss/store counters for this process."""
+    with _stats_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(_stats, hit_ratio=round(_stats["hits"] / lookups, 4) if lookups else 0.0)
+
+
+def _strip_trailing(code):
+    return "\n".join(line.rstrip() for line in code.strip().splitlines())
+
+
+def _normalize_python(code):
+    parts = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER):
+                continue
+            if token.type == tokenize.NEWLINE:
+                parts.append("\n")
+            elif token.type == tokenize.INDENT:
+                parts.append("{")
+            elif token.type == tokenize.DEDENT:
+                parts.append("}")
+            else:
+                parts.append(token.string)
+    except (tokenize.TokenError, SyntaxError):
+        return _strip_trailing(code)
+    return " ".join(parts)
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+# Characters that can combine with a neighbour into one operator token
+# (++, --, ->, <<=, //, /*, ...); whitespace between two of them is kept
+_OPERATOR_CHARS = set("+-*/%=<>!&|^~?:.#")
+
+
+def _needs_separator(left, right):
+    """Whether removing the whitespace between two characters could merge tokens."""
+    if _is_word(left) and _is_word(right):
+        return True
+    return left in _OPERATOR_CHARS and right in _OPERATOR_CHARS
+
+
+def _normalize_c_like(code, newlines_significant):
+    out = []
+    pending = None  # None, " " or "\n"
+    line_start = True
+    in_directive = False
+    i, n = 0, len(code)
+
+    def emit(text):
+        nonlocal pending, line_start
+        if out and pending == "\n":
+            out.append("\n")
+        elif out and pending and _needs_separator(out[-1][-1], text[0]):
+            out.append(" ")
+        out.append(text)
+        pending = None
+        line_start = False
+
+    while i < n:
+        ch = code[i]
+        if ch in _QUOTES:
+            j = i + 1
+            while j < n and code[j] != ch:
+                j += 2 if code[j] == "\\" else 1
+            emit(code[i:j + 1])
+            i = j + 1
+        elif ch == "\\":
+            # Escapes outside literals (regex literals, macro continuations) stay verbatim
+            emit(code[i:i + 2])
+            i += 2
+        elif code.startswith("//", i):
+            j = code.find("\n", i)
+            i = n if j == -1 else j
+        elif code.startswith("/*", i):
+            j = code.find("*/", i + 2)
+            i = n if j == -1 else j + 2
+            pending = pending or " "
+        elif ch == "\n":
+            if newlines_significant or in_directive:
+                pending = "\n"
+            elif pending is None:
+                pending = " "
+            in_directive = False
+            line_start = True
+            i += 1
+        elif ch.isspace():
+            if pending is None:
+                pending = " "
+            i += 1
+        else:
+            if ch == "#" and line_start:
+                in_directive = True
+            emit(ch)
+            i += 1
+    return "".join(out)
+
+
+def normalize_code(code, language):
+    """Normalize code so formatting/comment-only edits compare equal.
+
+    Args:
+        code: Source code
+        language: python, c, cpp, java or javascript (others are only stripped)
+
+    Returns:
+        str: Normalized code
+    """
+    language = (language or "").lower()
+    if language == "python":
+        return _normalize_python(code)
+    if language in C_LIKE_LANGUAGES:
+        return _normalize_c_like(code, newlines_significant=language == "javascript")
+    return _strip_trailing(code)
+
+
+def testcase_version(question):
+    """Hash of the question content the agents grade against."""
+    raw = json.dumps({
+        "description": question.get("description"),
+        "sample_input": question.get("sample_input"),
+        "open_testcases": question.get("open_testcases") or [],
+        "hidden_testcases": question.get("hidden_testcases") or [],
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def fingerprint(question, code, language):
+    """Fingerprint of a submission (the verdict document ID)."""
+    raw = json.dumps(
+        [question["id"], (language or "").lower(), testcase_version(question), normalize_code(code, language)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(fingerprint_id):
+    """Stored verdict for a fingerprint (status, test_results, efficiency_feedback) or None."""
+    if not VERDICT_CACHE_ENABLED:
+        return None
+    try:
+        verdict = VerdictModel().get(fingerprint_id)
+    except Exception as e:
+        logger.error(f"Failed to read verdict {fingerprint_id}: {e}")
+        verdict = None
+    _count("hits" if verdict else "misses")
+    return verdict
+
+
+def store(fingerprint_id, question, language, verdict):
+    """Store a verdict for reuse; failures are logged and never raised.
+
+    Args:
+        fingerprint_id: fingerprint() of the submission
+        question: The question document
+        language: Submission language
+        verdict: dict with status, test_results and efficiency_feedback
+    """
+    if not VERDICT_CACHE_ENABLED:
+        return
+    model = VerdictModel()
+    try:
+        model.backend.set(model.collection_name, fingerprint_id, {
+            "question_id": question["id"],
+            "language": (language or "").lower(),
+            "testcase_version": testcase_version(question),
+            "status": verdict["status"],
+            "test_results": verdict["test_results"],
+            "efficiency_feedback": verdict.get("efficiency_feedback"),
+            "created_at": datetime.utcnow(),
+        })
+        model.invalidate(fingerprint_id)
+        _count("stores")
+    except Exception as e:
+        logger.error(f"Failed to store verdict {fingerprint_id}: {e}")